@@ -0,0 +1,127 @@
+"""
+Streaming historical backtest pipeline
+
+Each stage is a generator consuming the previous one, so a day flows through
+ZCB -> forwards -> caplet vols -> model calibration before the next day is read, and
+only the previous day's results are kept (as warm start). Memory therefore does not
+grow with the length of the history.
+
+    for result in run_backtest("curves_store", calibrate=my_calibration):
+        ...
+"""
+
+import os
+
+from Curve_store import Curve_store
+from Curves import Vol_curve
+from Market_data import read_quotes
+
+__all__ = [
+    "read_snapshots",
+    "bootstrap_stage",
+    "strip_stage",
+    "calibration_stage",
+    "run_backtest",
+]
+
+
+def read_snapshots(source):
+    """
+    stream (date, tenors, zcb_curve, cap_prices) snapshots
+
+    Args:
+        source: str, Curve_store or iterable => curve store directory, .csv / .parquet quote
+                file (see Market_data.read_quotes), opened store, or an iterable of
+                (date, tenors, zcb_curve, cap_prices) tuples
+    Returns:
+        snapshots: generator => (date, tenors, zcb_curve, cap_prices) tuples
+    """
+    if isinstance(source, str) and os.path.isfile(source):
+        yield from read_quotes(source)
+        return
+    if isinstance(source, str):
+        source = Curve_store(source)
+    if isinstance(source, Curve_store):
+        for ind in range(len(source)):
+            row = source[ind]
+            yield row["dates"], row["tenors"], row["zcb_curve"], row["cap_prices"]
+    else:
+        for snapshot in source:
+            yield snapshot
+
+
+def bootstrap_stage(snapshots, interp_method="piecewise constant"):
+    """
+    build the forward and forward swap curves of each snapshot
+
+    Args:
+        snapshots: iterable => (date, tenors, zcb_curve, cap_prices) tuples
+        interp_method: str => Vol_curve interp_method (default 'piecewise constant')
+    Returns:
+        curves: generator => (date, Vol_curve) tuples (not stripped yet)
+    """
+    for date, tenors, zcb_curve, cap_prices in snapshots:
+        vol_curve = Vol_curve(
+            list(map(float, cap_prices)),
+            list(map(float, zcb_curve)),
+            list(map(float, tenors)),
+            interp_method=interp_method,
+        )
+        yield date, vol_curve
+
+
+def strip_stage(curves, warm_start=True, failure_policy="raise"):
+    """
+    strip caplet vols, warm-starting each day from the previous day's vols
+
+    Args:
+        curves: iterable => (date, Vol_curve) tuples
+        warm_start: bool => use the previous stripped curve as initial guesses (default True)
+        failure_policy: str => see Vol_curve.generate_caplet_vol_term_structure (default 'raise')
+    Returns:
+        curves: generator => (date, Vol_curve) tuples (stripped)
+    """
+    previous = None
+    for date, vol_curve in curves:
+        vol_curve.generate_caplet_vol_term_structure(
+            warm_start=previous if warm_start else None, failure_policy=failure_policy
+        )
+        previous = vol_curve
+        yield date, vol_curve
+
+
+def calibration_stage(curves, calibrate=None):
+    """
+    calibrate a model on each stripped curve, warm-starting from the previous result
+
+    Args:
+        curves: iterable => (date, Vol_curve) tuples (stripped)
+        calibrate: callable => calibrate(vol_curve, previous_result) -> result (default None,
+                   i.e. no calibration)
+    Returns:
+        results: generator => dict with keys "date", "vol_curve" and "calibration"
+    """
+    previous = None
+    for date, vol_curve in curves:
+        if calibrate is not None:
+            previous = calibrate(vol_curve, previous)
+        yield {"date": date, "vol_curve": vol_curve, "calibration": previous}
+
+
+def run_backtest(source, calibrate=None, warm_start=True, failure_policy="raise"):
+    """
+    full pipeline: read -> bootstrap -> strip -> calibrate
+
+    Args:
+        source: str, Curve_store or iterable => see read_snapshots
+        calibrate: callable => see calibration_stage (default None)
+        warm_start: bool => warm start the strip from the previous day (default True)
+        failure_policy: str => see Vol_curve.generate_caplet_vol_term_structure (default 'raise')
+    Returns:
+        results: generator => see calibration_stage
+    """
+    snapshots = read_snapshots(source)
+    curves = strip_stage(
+        bootstrap_stage(snapshots), warm_start=warm_start, failure_policy=failure_policy
+    )
+    return calibration_stage(curves, calibrate=calibrate)
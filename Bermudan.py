@@ -0,0 +1,186 @@
+"""
+Longstaff-Schwartz Bermudan swaption pricing on simulated paths
+
+Works with any model whose simulate(n_paths, chunk_size, seed) yields path chunks and
+whose swap_features(chunk, expiry_index, end_index) returns the forward swap rate and the
+deflated annuity per path (e.g. LMM.LMM). Paths are streamed in chunks and reduced to
+those two numbers per exercise date, so memory grows with paths * exercise dates only.
+
+    boundary = fit_exercise_boundary(model, [4, 8, 12, 16], 20, 0.03)
+    price, error = price_bermudan_swaption(model, [4, 8, 12, 16], 20, 0.03, boundary=boundary)
+"""
+
+import numpy as np
+from Precision import storage_dtype
+
+__all__ = ["fit_exercise_boundary", "price_bermudan_swaption"]
+
+
+def _exercise_features(model, exercise_indices, end_index, n_paths, chunk_size, seed):
+    # stream the chunks into compact (dates, paths) swap rate / deflated annuity arrays,
+    # stored in the Precision storage dtype
+    swap_rates = np.empty((len(exercise_indices), n_paths), dtype=storage_dtype())
+    annuities = np.empty((len(exercise_indices), n_paths), dtype=storage_dtype())
+    start = 0
+    for chunk in model.simulate(n_paths, chunk_size, seed):
+        for date, expiry_index in enumerate(exercise_indices):
+            rates, annuity = model.swap_features(chunk, expiry_index, end_index)
+            swap_rates[date, start : start + len(rates)] = rates
+            annuities[date, start : start + len(rates)] = annuity
+        start += len(rates)
+    return swap_rates, annuities
+
+
+def _basis(swap_rates, boundary):
+    # polynomial basis in the standardized swap rate, (dates, paths, degree + 1)
+    x = (swap_rates - boundary["mean"][:, None]) / boundary["scale"][:, None]
+    return x[..., None] ** np.arange(boundary["degree"] + 1)
+
+
+def _exercise_values(swap_rates, annuities, strike, payer):
+    sign = 1.0 if payer else -1.0
+    return np.maximum(sign * annuities * (swap_rates - strike), 0.0)
+
+
+def fit_exercise_boundary(
+    model,
+    exercise_indices,
+    end_index,
+    strike,
+    payer=True,
+    n_paths=20000,
+    chunk_size=10000,
+    degree=3,
+    seed=0,
+):
+    """
+    Longstaff-Schwartz regression of the continuation value on the forward swap rate
+    Note: the in-the-money Gram matrices of all exercise dates come from one einsum; the
+          backward induction then only solves a (degree + 1) system per date
+
+    Args:
+        model: LMM => simulation model, see module docstring
+        exercise_indices: list[int] => reset date indices at which exercise is allowed (increasing)
+        end_index: int => swap end period (exclusive)
+        strike: float => fixed rate
+        payer: bool => payer (True) or receiver (False) swaption (default True)
+        n_paths: int => regression paths (default 20000)
+        chunk_size: int => paths per simulated chunk (default 10000)
+        degree: int => polynomial degree of the regression basis (default 3)
+        seed: int => random seed of the regression paths (default 0)
+    Returns:
+        boundary: dict => "exercise_indices", "end_index", "degree", "mean", "scale" and
+                  "coefficients" ((dates, degree + 1), last date unused)
+    """
+    exercise_indices = np.asarray(exercise_indices, dtype=np.int64)
+    assert (np.diff(exercise_indices) > 0).all(), "exercise_indices must be increasing"
+    assert exercise_indices[-1] < end_index, "exercise_indices must be < end_index"
+
+    swap_rates, annuities = _exercise_features(
+        model, exercise_indices, end_index, n_paths, chunk_size, seed
+    )
+    boundary = {
+        "exercise_indices": exercise_indices,
+        "end_index": end_index,
+        "degree": degree,
+        "mean": swap_rates.mean(axis=1, dtype=np.float64),
+        "scale": np.maximum(swap_rates.std(axis=1, dtype=np.float64), 1e-12),
+    }
+    exercise = _exercise_values(swap_rates, annuities, strike, payer)
+    in_the_money = exercise > 0.0
+    basis = _basis(swap_rates, boundary)
+    # regressions use in-the-money paths only; their Gram matrices do not depend on the
+    # exercise policy, so they are built for every date at once (accumulated in float64)
+    grams = np.einsum("dpk,dp,dpl->dkl", basis, in_the_money, basis, dtype=np.float64)
+
+    coefficients = np.zeros((len(exercise_indices), degree + 1))
+    cashflows = exercise[
+        -1
+    ].copy()  # deflated value of the optimal policy from date d on
+    for date in range(len(exercise_indices) - 2, -1, -1):
+        rhs = np.einsum(
+            "pk,p->k",
+            basis[date],
+            np.where(in_the_money[date], cashflows, 0.0),
+            dtype=np.float64,
+        )
+        coefficients[date] = np.linalg.lstsq(grams[date], rhs, rcond=None)[0]
+        continuation = basis[date] @ coefficients[date]
+        exercise_now = in_the_money[date] & (exercise[date] > continuation)
+        cashflows = np.where(exercise_now, exercise[date], cashflows)
+    boundary["coefficients"] = coefficients
+    return boundary
+
+
+def price_bermudan_swaption(
+    model,
+    exercise_indices,
+    end_index,
+    strike,
+    payer=True,
+    N=1.0,
+    n_paths=20000,
+    chunk_size=10000,
+    degree=3,
+    seed=1,
+    boundary=None,
+):
+    """
+    Bermudan swaption price from an exercise boundary applied to independent paths
+    (low-biased estimate; the paths are priced chunk by chunk, nothing is kept)
+
+    Args:
+        model: LMM => simulation model, see module docstring
+        exercise_indices: list[int] => reset date indices at which exercise is allowed (increasing)
+        end_index: int => swap end period (exclusive)
+        strike: float => fixed rate
+        payer: bool => payer (True) or receiver (False) swaption (default True)
+        N: float => notional amount (default 1.0)
+        n_paths: int => pricing paths (default 20000)
+        chunk_size: int => paths per simulated chunk (default 10000)
+        degree: int => regression degree when boundary is None (default 3)
+        seed: int => random seed of the pricing paths (default 1)
+        boundary: dict => from fit_exercise_boundary (default None => fitted on n_paths
+                  paths with seed + 1)
+    Returns:
+        (price, standard_error): (float, float)
+    """
+    if boundary is None:
+        boundary = fit_exercise_boundary(
+            model,
+            exercise_indices,
+            end_index,
+            strike,
+            payer,
+            n_paths,
+            chunk_size,
+            degree,
+            seed + 1,
+        )
+    exercise_indices = np.asarray(exercise_indices, dtype=np.int64)
+    assert (
+        np.array_equal(exercise_indices, boundary["exercise_indices"])
+        and end_index == boundary["end_index"]
+    ), "boundary was fitted for another swaption"
+
+    total = 0.0
+    total_sq = 0.0
+    for chunk in model.simulate(n_paths, chunk_size, seed):
+        features = [model.swap_features(chunk, m, end_index) for m in exercise_indices]
+        swap_rates = np.array([rates for rates, _ in features])
+        annuities = np.array([annuity for _, annuity in features])
+        exercise = _exercise_values(swap_rates, annuities, strike, payer)
+        continuation = np.einsum(
+            "dpk,dk->dp", _basis(swap_rates, boundary), boundary["coefficients"]
+        )
+        continuation[-1] = 0.0
+        exercise_now = (exercise > 0.0) & (exercise > continuation)
+        # first exercise date per path (paths never exercised pay nothing)
+        first = np.argmax(exercise_now, axis=0)
+        paths = np.arange(exercise.shape[1])
+        values = N * np.where(exercise_now[first, paths], exercise[first, paths], 0.0)
+        values = values.astype(np.float64, copy=False)
+        total += values.sum()
+        total_sq += (values**2).sum()
+    mean = total / n_paths
+    return mean, np.sqrt(max(total_sq / n_paths - mean**2, 0.0) / n_paths)
@@ -0,0 +1,284 @@
+import numpy as np
+from Templates import Curve
+
+__all__ = [
+    "Fitted_zcb_curve",
+    "nss_yields",
+    "nss_jacobian",
+    "fit_nelson_siegel_svensson",
+    "fit_nelson_siegel_svensson_batch",
+    "fit_smoothing_spline",
+]
+
+# lambda (decay) grid used for the vectorized profile fit / initial guess
+LAMBDA_GRID = np.array([0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0])
+LAMBDA_BOUNDS = (0.05, 30.0)
+
+
+def _nss_loadings(T, lambda_1, lambda_2):
+    # factor loadings of beta_0..beta_3, shape (..., len(T), 4)
+    T = np.asarray(T, dtype=np.float64)
+    lambda_1 = np.asarray(lambda_1, dtype=np.float64)[..., None]
+    lambda_2 = np.asarray(lambda_2, dtype=np.float64)[..., None]
+    x_1 = T / lambda_1
+    x_2 = T / lambda_2
+    # (1 - e^-x) / x with its x -> 0 limit of 1
+    g_1 = np.where(x_1 > 0.0, -np.expm1(-x_1) / np.where(x_1 > 0.0, x_1, 1.0), 1.0)
+    g_2 = np.where(x_2 > 0.0, -np.expm1(-x_2) / np.where(x_2 > 0.0, x_2, 1.0), 1.0)
+    return np.stack(
+        np.broadcast_arrays(
+            np.ones_like(x_1), g_1, g_1 - np.exp(-x_1), g_2 - np.exp(-x_2)
+        ),
+        axis=-1,
+    )
+
+
+def nss_yields(T, params):
+    """
+    Nelson-Siegel-Svensson continuously compounded zero yields
+
+    Args:
+        T: (float or np.ndarray) => tenors in years
+        params: (list[float]) => [beta_0, beta_1, beta_2, beta_3, lambda_1, lambda_2]
+    Returns:
+        yields: (np.ndarray) => zero yields @ T
+    """
+    beta = np.asarray(params[:4], dtype=np.float64)
+    loadings = _nss_loadings(np.atleast_1d(T), params[4], params[5])
+    yields = loadings @ beta
+    return yields if np.ndim(T) else yields[0]
+
+
+def nss_jacobian(T, params):
+    """
+    analytic Jacobian of the NSS yields w.r.t. the parameters
+
+    Args:
+        T: (np.ndarray) => tenors in years (> 0)
+        params: (list[float]) => [beta_0, beta_1, beta_2, beta_3, lambda_1, lambda_2]
+    Returns:
+        jacobian: (np.ndarray) => shape (len(T), 6), d yield / d params
+    """
+    T = np.asarray(T, dtype=np.float64)
+    beta_1, beta_2, beta_3, lambda_1, lambda_2 = params[1:]
+    loadings = _nss_loadings(T, lambda_1, lambda_2)
+
+    def _dloadings_dlambda(lambda_):
+        # g(x) = (1 - e^-x) / x, x = T / lambda, dx/dlambda = -x / lambda
+        x = T / lambda_
+        e = np.exp(-x)
+        dg = (e * (1.0 + x) - 1.0) / (x * x)
+        dx = -x / lambda_
+        return dg * dx, (dg + e) * dx
+
+    dg1_1, dg2_1 = _dloadings_dlambda(lambda_1)
+    _, dg2_2 = _dloadings_dlambda(lambda_2)
+    return np.column_stack([loadings, beta_1 * dg1_1 + beta_2 * dg2_1, beta_3 * dg2_2])
+
+
+class Fitted_zcb_curve(Curve):
+    """
+    Zcb curve from a global fit (Nelson-Siegel-Svensson or penalized B-spline on zero
+    yields). Same interp(T) API as Zcb_curve.
+    """
+
+    def __init__(self, method, params, tenors, zcb_curve, spline=None):
+        """
+        Class constructor (use the fit_* functions)
+
+        Args:
+            method: str => "nss" or "smoothing spline"
+            params: np.ndarray => NSS parameters or spline coefficients
+            tenors: np.ndarray => tenors of the fitted quotes
+            zcb_curve: np.ndarray => fitted (market) zcb quotes
+            spline: scipy.interpolate.BSpline => yield spline (smoothing spline only)
+        Returns:
+            Fitted_zcb_curve object
+        """
+        Curve.__init__(self)
+        assert method in [
+            "nss",
+            "smoothing spline",
+        ], "method must be in ['nss', 'smoothing spline']"
+        self.method = method
+        self.params = params
+        self.tenors = tenors
+        self.zcb_curve = zcb_curve
+        self.spline = spline
+
+    def yields(self, T):
+        """
+        fitted continuously compounded zero yield @ tenor T
+
+        Args:
+            T: float or np.ndarray => tenor(s) in years
+        Returns:
+            yields: float or np.ndarray
+        """
+        if self.method == "nss":
+            return nss_yields(T, self.params)
+        return self.spline(T)
+
+    def interp(self, T):
+        """
+        fitted zcb value @ tenor T
+
+        Args:
+            T: float or np.ndarray => tenor(s) in years
+        Returns:
+            zcb: float or np.ndarray => fitted zcb price(s) @ T
+        """
+        return np.exp(-self.yields(T) * np.asarray(T))
+
+    def residuals(self):
+        """
+        fitted minus market zcb prices at the quoted tenors
+
+        Args:
+            -
+        Returns:
+            residuals: np.ndarray
+        """
+        return self.interp(self.tenors) - self.zcb_curve
+
+
+def _market_yields(zcb_curves, tenors):
+    zcb_curves = np.asarray(zcb_curves, dtype=np.float64)
+    tenors = np.asarray(tenors, dtype=np.float64)
+    assert zcb_curves.shape[-1] == len(tenors), "len(zcb_curve) must = len(tenors)"
+    assert (tenors > 0.0).all(), "tenors must be positive"
+    return zcb_curves, tenors, -np.log(zcb_curves) / tenors
+
+
+def _profile_fit(yields, tenors, weights, lambda_grid):
+    """
+    vectorized NSS fit with the lambdas restricted to a grid: for each (lambda_1, lambda_2)
+    pair the betas of every curve come from one weighted linear least-squares solve
+    """
+    lambda_1, lambda_2 = np.meshgrid(lambda_grid, lambda_grid, indexing="ij")
+    mask = lambda_1 < lambda_2  # ordering removes the symmetric duplicates
+    lambda_1, lambda_2 = lambda_1[mask], lambda_2[mask]
+
+    loadings = _nss_loadings(tenors, lambda_1, lambda_2)  # (pairs, n, 4)
+    sqrt_w = np.sqrt(weights)
+    design = loadings * sqrt_w[:, None]
+    rhs = (yields * sqrt_w).T  # (n, curves)
+    # pseudo-inverse per pair, shared by all curves
+    betas = np.linalg.pinv(design) @ rhs  # (pairs, 4, curves)
+    sse = np.sum((design @ betas - rhs) ** 2, axis=1)  # (pairs, curves)
+    best = np.argmin(sse, axis=0)
+    curves = np.arange(yields.shape[0])
+    return np.column_stack([betas[best, :, curves], lambda_1[best], lambda_2[best]])
+
+
+def fit_nelson_siegel_svensson_batch(
+    zcb_curves, tenors, weights=None, lambda_grid=LAMBDA_GRID
+):
+    """
+    fit NSS to many curves sharing the same tenors (fully vectorized, no per-curve solver)
+    Note: lambdas are restricted to lambda_grid, use fit_nelson_siegel_svensson to refine
+
+    Args:
+        zcb_curves: 2d array-like => (curves, tenors) zcb quotes
+        tenors: list[float] => tenors in years
+        weights: list[float] => price weight per tenor (default None => equal)
+        lambda_grid: np.ndarray => candidate lambdas (default LAMBDA_GRID)
+    Returns:
+        curves: list[Fitted_zcb_curve]
+    """
+    zcb_curves, tenors, yields = _market_yields(np.atleast_2d(zcb_curves), tenors)
+    weights = np.ones(len(tenors)) if weights is None else np.asarray(weights, float)
+    # price errors ~ T * P * yield errors: weight the linear yield fit accordingly
+    yield_weights = weights * (tenors * zcb_curves.mean(axis=0)) ** 2
+    params = _profile_fit(yields, tenors, yield_weights, np.asarray(lambda_grid, float))
+    return [
+        Fitted_zcb_curve("nss", p, tenors, zcb) for p, zcb in zip(params, zcb_curves)
+    ]
+
+
+def fit_nelson_siegel_svensson(zcb_curve, tenors, weights=None, initial_guess=None):
+    """
+    fit NSS to noisy zcb quotes by weighted nonlinear least squares on prices with the
+    analytic Jacobian (trust region, lambdas bounded to LAMBDA_BOUNDS)
+
+    Args:
+        zcb_curve: list[float] => zcb quotes
+        tenors: list[float] => tenors in years
+        weights: list[float] => price weight per quote (default None => equal)
+        initial_guess: list[float] => NSS parameters (default None => grid profile fit)
+    Returns:
+        curve: Fitted_zcb_curve
+    """
+    from scipy import optimize
+
+    zcb_curve, tenors, yields = _market_yields(zcb_curve, tenors)
+    weights = np.ones(len(tenors)) if weights is None else np.asarray(weights, float)
+    if initial_guess is None:
+        # price errors ~ T * P * yield errors: weight the linear yield fit accordingly
+        yield_weights = weights * (tenors * zcb_curve) ** 2
+        initial_guess = _profile_fit(
+            yields[None, :], tenors, yield_weights, LAMBDA_GRID
+        )[0]
+    sqrt_w = np.sqrt(weights)
+
+    def residuals(params):
+        return sqrt_w * (np.exp(-nss_yields(tenors, params) * tenors) - zcb_curve)
+
+    def jacobian(params):
+        model = np.exp(-nss_yields(tenors, params) * tenors)
+        # d exp(-y T) / d params = -T exp(-y T) dy / d params
+        return (-sqrt_w * tenors * model)[:, None] * nss_jacobian(tenors, params)
+
+    lower = [-np.inf] * 4 + [LAMBDA_BOUNDS[0]] * 2
+    upper = [np.inf] * 4 + [LAMBDA_BOUNDS[1]] * 2
+    initial_guess = np.clip(initial_guess, lower, upper)
+    result = optimize.least_squares(
+        residuals, initial_guess, jac=jacobian, bounds=(lower, upper), x_scale="jac"
+    )
+    return Fitted_zcb_curve("nss", result.x, tenors, zcb_curve)
+
+
+def fit_smoothing_spline(
+    zcb_curves, tenors, n_knots=8, degree=3, smoothing=1e-6, weights=None
+):
+    """
+    penalized B-spline (P-spline) fit of zero yields
+    Note: the penalized normal equations depend on the tenors only, so one factorization
+          serves every curve => many curves are fitted in a single solve
+
+    Args:
+        zcb_curves: array-like => one curve (tenors,) or many curves (curves, tenors)
+        tenors: list[float] => tenors in years
+        n_knots: int => number of interior knot intervals (default 8)
+        degree: int => spline degree (default 3)
+        smoothing: float => second-difference penalty weight (default 1e-6)
+        weights: list[float] => yield weight per tenor (default None => equal)
+    Returns:
+        curve(s): Fitted_zcb_curve or list[Fitted_zcb_curve] (matches the input shape)
+    """
+    from scipy.interpolate import BSpline
+
+    single = np.ndim(zcb_curves) == 1
+    zcb_curves, tenors, yields = _market_yields(np.atleast_2d(zcb_curves), tenors)
+    weights = np.ones(len(tenors)) if weights is None else np.asarray(weights, float)
+
+    breaks = np.linspace(0.0, tenors.max(), n_knots + 1)
+    knots = np.concatenate(([0.0] * degree, breaks, [breaks[-1]] * degree))
+    basis = BSpline.design_matrix(tenors, knots, degree).toarray()
+    difference = np.diff(np.eye(basis.shape[1]), n=2, axis=0)
+
+    lhs = basis.T @ (weights[:, None] * basis) + smoothing * difference.T @ difference
+    rhs = basis.T @ (weights[:, None] * yields.T)
+    coefficients = np.linalg.solve(lhs, rhs).T  # (curves, n_basis)
+
+    curves = [
+        Fitted_zcb_curve(
+            "smoothing spline",
+            c,
+            tenors,
+            zcb,
+            spline=BSpline(knots, c, degree, extrapolate=True),
+        )
+        for c, zcb in zip(coefficients, zcb_curves)
+    ]
+    return curves[0] if single else curves
@@ -0,0 +1,296 @@
+import json
+import os
+
+import numpy as np
+
+__all__ = ["Curve_store"]
+
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+
+# column name -> (dtype, width), width is in units of n_tenors:
+#   "key" => 1 value per row, "n" => n_tenors values, "n-1" => n_tenors - 1 values
+COLUMNS = {
+    "dates": (np.dtype("<i8"), "key"),
+    "scenarios": (np.dtype("<i8"), "key"),
+    "tenors": (np.dtype("<f8"), "n"),
+    "zcb_curve": (np.dtype("<f8"), "n"),
+    "cap_prices": (np.dtype("<f8"), "n-1"),
+    "caplet_black_vols": (np.dtype("<f8"), "n-1"),
+    "caplet_normal_vols": (np.dtype("<f8"), "n-1"),
+}
+
+
+class Curve_store:
+    """
+    Columnar, memory-mapped store of curve snapshots (one row per date/scenario).
+
+    Layout on disk (one directory per store):
+        header.json             => format version, n_tenors and committed row count
+        <column>.bin            => raw little-endian C-order array, one row per snapshot
+
+    Columns are opened with np.memmap in read-only mode, so indexing a row only pages in
+    the bytes of that row and every returned array is a zero-copy view. Rows are appended
+    in place; the header count is written last so a crashed append is simply ignored.
+    """
+
+    def __init__(self, path):
+        """
+        Class constructor (opens an existing store, see Curve_store.create)
+
+        Args:
+            path: str => store directory
+        Returns:
+            Curve_store object
+        """
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE)) as f:
+            header = json.load(f)
+        assert (
+            header["version"] == FORMAT_VERSION
+        ), f"unsupported curve store version {header['version']}"
+        self.n_tenors = header["n_tenors"]
+        self.count = header["count"]
+        self._columns = {}
+        self._map_columns()
+
+    @classmethod
+    def create(cls, path, n_tenors):
+        """
+        create an empty store
+
+        Args:
+            path: str => store directory (created if missing, must not hold a store)
+            n_tenors: int => number of tenors per snapshot
+        Returns:
+            Curve_store object
+        """
+        assert n_tenors >= 2, "n_tenors must be >= 2"
+        os.makedirs(path, exist_ok=True)
+        assert not os.path.exists(
+            os.path.join(path, HEADER_FILE)
+        ), f"a curve store already exists at {path}"
+        for name in COLUMNS:
+            open(os.path.join(path, f"{name}.bin"), "wb").close()
+        cls._write_header(path, n_tenors, 0)
+        return cls(path)
+
+    @staticmethod
+    def _write_header(path, n_tenors, count):
+        tmp_file = os.path.join(path, HEADER_FILE + ".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(
+                {"version": FORMAT_VERSION, "n_tenors": n_tenors, "count": count}, f
+            )
+        os.replace(tmp_file, os.path.join(path, HEADER_FILE))
+
+    def _width(self, name):
+        kind = COLUMNS[name][1]
+        if kind == "key":
+            return None
+        return self.n_tenors if kind == "n" else self.n_tenors - 1
+
+    def _map_columns(self):
+        self._columns = {}
+        for name, (dtype, _) in COLUMNS.items():
+            width = self._width(name)
+            shape = (self.count,) if width is None else (self.count, width)
+            if self.count == 0:
+                # np.memmap cannot map an empty file
+                self._columns[name] = np.empty(shape, dtype=dtype)
+            else:
+                self._columns[name] = np.memmap(
+                    os.path.join(self.path, f"{name}.bin"),
+                    dtype=dtype,
+                    mode="r",
+                    shape=shape,
+                )
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """
+        memory-mapped column over all rows
+
+        Args:
+            name: str => one of COLUMNS
+        Returns:
+            column: np.memmap => read-only array of shape (count,) or (count, width)
+        """
+        assert name in COLUMNS, f"name must be in {list(COLUMNS)}"
+        return self._columns[name]
+
+    @property
+    def dates(self):
+        return self._columns["dates"]
+
+    @property
+    def scenarios(self):
+        return self._columns["scenarios"]
+
+    def __getitem__(self, ind):
+        """
+        zero-copy views of one row
+
+        Args:
+            ind: int => row index
+        Returns:
+            row: dict[str, np.ndarray or int] => column name -> value / row view
+        """
+        if ind < 0:
+            ind += self.count
+        if not 0 <= ind < self.count:
+            raise IndexError(f"row {ind} out of range for store of {self.count} rows")
+        return {name: column[ind] for name, column in self._columns.items()}
+
+    def find(self, date, scenario=0):
+        """
+        row indices of a date (and scenario)
+
+        Args:
+            date: int => date key (e.g. 20240131)
+            scenario: int => scenario id (default 0)
+        Returns:
+            rows: np.ndarray[int] => matching row indices
+        """
+        return np.flatnonzero((self.dates == date) & (self.scenarios == scenario))
+
+    def extend(
+        self,
+        dates,
+        tenors,
+        zcb_curves,
+        cap_prices,
+        caplet_black_vols=None,
+        caplet_normal_vols=None,
+        scenarios=None,
+    ):
+        """
+        append many snapshots at once (missing vols are stored as NaN)
+
+        Args:
+            dates: list[int] => date keys, one per row
+            tenors: 2d array-like => (rows, n_tenors) tenors in years
+            zcb_curves: 2d array-like => (rows, n_tenors) zcb prices
+            cap_prices: 2d array-like => (rows, n_tenors - 1) cap prices
+            caplet_black_vols: 2d array-like => (rows, n_tenors - 1) (default NaN)
+            caplet_normal_vols: 2d array-like => (rows, n_tenors - 1) (default NaN)
+            scenarios: list[int] => scenario ids (default 0)
+        Returns:
+            -
+        """
+        dates = np.atleast_1d(np.asarray(dates, dtype=np.int64))
+        n_rows = len(dates)
+        values = {
+            "dates": dates,
+            "scenarios": (
+                np.zeros(n_rows, dtype=np.int64)
+                if scenarios is None
+                else np.atleast_1d(np.asarray(scenarios, dtype=np.int64))
+            ),
+            "tenors": tenors,
+            "zcb_curve": zcb_curves,
+            "cap_prices": cap_prices,
+            "caplet_black_vols": caplet_black_vols,
+            "caplet_normal_vols": caplet_normal_vols,
+        }
+        for name, (dtype, _) in COLUMNS.items():
+            width = self._width(name)
+            shape = (n_rows,) if width is None else (n_rows, width)
+            if values[name] is None:
+                values[name] = np.full(shape, np.nan, dtype=dtype)
+            values[name] = np.asarray(values[name], dtype=dtype).reshape(shape)
+
+        for name, (dtype, _) in COLUMNS.items():
+            width = self._width(name) or 1
+            committed_bytes = self.count * width * np.dtype(dtype).itemsize
+            with open(os.path.join(self.path, f"{name}.bin"), "r+b") as f:
+                # drop bytes of a previously interrupted append
+                f.truncate(committed_bytes)
+                f.seek(committed_bytes)
+                f.write(np.ascontiguousarray(values[name]).tobytes())
+
+        self.count += n_rows
+        self._write_header(self.path, self.n_tenors, self.count)
+        self._map_columns()
+
+    def append(
+        self,
+        date,
+        tenors,
+        zcb_curve,
+        cap_prices,
+        caplet_black_vols=None,
+        caplet_normal_vols=None,
+        scenario=0,
+    ):
+        """
+        append one snapshot (e.g. the daily curve)
+
+        Args:
+            date: int => date key (e.g. 20240131)
+            tenors: list[float] => tenors in years
+            zcb_curve: list[float] => zcb prices
+            cap_prices: list[float] => ATM cap prices (len(tenors) - 1)
+            caplet_black_vols: list[float] => stripped caplet Black vols (default NaN)
+            caplet_normal_vols: list[float] => stripped caplet Normal vols (default NaN)
+            scenario: int => scenario id (default 0)
+        Returns:
+            -
+        """
+        self.extend(
+            [date],
+            [tenors],
+            [zcb_curve],
+            [cap_prices],
+            None if caplet_black_vols is None else [caplet_black_vols],
+            None if caplet_normal_vols is None else [caplet_normal_vols],
+            [scenario],
+        )
+
+    def append_vol_curve(self, date, vol_curve, scenario=0):
+        """
+        append the inputs (and stripped vols, if available) of a Vol_curve
+
+        Args:
+            date: int => date key (e.g. 20240131)
+            vol_curve: Vol_curve => vol curve object
+            scenario: int => scenario id (default 0)
+        Returns:
+            -
+        """
+        self.append(
+            date,
+            vol_curve.tenors,
+            vol_curve.zcb_curve,
+            vol_curve.cap_price_curve,
+            getattr(vol_curve, "caplet_black_vols", None),
+            getattr(vol_curve, "caplet_normal_vols", None),
+            scenario,
+        )
+
+    def to_vol_curve(self, ind, interp_method="piecewise constant"):
+        """
+        rebuild a Vol_curve from a row (stored vols are attached unless they are all NaN)
+
+        Args:
+            ind: int => row index
+            interp_method: str => Vol_curve interp_method (default 'piecewise constant')
+        Returns:
+            vol_curve: Vol_curve
+        """
+        from Curves import Vol_curve
+
+        row = self[ind]
+        vol_curve = Vol_curve(
+            row["cap_prices"].tolist(),
+            row["zcb_curve"].tolist(),
+            row["tenors"].tolist(),
+            interp_method=interp_method,
+        )
+        # all NaN => never stripped; partial NaN => tenors a "skip" strip could not solve
+        if not np.isnan(row["caplet_black_vols"]).all():
+            vol_curve.caplet_black_vols = row["caplet_black_vols"].tolist()
+            vol_curve.caplet_normal_vols = row["caplet_normal_vols"].tolist()
+        return vol_curve
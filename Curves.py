@@ -1,7 +1,156 @@
-from scipy import interpolate
-from scipy.interpolate import CubicSpline
-from Templates import *
-from utils import *
+import functools
+import threading
+
+import numpy as np
+from Instrumentation import instrumented, stage
+from Precision import in_float64
+from Schedules import legacy_schedule
+from Templates import Curve
+from utils import (
+    _readonly_array,
+    black_caplet_price,
+    black_caplet_vega,
+    forward_curve_to_forward_swap_curve,
+    get_black_cap_iv,
+    get_black_caplet_iv,
+    get_normal_caplet_iv,
+    normal_caplet_price,
+    normal_caplet_vega,
+    zcb_curve_to_forward_curve,
+    zcb_curve_to_forward_swap_curve,
+)
+
+# scipy.interpolate is imported lazily (first spline / interpolator build)
+
+__all__ = [
+    "STRIP_FAILURE_POLICIES",
+    "Query_plan",
+    "Zcb_curve",
+    "Vol_curve",
+    "Array_zcb_curve",
+    "Array_vol_curve",
+]
+
+STRIP_FAILURE_POLICIES = ["raise", "skip", "flat", "intrinsic"]
+
+
+def _warm_guess(warm_vols, ind, default):
+    # previous solution as Newton initial guess, falling back to default when unusable
+    if warm_vols is None or ind >= len(warm_vols):
+        return default
+    guess = warm_vols[ind]
+    if not np.isfinite(guess) or guess <= 0.0:
+        return default
+    return guess
+
+
+class Query_plan:
+    """
+    Precompiled interpolation of a fixed query grid T against curve values on fixed tenors.
+    The brackets / weights are found once; evaluate(values) is then a gather ("linear",
+    "piecewise constant") or a matrix product ("cubic spline", the spline is linear in the
+    values), for any new values on the same tenors, e.g. a re-fitted or shocked curve.
+    """
+
+    __slots__ = ("T", "method", "indices", "weights")
+
+    def __init__(self, T, method, indices, weights=None):
+        """
+        Class constructor (see Zcb_curve.query_plan and Vol_curve.query_plan)
+
+        Args:
+            T: np.ndarray => query tenors in years
+            method: str => "linear", "cubic spline" or "piecewise constant"
+            indices: np.ndarray => lower bracket ("linear") or value index ("piecewise constant")
+            weights: np.ndarray => upper bracket weight ("linear") or (len(T), len(tenors))
+                     weight matrix ("cubic spline") (default None)
+        Returns:
+            Query_plan object
+        """
+        self.T = T
+        self.method = method
+        self.indices = indices
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.T)
+
+    def evaluate(self, values):
+        """
+        interpolated values @ T
+
+        Args:
+            values: list[float] or np.ndarray => values @ the plan's tenors, (..., len(tenors))
+                    for several curves at once
+        Returns:
+            interpolated: (np.ndarray) => (..., len(T))
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self.method == "cubic spline":
+            return values @ self.weights.T
+        if self.method == "linear":
+            lower = values[..., self.indices]
+            return lower + (values[..., self.indices + 1] - lower) * self.weights
+        return values[..., self.indices]
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_plan(method, tenors, T, n_values=None, dt=None):
+    # plans only depend on the grids, so curves sharing tenors share them
+    tenors = np.array(tenors)
+    query = _frozen(np.array(T))
+    if method == "linear":
+        # same range as scipy interp1d (bounds_error=True)
+        assert (
+            query.min(initial=tenors[0]) >= tenors[0]
+            and query.max(initial=tenors[-1]) <= tenors[-1]
+        ), "query tenors must be inside the curve tenors"
+        lower = np.clip(np.searchsorted(tenors, query) - 1, 0, len(tenors) - 2)
+        weights = (query - tenors[lower]) / (tenors[lower + 1] - tenors[lower])
+        return Query_plan(query, method, _frozen(lower), _frozen(weights))
+    if method == "cubic spline":
+        from scipy.interpolate import CubicSpline
+
+        weights = CubicSpline(tenors, np.eye(len(tenors)))(query)
+        return Query_plan(
+            query, method, None, _frozen(weights.reshape(len(query), len(tenors)))
+        )
+    # piecewise constant: the index of the vol Vol_curve.interp would return
+    from scipy import interpolate
+
+    tenor_grid, index_grid = _vol_index_grid(tenors, n_values, dt)
+    nearest = interpolate.interp1d(
+        tenor_grid,
+        index_grid,
+        kind="nearest",
+        bounds_error=False,
+        fill_value=(0, n_values - 1),
+    )
+    indices = np.asarray(nearest(query)).astype(np.int64)
+    return Query_plan(query, method, _frozen(indices))
+
+
+def _vol_index_grid(tenors, n_values, dt):
+    # (grid tenor, vol index) of the piecewise constant vol interpolation grid
+    tenor_grid = []
+    index_grid = []
+    ind = 0
+    ind_dt = 0
+    while ind < n_values:
+        tmp_t = ind_dt * dt
+        if tmp_t >= tenors[ind]:
+            ind += 1
+            if ind >= n_values:
+                break
+        tenor_grid.append(tmp_t)
+        index_grid.append(ind)
+        ind_dt += 1
+    return tenor_grid, index_grid
 
 
 class Zcb_curve(Curve):
@@ -31,10 +180,26 @@ class Zcb_curve(Curve):
         self.zcb_curve = zcb_curve
         self.tenors = tenors
         self.interp_method = interp_method
+        self.interpolator = None  # built once on first interp() call
+        self._interpolator_lock = threading.Lock()
+
+    def build_interpolator(self):
+        """
+        build the scipy interpolator (imports scipy.interpolate on first use)
+
+        Args:
+            -
+        Returns:
+            interpolator: callable => T -> zcb
+        """
         if self.interp_method == "cubic spline":
-            self.interpolator = CubicSpline(self.tenors, self.zcb_curve)
+            from scipy.interpolate import CubicSpline
+
+            return CubicSpline(self.tenors, self.zcb_curve)
         elif self.interp_method == "linear":
-            self.interpolator = interpolate(self.tenors, self.zcb_curve)
+            from scipy.interpolate import interp1d
+
+            return interp1d(self.tenors, self.zcb_curve)
         else:
             raise NotImplementedError(
                 'interp_method must be "cubic spline" or "linear"'
@@ -49,7 +214,40 @@ class Zcb_curve(Curve):
         Returns:
             zcb: float => interpolated zcb price @ T
         """
-        return self.interpolator(T)
+        interpolator = self.interpolator
+        if interpolator is None:
+            with self._interpolator_lock:
+                if self.interpolator is None:
+                    self.interpolator = self.build_interpolator()
+                interpolator = self.interpolator
+        return interpolator(T)
+
+    def query_plan(self, T):
+        """
+        precompiled interpolation of the query grid T with self.interp_method, cached per
+        (tenors, T), e.g. the fixing / payment dates of a schedule
+        Note: plan.evaluate(self.zcb_curve) = self.interp(T); plan.evaluate(values) reuses
+              the brackets / weights for any zcb values on the same tenors
+
+        Args:
+            T: list[float] or np.ndarray => query tenors in years
+        Returns:
+            plan: Query_plan
+        """
+        return _cached_plan(
+            self.interp_method,
+            tuple(np.asarray(self.tenors, dtype=np.float64).tolist()),
+            tuple(np.asarray(T, dtype=np.float64).ravel().tolist()),
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_interpolator_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._interpolator_lock = threading.Lock()
 
 
 class Vol_curve(Curve):
@@ -59,6 +257,8 @@ class Vol_curve(Curve):
         zcb_curve,
         tenors,
         interp_method,
+        schedule=None,
+        discount_curve=None,
     ):
         """
         Class constructor
@@ -68,6 +268,10 @@ class Vol_curve(Curve):
             zcb_curve: Zcb_curve => zcb curve object
             tenors: list[float] => tenors in years (reset date not the maturity) => actual/360
             interp_method: str => "piecewise constant" (default 'piecewise constant')
+            schedule: Schedule => caplet schedule, caplet i pays at tenors[i + 1]; its reset times
+                      and accruals replace tenors[i] and 0.25 (default None => legacy_schedule(tenors))
+            discount_curve: list[float] => OIS discount factors @ tenors; zcb_curve is then only
+                            the projection curve for the forwards (default None => single curve)
         Returns:
             Vol_curve object
         """
@@ -79,16 +283,44 @@ class Vol_curve(Curve):
         assert interp_method in [
             "piecewise constant",
         ], "interp_method must be in ['piecewise constant']"
+        assert (
+            schedule is None or len(schedule) == len(tenors) - 1
+        ), "len(schedule) must = len(tenors) - 1"
+        # the strip discounts caplet i with discount_curve[i + 1]
+        assert schedule is None or np.allclose(
+            schedule.payment_times, tenors[1:]
+        ), "schedule.payment_times must = tenors[1:]"
+        assert discount_curve is None or len(discount_curve) == len(
+            tenors
+        ), "len(discount_curve) must = len(tenors)"
 
         self.cap_price_curve = cap_price_curve
         self.zcb_curve = zcb_curve
         self.tenors = tenors
         self.interp_method = interp_method
-        self.forward_swap_curve = zcb_curve_to_forward_swap_curve(
-            self.zcb_curve, self.tenors
+        if schedule is None:
+            self.schedule = legacy_schedule(tenors)
+            dts = None  # forwards accrue over the tenor differences as they always have
+        else:
+            self.schedule = schedule
+            dts = [tenors[0]] + schedule.accruals.tolist()
+        self.forward_curve = zcb_curve_to_forward_curve(
+            self.zcb_curve, self.tenors, dts
+        )
+        if discount_curve is None:
+            self.discount_curve = zcb_curve
+            self.forward_swap_curve = zcb_curve_to_forward_swap_curve(
+                self.zcb_curve, self.tenors, dts
+            )
+        else:
+            self.discount_curve = discount_curve
+            self.forward_swap_curve = forward_curve_to_forward_swap_curve(
+                self.forward_curve, self.discount_curve, self.tenors, dts
+            )
+        self.interpolator = (
+            None  # (black, normal) interpolators, built once on first interp()
         )
-        self.forward_curve = zcb_curve_to_forward_curve(self.zcb_curve, self.tenors)
-        self.interpolator = None
+        self._interpolator_lock = threading.Lock()
         self.dt = 0.001  # for interpolation grid
 
     def interp(self, T, vol_type="black"):
@@ -104,45 +336,92 @@ class Vol_curve(Curve):
         assert self.interp_method in [
             "piecewise constant"
         ], "Now only piecewise constant is available"
-        if not self.interpolator:
-            black_vol_grid = []
-            normal_vol_grid = []
-            tenor_grid = []
-            ind = 0
-            ind_dt = 0
-            while ind < len(self.caplet_black_vols):
-                tmp_t = ind_dt * self.dt
-                if tmp_t >= self.tenors[ind]:
-                    ind += 1
-                    if ind >= len(self.caplet_black_vols):
-                        break
-                tenor_grid.append(tmp_t)
-                black_vol_grid.append(self.caplet_black_vols[ind])
-                normal_vol_grid.append(self.caplet_normal_vols[ind])
-                ind_dt += 1
-
-            self.black_iv_interpolator = interpolate.interp1d(
-                tenor_grid,
-                black_vol_grid,
-                kind="nearest",
-                bounds_error=False,
-                fill_value=(self.caplet_black_vols[0], self.caplet_black_vols[-1]),
-            )
-            self.normal_iv_interpolator = interpolate.interp1d(
-                tenor_grid,
-                normal_vol_grid,
-                kind="nearest",
-                bounds_error=False,
-                fill_value=(self.caplet_normal_vols[0], self.caplet_normal_vols[-1]),
-            )
+        interpolator = self.interpolator
+        if interpolator is None:
+            interpolator = self._get_or_build_interpolator()
+        black_iv_interpolator, normal_iv_interpolator = interpolator
         if vol_type == "black":
-            return self.black_iv_interpolator(T)
+            return black_iv_interpolator(T)
         elif vol_type == "normal":
-            return self.normal_iv_interpolator(T)
+            return normal_iv_interpolator(T)
         else:
             raise NotImplementedError("vol_type must be in ['black', 'normal']")
 
-    def generate_caplet_vol_term_structure(self):
+    def _get_or_build_interpolator(self):
+        # single flight: concurrent first callers wait for one build, later calls never lock
+        with self._interpolator_lock:
+            if self.interpolator is None:
+                self.black_iv_interpolator, self.normal_iv_interpolator = (
+                    self._build_interpolators()
+                )
+                # publish the immutable pair last so lock-free readers never see half of it
+                self.interpolator = (
+                    self.black_iv_interpolator,
+                    self.normal_iv_interpolator,
+                )
+            return self.interpolator
+
+    def _build_interpolators(self):
+        from scipy import interpolate
+
+        tenor_grid, index_grid = _vol_index_grid(
+            self.tenors, len(self.caplet_black_vols), self.dt
+        )
+        black_vol_grid = [self.caplet_black_vols[ind] for ind in index_grid]
+        normal_vol_grid = [self.caplet_normal_vols[ind] for ind in index_grid]
+
+        black_iv_interpolator = interpolate.interp1d(
+            tenor_grid,
+            black_vol_grid,
+            kind="nearest",
+            bounds_error=False,
+            fill_value=(self.caplet_black_vols[0], self.caplet_black_vols[-1]),
+        )
+        normal_iv_interpolator = interpolate.interp1d(
+            tenor_grid,
+            normal_vol_grid,
+            kind="nearest",
+            bounds_error=False,
+            fill_value=(self.caplet_normal_vols[0], self.caplet_normal_vols[-1]),
+        )
+        return black_iv_interpolator, normal_iv_interpolator
+
+    def query_plan(self, T):
+        """
+        precompiled piecewise constant interpolation of the query grid T, cached per
+        (tenors, number of caplet vols, T)
+        Note: plan.evaluate(self.caplet_black_vols) = self.interp(T, "black"), same for the
+              normal vols; re-stripped vols on the same tenors reuse the plan
+
+        Args:
+            T: list[float] or np.ndarray => query tenors in years
+        Returns:
+            plan: Query_plan
+        """
+        assert (
+            len(self.caplet_black_vols) > 0
+        ), "run generate_caplet_vol_term_structure() first"
+        return _cached_plan(
+            self.interp_method,
+            tuple(np.asarray(self.tenors, dtype=np.float64).tolist()),
+            tuple(np.asarray(T, dtype=np.float64).ravel().tolist()),
+            len(self.caplet_black_vols),
+            self.dt,
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_interpolator_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._interpolator_lock = threading.Lock()
+
+    @instrumented
+    def generate_caplet_vol_term_structure(
+        self, warm_start=None, failure_policy="raise", base=None, start_index=0
+    ):
         """
         Use cap prices to calculate caplet Black's and Normal vol term structures
         Idea:   tenor1 => Cap_1(sigma_cap_1) = Caplet_1(sigma_cap_1)
@@ -152,95 +431,404 @@ class Vol_curve(Curve):
                                              = Caplet_1(sigma_caplet_1) + Caplet_2(sigma_caplet_2) + Caplet_3(sigma_caplet_3)
                 Solve for sigma_caplet_3
                 Then keep going for all the caplet prices => we then get the caplet vol term structure
+        Note: with a failure_policy other than "raise", a tenor whose stripped caplet price is
+              not positive or whose IV solve does not converge is handled as below, recorded in
+              self.strip_diagnostics, and the strip continues:
+                "skip"      => vol is NaN, later tenors reprice this caplet at the previous vol
+                "flat"      => vol = previous caplet vol (flat extrapolation)
+                "intrinsic" => stripped price clamped to intrinsic value, i.e. vol = 0
+                               (falls back to "flat" when the price is above intrinsic)
         Args:
-            -
+            warm_start: Vol_curve => previously stripped curve whose cap/caplet vols are used
+                        as the Newton initial guesses, e.g. yesterday's curve (default None)
+            failure_policy: str => "raise", "skip", "flat" or "intrinsic" (default 'raise')
+            base: Vol_curve => stripped curve whose caps 0..start_index - 1 have the same inputs
+                  (cap prices, forwards, discount factors, schedule); their results are copied
+                  instead of re-stripped, e.g. the unshocked curve of a scenario (default None)
+            start_index: int => first cap to strip, requires base when > 0 (default 0)
         Returns:
             -
         """
+        assert (
+            failure_policy in STRIP_FAILURE_POLICIES
+        ), f"failure_policy must be in {STRIP_FAILURE_POLICIES}"
+        assert start_index == 0 or (
+            base is not None and len(base.caplet_black_vols) >= start_index
+        ), "start_index > 0 requires a base curve stripped up to start_index"
+        on_failure = "raise" if failure_policy == "raise" else "nan"
+        warm_cap_vols = getattr(warm_start, "cap_black_vols", None)
+        warm_black_vols = getattr(warm_start, "caplet_black_vols", None)
+        warm_normal_vols = getattr(warm_start, "caplet_normal_vols", None)
 
-        self.cap_black_vols = []
-        self.caplet_black_vols = []
-        self.caplet_normal_vols = []
-
-        for ind in range(len(self.cap_price_curve)):
-            tmp_cap_vol = get_black_cap_iv(
-                self.cap_price_curve[ind],
-                self.forward_curve[1 : ind + 2],
-                self.forward_swap_curve[ind + 1],
-                self.zcb_curve[1 : ind + 2],
-                self.tenors[: ind + 1],
-                taus=[0.25] * (ind + 1),
-                N=1.0,
-                initial_guess=0.3,
-            )
-            self.cap_black_vols.append(tmp_cap_vol)
-            if ind == 0:
-                self.caplet_black_vols.append(tmp_cap_vol)
-                caplet_normal_iv = get_normal_caplet_iv(
+        # built in locals and published at the end, so concurrent interp() calls keep
+        # reading the previous vols instead of half-filled lists
+        cap_black_vols = []
+        caplet_black_vols = []
+        caplet_normal_vols = []
+        strip_diagnostics = []
+        # vols used to reprice earlier caplets (only differ from the reported ones for "skip")
+        pricing_vols = {"black": [], "normal": []}
+        if start_index:
+            cap_black_vols = list(base.cap_black_vols[:start_index])
+            caplet_black_vols = list(base.caplet_black_vols[:start_index])
+            caplet_normal_vols = list(base.caplet_normal_vols[:start_index])
+            strip_diagnostics = [
+                d for d in base.strip_diagnostics if d["index"] < start_index
+            ]
+            pricing_vols = {
+                vol_type: list(vols[:start_index])
+                for vol_type, vols in base.pricing_vols.items()
+            }
+
+        for ind in range(start_index, len(self.cap_price_curve)):
+            with stage("generate_caplet_vol_term_structure.cap_iv"):
+                solver_diagnostics = []
+                tmp_cap_vol = get_black_cap_iv(
                     self.cap_price_curve[ind],
-                    self.forward_curve[ind + 1],
+                    self.forward_curve[1 : ind + 2],
                     self.forward_swap_curve[ind + 1],
-                    self.zcb_curve[ind + 1],
-                    self.tenors[ind],
-                    tau=0.25,
+                    self.discount_curve[1 : ind + 2],
+                    self.schedule.reset_times[: ind + 1],
+                    taus=self.schedule.accruals[: ind + 1],
                     N=1.0,
-                    initial_guess=0.01,
+                    initial_guess=_warm_guess(warm_cap_vols, ind, 0.3),
+                    on_failure=on_failure,
+                    diagnostics=solver_diagnostics,
                 )
-                self.caplet_normal_vols.append(caplet_normal_iv)
-            else:
-                tmp_black_caplet_price = self.cap_price_curve[ind]
-                for caplet_ind, caplet_vol in enumerate(self.caplet_black_vols):
-                    tmp_caplet_price = black_caplet_price(
-                        self.forward_curve[caplet_ind + 1],
-                        self.forward_swap_curve[ind + 1],
-                        caplet_vol,
-                        self.zcb_curve[caplet_ind + 1],
-                        self.tenors[caplet_ind],
-                        tau=0.25,
-                        N=1.0,
+                for diagnostic in solver_diagnostics:
+                    strip_diagnostics.append(
+                        {
+                            "index": ind,
+                            "tenor": self.tenors[ind],
+                            "vol_type": "cap",
+                            "reason": "implied vol solve failed",
+                            "action": "nan",
+                            "solver": diagnostic,
+                        }
                     )
-                    tmp_black_caplet_price -= tmp_caplet_price
-
-                tmp_normal_caplet_price = self.cap_price_curve[ind]
-                for caplet_ind, caplet_vol in enumerate(self.caplet_normal_vols):
-                    tmp_caplet_price = normal_caplet_price(
-                        self.forward_curve[caplet_ind + 1],
-                        self.forward_swap_curve[ind + 1],
-                        caplet_vol,
-                        self.zcb_curve[caplet_ind + 1],
-                        self.tenors[caplet_ind],
-                        tau=0.25,
-                        N=1.0,
+            cap_black_vols.append(tmp_cap_vol)
+
+            for vol_type, caplet_vols, warm_vols, default_guess in [
+                ("black", caplet_black_vols, warm_black_vols, 0.3),
+                ("normal", caplet_normal_vols, warm_normal_vols, 0.01),
+            ]:
+                with stage(f"generate_caplet_vol_term_structure.{vol_type}_strip"):
+                    reported_vol, pricing_vol = self._strip_caplet(
+                        ind,
+                        vol_type,
+                        pricing_vols[vol_type],
+                        cap_vol=tmp_cap_vol if vol_type == "black" else None,
+                        initial_guess=_warm_guess(warm_vols, ind, default_guess),
+                        failure_policy=failure_policy,
+                        diagnostics=strip_diagnostics,
                     )
-                    tmp_normal_caplet_price -= tmp_caplet_price
+                caplet_vols.append(reported_vol)
+                pricing_vols[vol_type].append(pricing_vol)
 
-                assert tmp_black_caplet_price > 0, "black_caplet_price must be positive"
-                assert (
-                    tmp_normal_caplet_price > 0
-                ), "normal_caplet_price must be positive"
+        with self._interpolator_lock:
+            # re-stripping invalidates the interpolators, reset with the vols they read
+            self.cap_black_vols = cap_black_vols
+            self.caplet_black_vols = caplet_black_vols
+            self.caplet_normal_vols = caplet_normal_vols
+            self.strip_diagnostics = strip_diagnostics
+            self.pricing_vols = pricing_vols
+            self.interpolator = None
 
-                caplet_black_iv = get_black_caplet_iv(
-                    tmp_black_caplet_price,
-                    self.forward_curve[caplet_ind + 2],
-                    self.forward_swap_curve[ind + 1],
-                    self.zcb_curve[caplet_ind + 2],
-                    self.tenors[caplet_ind + 1],
-                    tau=0.25,
-                    N=1.0,
-                    initial_guess=0.3,
+    def caplet_vol_sensitivities(self, vol_type="black"):
+        """
+        sensitivities of the stripped caplet vols to the cap prices
+        Note: cap i = sum_{j <= i} caplet_j(vol_j) at the strike K_i of cap i, so the Jacobian
+              J[i, j] = d cap_i / d vol_j = vega of caplet j at K_i is lower triangular and
+              d vols / d cap prices = J^-1 (one triangular solve, no re-stripping)
+        Args:
+            vol_type: str => "black" or "normal" (default 'black')
+        Returns:
+            sensitivities: np.ndarray => (n, n) lower triangular, [i, j] = d vol_i / d cap_price_j
+        """
+        from scipy.linalg import solve_triangular
+
+        caplet_vega = {"black": black_caplet_vega, "normal": normal_caplet_vega}[
+            vol_type
+        ]
+        n = len(self.caplet_black_vols)
+        jacobian = caplet_vega(
+            np.asarray(self.forward_curve[1 : n + 1])[None, :],
+            np.asarray(self.forward_swap_curve[1 : n + 1])[:, None],
+            np.asarray(self.pricing_vols[vol_type])[None, :],
+            np.asarray(self.discount_curve[1 : n + 1])[None, :],
+            self.schedule.reset_times[None, :n],
+            tau=self.schedule.accruals[None, :n],
+            N=1.0,
+        )
+        return solve_triangular(np.tril(jacobian), np.eye(n), lower=True)
+
+    @in_float64
+    def _strip_caplet(
+        self,
+        ind,
+        vol_type,
+        previous_vols,
+        cap_vol,
+        initial_guess,
+        failure_policy,
+        diagnostics,
+    ):
+        # strip caplet ind from cap ind given the vols of caplets 0..ind-1, failures are
+        # appended to diagnostics
+        # returns (reported vol, vol used to reprice this caplet in later caps)
+        caplet_price, get_caplet_iv = {
+            "black": (black_caplet_price, get_black_caplet_iv),
+            "normal": (normal_caplet_price, get_normal_caplet_iv),
+        }[vol_type]
+        strike = self.forward_swap_curve[ind + 1]
+
+        solver_diagnostics = []
+        stripped_price = self.cap_price_curve[ind]
+        if previous_vols:
+            # earlier caplets repriced at the strike of cap ind in one vectorized call;
+            # zero vols (intrinsic policy) make the normal d divide by zero, which is fine
+            with np.errstate(divide="ignore"):
+                stripped_price -= np.sum(
+                    caplet_price(
+                        np.asarray(self.forward_curve[1 : ind + 1]),
+                        strike,
+                        np.asarray(previous_vols),
+                        np.asarray(self.discount_curve[1 : ind + 1]),
+                        self.schedule.reset_times[:ind],
+                        tau=self.schedule.accruals[:ind],
+                        N=1.0,
+                    )
                 )
-                caplet_normal_iv = get_normal_caplet_iv(
-                    tmp_normal_caplet_price,
-                    self.forward_curve[caplet_ind + 2],
-                    self.forward_swap_curve[ind + 1],
-                    self.zcb_curve[caplet_ind + 2],
-                    self.tenors[caplet_ind + 1],
-                    tau=0.25,
+
+        if failure_policy == "raise":
+            assert stripped_price > 0, f"{vol_type}_caplet_price must be positive"
+
+        if stripped_price > 0:
+            if ind == 0 and cap_vol is not None:
+                # a one-caplet cap: the caplet vol is the cap vol
+                vol = cap_vol
+            else:
+                vol = get_caplet_iv(
+                    stripped_price,
+                    self.forward_curve[ind + 1],
+                    strike,
+                    self.discount_curve[ind + 1],
+                    self.schedule.reset_times[ind],
+                    tau=self.schedule.accruals[ind],
                     N=1.0,
-                    initial_guess=0.01,
+                    initial_guess=initial_guess,
+                    on_failure="raise" if failure_policy == "raise" else "nan",
+                    diagnostics=solver_diagnostics,
                 )
-                self.caplet_black_vols.append(caplet_black_iv)
-                self.caplet_normal_vols.append(caplet_normal_iv)
+            if np.isfinite(vol):
+                return vol, vol
+            reason = "implied vol solve failed"
+        elif np.isnan(stripped_price):
+            reason = "stripped caplet price undefined (an earlier tenor failed)"
+        else:
+            reason = "stripped caplet price not positive"
+
+        previous_vol = previous_vols[-1] if previous_vols else np.nan
+        intrinsic = (
+            self.discount_curve[ind + 1]
+            * self.schedule.accruals[ind]
+            * max(self.forward_curve[ind + 1] - strike, 0.0)
+        )
+        if failure_policy == "intrinsic" and stripped_price <= intrinsic:
+            action, reported_vol, pricing_vol = "intrinsic", 0.0, 0.0
+        elif failure_policy == "skip":
+            action, reported_vol, pricing_vol = "skip", np.nan, previous_vol
+        else:
+            action, reported_vol, pricing_vol = "flat", previous_vol, previous_vol
+
+        diagnostics.append(
+            {
+                "index": ind,
+                "tenor": self.tenors[ind],
+                "vol_type": vol_type,
+                "stripped_price": stripped_price,
+                "intrinsic": intrinsic,
+                "reason": reason,
+                "action": action,
+                "vol": reported_vol,
+                "solver": solver_diagnostics[0] if solver_diagnostics else None,
+            }
+        )
+        return reported_vol, pricing_vol
+
+
+class Array_zcb_curve(Curve):
+    """
+    Compact zcb curve: two read-only float64 arrays and no instance __dict__.
+    Slicing (curve[i:j]) returns a sub-curve that shares memory with the parent.
+    """
+
+    __slots__ = ("zcb_curve", "tenors")
+
+    def __init__(self, zcb_curve, tenors):
+        """
+        Class constructor
+
+        Args:
+            zcb_curve: list[float] or np.ndarray => zcb curves
+            tenors: list[float] or np.ndarray => tenors in years
+        Returns:
+            Array_zcb_curve object
+        """
+        assert len(zcb_curve) == len(tenors), "len(zcb_curve) must = len(tenors)"
+        self.zcb_curve = _readonly_array(zcb_curve)
+        self.tenors = _readonly_array(tenors)
+
+    @classmethod
+    def from_zcb_curve(cls, curve):
+        """
+        build from a Zcb_curve object
+
+        Args:
+            curve: Zcb_curve => zcb curve object
+        Returns:
+            Array_zcb_curve object
+        """
+        return cls(curve.zcb_curve, curve.tenors)
+
+    @classmethod
+    def _from_views(cls, zcb_curve, tenors):
+        obj = cls.__new__(cls)
+        obj.zcb_curve = zcb_curve
+        obj.tenors = tenors
+        return obj
+
+    def __len__(self):
+        return len(self.tenors)
+
+    def __getitem__(self, key):
+        """
+        zero-copy sub-curve
+
+        Args:
+            key: slice => pillar slice
+        Returns:
+            Array_zcb_curve object sharing memory with self
+        """
+        if not isinstance(key, slice):
+            raise TypeError("Array_zcb_curve only supports slicing")
+        return self._from_views(self.zcb_curve[key], self.tenors[key])
+
+    def interp(self, T):
+        """
+        calculate the linear interpolation of the zcb value @ tenor T
+        Note: if the value out of range, use the last bondary value. (apply for both side)
+
+        Args:
+            T: float or np.ndarray => tenor(s) in years
+        Returns:
+            zcb: float or np.ndarray => interpolated zcb price(s) @ T
+        """
+        return np.interp(T, self.tenors, self.zcb_curve)
+
+    def forward_curve(self):
+        """
+        simple forward rates between consecutive pillars (first one from t=0)
+
+        Args:
+            -
+        Returns:
+            forward_curve: (np.ndarray) => len(tenors) forward rates
+        """
+        zcb = np.concatenate(([1.0], self.zcb_curve))
+        dt = np.diff(np.concatenate(([0.0], self.tenors)))
+        return (zcb[:-1] / zcb[1:] - 1.0) / dt
+
+
+class Array_vol_curve(Curve):
+    """
+    Compact stripped caplet vol curve (piecewise constant) backed by read-only arrays.
+    tenors[i] is the right boundary of the interval on which caplet vol i applies,
+    i.e. the same convention as Vol_curve.interp.
+    """
+
+    __slots__ = ("tenors", "caplet_black_vols", "caplet_normal_vols")
+
+    def __init__(self, tenors, caplet_black_vols, caplet_normal_vols):
+        """
+        Class constructor
+
+        Args:
+            tenors: list[float] or np.ndarray => right boundaries of the vol intervals
+            caplet_black_vols: list[float] or np.ndarray => caplet Black vols
+            caplet_normal_vols: list[float] or np.ndarray => caplet Normal vols
+        Returns:
+            Array_vol_curve object
+        """
+        assert len(tenors) == len(caplet_black_vols) and len(tenors) == len(
+            caplet_normal_vols
+        ), "len(tenors), len(caplet_black_vols) and len(caplet_normal_vols) must be equal"
+        self.tenors = _readonly_array(tenors)
+        self.caplet_black_vols = _readonly_array(caplet_black_vols)
+        self.caplet_normal_vols = _readonly_array(caplet_normal_vols)
+
+    @classmethod
+    def from_vol_curve(cls, vol_curve):
+        """
+        build from a stripped Vol_curve object
+
+        Args:
+            vol_curve: Vol_curve => vol curve after generate_caplet_vol_term_structure()
+        Returns:
+            Array_vol_curve object
+        """
+        n = len(vol_curve.caplet_black_vols)
+        return cls(
+            vol_curve.tenors[:n],
+            vol_curve.caplet_black_vols,
+            vol_curve.caplet_normal_vols,
+        )
+
+    @classmethod
+    def _from_views(cls, tenors, caplet_black_vols, caplet_normal_vols):
+        obj = cls.__new__(cls)
+        obj.tenors = tenors
+        obj.caplet_black_vols = caplet_black_vols
+        obj.caplet_normal_vols = caplet_normal_vols
+        return obj
+
+    def __len__(self):
+        return len(self.tenors)
+
+    def __getitem__(self, key):
+        """
+        zero-copy sub-curve
+
+        Args:
+            key: slice => pillar slice
+        Returns:
+            Array_vol_curve object sharing memory with self
+        """
+        if not isinstance(key, slice):
+            raise TypeError("Array_vol_curve only supports slicing")
+        return self._from_views(
+            self.tenors[key], self.caplet_black_vols[key], self.caplet_normal_vols[key]
+        )
+
+    def interp(self, T, vol_type="black"):
+        """
+        piecewise constant caplet vol @ tenor T
+        Note: if the value out of range, use the last bondary value. (apply for both side)
+
+        Args:
+            T: float or np.ndarray => tenor(s) in years
+            vol_type: str => choose from "black" (Black's model) and "normal" (Normal model)
+        Returns:
+            vol: float or np.ndarray => caplet vol(s) @ T
+        """
+        if vol_type == "black":
+            vols = self.caplet_black_vols
+        elif vol_type == "normal":
+            vols = self.caplet_normal_vols
+        else:
+            raise NotImplementedError("vol_type must be in ['black', 'normal']")
+        ind = np.searchsorted(self.tenors, T, side="right")
+        return vols[np.minimum(ind, len(vols) - 1)]
 
 
 if __name__ == "__main__":
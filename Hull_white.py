@@ -0,0 +1,555 @@
+"""
+Hull-White one-factor lattices (trinomial tree and Crank-Nicolson PDE)
+
+r(t) = x(t) + phi(t), dx = -a x dt + sigma dW, x(0) = 0. Both lattices discretize x on a
+fixed grid of nodes and fit phi step by step (forward induction on Arrow-Debreu prices),
+so they reprice the input zcb curve exactly at every time step. Rollbacks update all nodes
+(and any number of value columns) at once: gathers for the tree, one tridiagonal banded
+solve per step for the PDE.
+
+Fitted lattices are cached on (method, a, sigma, dt, steps, discount factors on the grid),
+so every instrument / model instance sharing a curve and parameters reuses one lattice.
+"""
+
+import functools
+import math
+
+import numpy as np
+from Pricing_errors import calibration_objective, caplet_market_inputs
+from Templates import Model
+from utils import norm_cdf
+
+__all__ = [
+    "LATTICE_METHODS",
+    "Hull_white_tree",
+    "Hull_white_pde",
+    "get_lattice",
+    "hull_white_zbp",
+    "Hull_white",
+]
+
+LATTICE_METHODS = ["tree", "pde"]
+
+
+def _curve_discount_factors(zcb_curve, times):
+    # interpolate inside the quoted tenors, flat zero yield outside (P(0, 0) = 1)
+    times = np.asarray(times, dtype=np.float64)
+    tenors = getattr(zcb_curve, "tenors", None)
+    if tenors is None:
+        return np.asarray(zcb_curve.interp(times), dtype=np.float64)
+    inside = np.clip(times, tenors[0], tenors[-1])
+    yields = -np.log(np.asarray(zcb_curve.interp(inside), dtype=np.float64)) / inside
+    return np.exp(-yields * times)
+
+
+class _Lattice:
+    """
+    common part of the lattices: time grid, node states x, fitted shift phi per step
+    """
+
+    def __init__(self, a, sigma, dt, n_steps, discount_factors):
+        assert a > 0.0 and sigma > 0.0, "a and sigma must be positive"
+        assert len(discount_factors) == n_steps + 1, "one discount factor per time step"
+        self.a = a
+        self.sigma = sigma
+        self.dt = dt
+        self.n_steps = n_steps
+        self.times = np.arange(n_steps + 1) * dt
+        self.discount_factors = np.asarray(discount_factors, dtype=np.float64)
+
+    def step(self, t):
+        """
+        lattice step of time t (times are snapped to the nearest step)
+
+        Args:
+            t: float or np.ndarray => time(s) in years
+        Returns:
+            step: int or np.ndarray
+        """
+        steps = np.rint(np.asarray(t, dtype=np.float64) / self.dt).astype(np.int64)
+        assert (steps <= self.n_steps).all(), "time is beyond the lattice maturity"
+        return steps if steps.ndim else int(steps)
+
+    def short_rates(self, step):
+        """
+        short rate at every node of a step
+
+        Args:
+            step: int => time step
+        Returns:
+            rates: np.ndarray => (nodes,)
+        """
+        return self.x + self.phi[step]
+
+    def _fit(self, propagate_adjoint):
+        # forward induction: phi_i makes sum(Q_{i+1}) = P(0, t_{i+1}), where
+        # Q_{i+1} = adjoint(Q_i * exp(-(x + phi_i) dt))
+        q = np.zeros(len(self.x))
+        q[self.center] = 1.0
+        self.phi = np.empty(self.n_steps)
+        self._discounts = np.empty((self.n_steps, len(self.x)))
+        for i in range(self.n_steps):
+            propagated = propagate_adjoint(q * np.exp(-self.x * self.dt))
+            self.phi[i] = (
+                math.log(propagated.sum() / self.discount_factors[i + 1]) / self.dt
+            )
+            self._discounts[i] = np.exp(-(self.x + self.phi[i]) * self.dt)
+            q = propagated * math.exp(-self.phi[i] * self.dt)
+        self._discounts.flags.writeable = False
+
+    def rollback(self, values, step):
+        """
+        discounted expectation of values at step + 1, seen from every node at step
+
+        Args:
+            values: np.ndarray => (nodes,) or (nodes, columns) values at step + 1
+            step: int => time step
+        Returns:
+            values: np.ndarray => same shape, values at step
+        """
+        values = np.asarray(values, dtype=np.float64)
+        expected = self._expectation(values.reshape(len(self.x), -1))
+        return (self._discounts[step][:, None] * expected).reshape(values.shape)
+
+    def zcb(self, maturity):
+        """
+        zcb price P(0, maturity) from the lattice (equals the fitted curve)
+
+        Args:
+            maturity: float => maturity in years
+        Returns:
+            zcb: float
+        """
+        values = np.ones(len(self.x))
+        for i in range(self.step(maturity) - 1, -1, -1):
+            values = self.rollback(values, i)
+        return float(values[self.center])
+
+
+class Hull_white_tree(_Lattice):
+    """
+    Hull-White (1994) trinomial tree: x nodes j * dx, dx = sqrt(3 V), branching switches to
+    up / down at |j| = j_max so the tree stays within 2 j_max + 1 nodes.
+    """
+
+    def __init__(self, a, sigma, dt, n_steps, discount_factors):
+        """
+        Class constructor (prefer get_lattice, which caches)
+
+        Args:
+            a: float => mean reversion speed
+            sigma: float => short rate volatility
+            dt: float => time step in years
+            n_steps: int => number of time steps
+            discount_factors: np.ndarray => P(0, i * dt) for i = 0..n_steps
+        Returns:
+            Hull_white_tree object
+        """
+        _Lattice.__init__(self, a, sigma, dt, n_steps, discount_factors)
+        m = math.exp(-a * dt) - 1.0  # E[dx] = m x
+        variance = sigma**2 * (1.0 - math.exp(-2.0 * a * dt)) / (2.0 * a)
+        self.dx = math.sqrt(3.0 * variance)
+        j_max = int(math.ceil(0.184 / -m))
+        j = np.arange(-j_max, j_max + 1)
+        self.center = j_max
+        self.x = j * self.dx
+
+        jm = j * m
+        jm2 = jm * jm
+        # normal branching (middle child j), then the edges branch inwards
+        up = 1.0 / 6.0 + (jm2 + jm) / 2.0
+        middle = 2.0 / 3.0 - jm2
+        down = 1.0 / 6.0 + (jm2 - jm) / 2.0
+        middle_child = j.copy()
+        top, bottom = -1, 0
+        up[top] = 7.0 / 6.0 + (jm2[top] + 3.0 * jm[top]) / 2.0
+        middle[top] = -1.0 / 3.0 - jm2[top] - 2.0 * jm[top]
+        down[top] = 1.0 / 6.0 + (jm2[top] + jm[top]) / 2.0
+        middle_child[top] = j_max - 1
+        up[bottom] = 1.0 / 6.0 + (jm2[bottom] - jm[bottom]) / 2.0
+        middle[bottom] = -1.0 / 3.0 - jm2[bottom] + 2.0 * jm[bottom]
+        down[bottom] = 7.0 / 6.0 + (jm2[bottom] - 3.0 * jm[bottom]) / 2.0
+        middle_child[bottom] = -j_max + 1
+
+        self.probabilities = np.stack([up, middle, down])  # (3, nodes)
+        self.children = (
+            middle_child + j_max + np.array([[1], [0], [-1]])
+        )  # node indices
+        self._fit(self._propagate_adjoint)
+
+    def _propagate_adjoint(self, q):
+        # scatter each node's weight to its three children
+        return np.bincount(
+            self.children.ravel(),
+            weights=(self.probabilities * q).ravel(),
+            minlength=len(self.x),
+        )
+
+    def _expectation(self, values):
+        return np.einsum("cn,cnk->nk", self.probabilities, values[self.children])
+
+
+class Hull_white_pde(_Lattice):
+    """
+    Crank-Nicolson finite differences for the x backward PDE
+        V_t - a x V_x + sigma^2 / 2 V_xx = 0
+    on [-x_max, x_max], with discounting applied per step (operator splitting) and
+    one-sided, diffusion-free rows at the boundaries.
+    """
+
+    def __init__(self, a, sigma, dt, n_steps, discount_factors, n_nodes=201, width=6.0):
+        """
+        Class constructor (prefer get_lattice, which caches)
+
+        Args:
+            a: float => mean reversion speed
+            sigma: float => short rate volatility
+            dt: float => time step in years
+            n_steps: int => number of time steps
+            discount_factors: np.ndarray => P(0, i * dt) for i = 0..n_steps
+            n_nodes: int => number of x nodes, odd (default 201)
+            width: float => x_max in standard deviations of x at the lattice maturity (default 6.0)
+        Returns:
+            Hull_white_pde object
+        """
+        from scipy.linalg import solve_banded
+
+        _Lattice.__init__(self, a, sigma, dt, n_steps, discount_factors)
+        assert n_nodes % 2 == 1, "n_nodes must be odd"
+        maturity = n_steps * dt
+        std = sigma * math.sqrt((1.0 - math.exp(-2.0 * a * maturity)) / (2.0 * a))
+        self.x = np.linspace(-width * std, width * std, n_nodes)
+        self.center = n_nodes // 2
+        self.dx = self.x[1] - self.x[0]
+        self._solve_banded = solve_banded
+
+        # generator L as (lower, diag, upper) coefficients of V[j - 1], V[j], V[j + 1]
+        drift = -a * self.x
+        diffusion = 0.5 * sigma**2 / self.dx**2
+        lower = diffusion - drift / (2.0 * self.dx)
+        upper = diffusion + drift / (2.0 * self.dx)
+        diag = -2.0 * diffusion * np.ones(n_nodes)
+        # boundaries: upwind first derivative (the drift points inwards), no diffusion
+        lower[0], diag[0], upper[0] = 0.0, -drift[0] / self.dx, drift[0] / self.dx
+        lower[-1], diag[-1], upper[-1] = -drift[-1] / self.dx, drift[-1] / self.dx, 0.0
+
+        half = 0.5 * dt
+        self._explicit = (half * lower, 1.0 + half * diag, half * upper)
+        self._implicit = self._banded(-half * lower, 1.0 - half * diag, -half * upper)
+        # transposed operators for the forward (adjoint) induction
+        self._explicit_t = (
+            half * np.roll(upper, 1),
+            1.0 + half * diag,
+            half * np.roll(lower, -1),
+        )
+        self._implicit_t = self._banded(
+            -half * np.roll(upper, 1), 1.0 - half * diag, -half * np.roll(lower, -1)
+        )
+        self._fit(self._propagate_adjoint)
+
+    @staticmethod
+    def _banded(lower, diag, upper):
+        ab = np.zeros((3, len(diag)))
+        ab[0, 1:] = upper[:-1]
+        ab[1] = diag
+        ab[2, :-1] = lower[1:]
+        return ab
+
+    @staticmethod
+    def _tridiagonal_product(coefficients, values):
+        lower, diag, upper = coefficients
+        if values.ndim == 2:
+            lower, diag, upper = lower[:, None], diag[:, None], upper[:, None]
+        product = diag * values
+        product[1:] += lower[1:] * values[:-1]
+        product[:-1] += upper[:-1] * values[1:]
+        return product
+
+    def _propagate_adjoint(self, q):
+        # Q_{i+1} = M^T q with M = A^-1 B  =>  solve A^T y = q, then B^T y
+        y = self._solve_banded((1, 1), self._implicit_t, q)
+        return self._tridiagonal_product(self._explicit_t, y)
+
+    def _expectation(self, values):
+        rhs = self._tridiagonal_product(self._explicit, values)
+        return self._solve_banded((1, 1), self._implicit, rhs)
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_lattice(method, a, sigma, dt, n_steps, discount_factors):
+    lattice_class = Hull_white_tree if method == "tree" else Hull_white_pde
+    return lattice_class(a, sigma, dt, n_steps, np.array(discount_factors))
+
+
+def get_lattice(zcb_curve, a, sigma, maturity, steps_per_year=48, method="tree"):
+    """
+    cached lattice fitted to a zcb curve
+    Note: the maturity is rounded up to whole years and the cache key holds the curve's
+          discount factors on the time grid, so instruments sharing the curve and parameters
+          share one lattice
+
+    Args:
+        zcb_curve: Zcb_curve => fitted curve (any object with interp(T))
+        a: float => mean reversion speed
+        sigma: float => short rate volatility
+        maturity: float => last time the lattice must cover, in years
+        steps_per_year: int => time steps per year (default 48)
+        method: str => "tree" or "pde" (default 'tree')
+    Returns:
+        lattice: Hull_white_tree or Hull_white_pde
+    """
+    assert method in LATTICE_METHODS, f"method must be in {LATTICE_METHODS}"
+    n_steps = int(math.ceil(maturity - 1e-9)) * steps_per_year
+    dt = 1.0 / steps_per_year
+    discount_factors = _curve_discount_factors(zcb_curve, np.arange(n_steps + 1) * dt)
+    return _cached_lattice(
+        method, float(a), float(sigma), dt, n_steps, tuple(discount_factors.tolist())
+    )
+
+
+def hull_white_zbp(a, sigma, strike, df_expiry, df_maturity, expiry, maturity):
+    """
+    closed-form Hull-White zero-coupon bond put (option on P(expiry, maturity))
+
+    Args:
+        a: float => mean reversion speed
+        sigma: float => short rate volatility
+        strike: float or np.ndarray => bond strike price
+        df_expiry: float or np.ndarray => P(0, expiry)
+        df_maturity: float or np.ndarray => P(0, maturity)
+        expiry: float or np.ndarray => option expiry in years
+        maturity: float or np.ndarray => bond maturity in years
+    Returns:
+        price: float or np.ndarray
+    """
+    b = (1.0 - np.exp(-a * (maturity - expiry))) / a
+    sigma_p = sigma * np.sqrt((1.0 - np.exp(-2.0 * a * expiry)) / (2.0 * a)) * b
+    h = np.log(df_maturity / (df_expiry * strike)) / sigma_p + 0.5 * sigma_p
+    return strike * df_expiry * norm_cdf(sigma_p - h) - df_maturity * norm_cdf(-h)
+
+
+class Hull_white(Model):
+    """
+    Hull-White one-factor model fitted to a zcb curve, priced on cached lattices
+    """
+
+    def __init__(self, zcb_curve, a=0.1, sigma=0.01, method="tree", steps_per_year=48):
+        """
+        Class constructor
+
+        Args:
+            zcb_curve: Zcb_curve => initial discount curve (any object with interp(T))
+            a: float => mean reversion speed (default 0.1)
+            sigma: float => short rate volatility (default 0.01)
+            method: str => lattice, "tree" or "pde" (default 'tree')
+            steps_per_year: int => lattice time steps per year (default 48)
+        Returns:
+            Hull_white object
+        """
+        Model.__init__(self)
+        assert method in LATTICE_METHODS, f"method must be in {LATTICE_METHODS}"
+        self.zcb_curve = zcb_curve
+        self.a = a
+        self.sigma = sigma
+        self.method = method
+        self.steps_per_year = steps_per_year
+
+    def lattice(self, maturity):
+        """
+        cached lattice covering [0, maturity], see get_lattice
+
+        Args:
+            maturity: float => maturity in years
+        Returns:
+            lattice: Hull_white_tree or Hull_white_pde
+        """
+        return get_lattice(
+            self.zcb_curve,
+            self.a,
+            self.sigma,
+            maturity,
+            self.steps_per_year,
+            self.method,
+        )
+
+    def _caplet_columns(self, reset_times, payment_times, strikes, taus):
+        # each column rolls back the zcb paying at its payment date, which is turned into
+        # the equivalent zcb put payoff (1 + tau K) (1 / (1 + tau K) - P)^+ at the reset date
+        lattice = self.lattice(np.max(payment_times))
+        reset_steps = lattice.step(reset_times)
+        payment_steps = lattice.step(payment_times)
+        bond_strikes = 1.0 / (1.0 + taus * strikes)
+        values = np.zeros((len(lattice.x), len(reset_steps)))
+        for i in range(lattice.n_steps, -1, -1):
+            values[:, payment_steps == i] = 1.0
+            resetting = reset_steps == i
+            if resetting.any():
+                values[:, resetting] = (
+                    np.maximum(bond_strikes[resetting] - values[:, resetting], 0.0)
+                    / bond_strikes[resetting]
+                )
+            if i > 0:
+                values = lattice.rollback(values, i - 1)
+        return values[lattice.center]
+
+    def price_calplet(self, reset_time, payment_time, strike, tau=None, N=1.0):
+        """
+        caplet price on the lattice
+
+        Args:
+            reset_time: float => reset time in years
+            payment_time: float => payment time in years
+            strike: float => strike rate
+            tau: float => accrual fraction (default None => payment_time - reset_time)
+            N: float => notional amount (default 1.0)
+        Returns:
+            price: float
+        """
+        tau = payment_time - reset_time if tau is None else tau
+        return N * float(
+            self._caplet_columns(
+                np.array([reset_time]),
+                np.array([payment_time]),
+                np.array([strike]),
+                np.array([tau]),
+            )[0]
+        )
+
+    def price_cap(self, tenors, strike, taus=None, N=1.0):
+        """
+        cap price on the lattice (all caplets in one batched rollback)
+
+        Args:
+            tenors: list[float] => cap schedule, caplet i resets at tenors[i] and pays at tenors[i + 1]
+            strike: float => strike rate
+            taus: list[float] => accrual fractions (default None => tenor differences)
+            N: float => notional amount (default 1.0)
+        Returns:
+            price: float
+        """
+        tenors = np.asarray(tenors, dtype=np.float64)
+        taus = np.diff(tenors) if taus is None else np.asarray(taus, dtype=np.float64)
+        strikes = np.full(len(taus), float(strike))
+        return N * float(
+            np.sum(self._caplet_columns(tenors[:-1], tenors[1:], strikes, taus))
+        )
+
+    def price_swaption(
+        self, exercise_times, tenors, strike, payer=True, taus=None, N=1.0
+    ):
+        """
+        European (one exercise time) or Bermudan swaption price on the lattice
+
+        Args:
+            exercise_times: list[float] => exercise times, each a swap reset time in tenors[:-1]
+            tenors: list[float] => swap schedule, period i runs tenors[i] -> tenors[i + 1]
+            strike: float => fixed rate
+            payer: bool => payer (True) or receiver (False) swaption (default True)
+            taus: list[float] => fixed leg accruals (default None => tenor differences)
+            N: float => notional amount (default 1.0)
+        Returns:
+            price: float
+        """
+        tenors = np.asarray(tenors, dtype=np.float64)
+        taus = np.diff(tenors) if taus is None else np.asarray(taus, dtype=np.float64)
+        lattice = self.lattice(tenors[-1])
+        payment_steps = lattice.step(tenors[1:])
+        coupons = strike * taus
+        coupons[-1] += 1.0
+        exercise_steps = set(lattice.step(np.atleast_1d(exercise_times)).tolist())
+        sign = 1.0 if payer else -1.0
+
+        # column 0: fixed-rate bond paying the coupons after the current time,
+        # column 1: option value; exercising at a reset date gives the swap 1 - bond
+        values = np.zeros((len(lattice.x), 2))
+        for i in range(lattice.n_steps, -1, -1):
+            if i in exercise_steps:
+                values[:, 1] = np.maximum(values[:, 1], sign * (1.0 - values[:, 0]))
+            # coupons paid at step i belong to swaps starting before it
+            values[:, 0] += coupons[payment_steps == i].sum()
+            if i > 0:
+                values = lattice.rollback(values, i - 1)
+        return N * float(values[lattice.center, 1])
+
+    def model_zcb_prices(self, tenors):
+        """
+        zcb prices P(0, T) of the model (fitted to the initial curve)
+
+        Args:
+            tenors: np.ndarray => tenors in years, any shape
+        Returns:
+            zcb: np.ndarray
+        """
+        return _curve_discount_factors(self.zcb_curve, tenors)
+
+    def model_caplet_prices(self, reset_times, payment_times, strikes, taus):
+        """
+        closed-form caplet prices, see analytic_caplet_prices
+
+        Args:
+            reset_times, payment_times, strikes, taus: np.ndarray => see analytic_caplet_prices
+        Returns:
+            prices: np.ndarray
+        """
+        return self.analytic_caplet_prices(reset_times, payment_times, strikes, taus)
+
+    def analytic_caplet_prices(self, reset_times, payment_times, strikes, taus=None):
+        """
+        closed-form Hull-White caplet prices (caplet = (1 + tau K) zcb put)
+
+        Args:
+            reset_times: np.ndarray => reset times in years
+            payment_times: np.ndarray => payment times in years
+            strikes: np.ndarray => strike rates
+            taus: np.ndarray => accrual fractions (default None => payment - reset times)
+        Returns:
+            prices: np.ndarray
+        """
+        reset_times = np.asarray(reset_times, dtype=np.float64)
+        payment_times = np.asarray(payment_times, dtype=np.float64)
+        taus = (
+            payment_times - reset_times
+            if taus is None
+            else np.asarray(taus, dtype=np.float64)
+        )
+        bond_strikes = 1.0 / (1.0 + taus * np.asarray(strikes, dtype=np.float64))
+        df_reset = _curve_discount_factors(self.zcb_curve, reset_times)
+        df_payment = _curve_discount_factors(self.zcb_curve, payment_times)
+        puts = hull_white_zbp(
+            self.a,
+            self.sigma,
+            bond_strikes,
+            df_reset,
+            df_payment,
+            reset_times,
+            payment_times,
+        )
+        return puts / bond_strikes
+
+    def calibrate_model(self, vol_curve, initial_guess=None):
+        """
+        fit (a, sigma) to the ATM caplet prices implied by a stripped Vol_curve, using the
+        closed-form caplet prices (no lattice in the loop)
+
+        Args:
+            vol_curve: Vol_curve => vol curve after generate_caplet_vol_term_structure()
+            initial_guess: list[float] => (a, sigma) (default None => current parameters)
+        Returns:
+            result: scipy.optimize.OptimizeResult
+        """
+        from scipy import optimize
+
+        market = caplet_market_inputs([vol_curve])
+
+        def model_prices(params):
+            self.a, self.sigma = params
+            return self.model_caplet_prices(*market["instruments"])
+
+        residuals = calibration_objective(model_prices, market["prices"], relative=True)
+
+        initial_guess = [self.a, self.sigma] if initial_guess is None else initial_guess
+        result = optimize.least_squares(
+            residuals, initial_guess, bounds=([1e-4, 1e-5], [2.0, 0.5])
+        )
+        self.a, self.sigma = result.x
+        return result
@@ -0,0 +1,250 @@
+"""
+Opt-in hot-path instrumentation
+
+Disabled by default. While disabled, an instrumented function costs one extra Python
+call and a flag check, and stage() hands back a shared no-op context manager.
+
+    import Instrumentation
+    Instrumentation.enable()
+    ...
+    print(Instrumentation.to_prometheus())
+"""
+
+import functools
+import threading
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+
+import numpy as np
+
+__all__ = [
+    "enable",
+    "disable",
+    "is_enabled",
+    "reset",
+    "instrumented",
+    "stage",
+    "record_call",
+    "record_solver",
+    "snapshot",
+    "to_prometheus",
+]
+
+MAX_SAMPLES = 10000  # latency samples kept per function for the percentiles
+QUANTILES = (0.5, 0.9, 0.99)
+
+# a list so the hot-path check is a single index, no global rebinding
+_enabled = [False]
+_lock = threading.Lock()
+_calls = {}  # name -> [count, total_seconds, deque(samples)]
+_solvers = {}  # name -> [Counter(iterations), failures]
+_NULL_CONTEXT = nullcontext()
+
+
+def enable():
+    _enabled[0] = True
+
+
+def disable():
+    _enabled[0] = False
+
+
+def is_enabled():
+    return _enabled[0]
+
+
+def reset():
+    """
+    drop every collected metric
+
+    Args:
+        -
+    Returns:
+        -
+    """
+    with _lock:
+        _calls.clear()
+        _solvers.clear()
+
+
+def record_call(name, seconds):
+    """
+    record one timed call
+
+    Args:
+        name: str => function or stage name
+        seconds: float => wall time of the call
+    Returns:
+        -
+    """
+    with _lock:
+        stats = _calls.get(name)
+        if stats is None:
+            stats = _calls[name] = [0, 0.0, deque(maxlen=MAX_SAMPLES)]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2].append(seconds)
+
+
+def record_solver(name, iterations, converged):
+    """
+    record one root-finder run
+
+    Args:
+        name: str => solver name (usually the IV function)
+        iterations: int => iterations used
+        converged: bool => whether the solver converged
+    Returns:
+        -
+    """
+    with _lock:
+        stats = _solvers.get(name)
+        if stats is None:
+            stats = _solvers[name] = [Counter(), 0]
+        stats[0][iterations] += 1
+        if not converged:
+            stats[1] += 1
+
+
+def instrumented(function):
+    """
+    decorator counting and timing calls while instrumentation is enabled
+
+    Args:
+        function: callable => function to wrap
+    Returns:
+        wrapper: callable
+    """
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _enabled[0]:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record_call(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+class _Stage_timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_call(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name):
+    """
+    context manager timing a block (no-op while disabled)
+
+    Args:
+        name: str => stage name, e.g. "generate_caplet_vol_term_structure.cap_iv"
+    Returns:
+        context manager
+    """
+    if not _enabled[0]:
+        return _NULL_CONTEXT
+    return _Stage_timer(name)
+
+
+def snapshot():
+    """
+    export the collected metrics
+
+    Args:
+        -
+    Returns:
+        metrics: dict => {"calls": {name: {...}}, "solvers": {name: {...}}}
+    """
+    with _lock:
+        calls = {
+            name: (count, total, np.array(samples))
+            for name, (count, total, samples) in _calls.items()
+        }
+        solvers = {
+            name: (dict(histogram), failures)
+            for name, (histogram, failures) in _solvers.items()
+        }
+
+    result = {"calls": {}, "solvers": {}}
+    for name, (count, total, samples) in calls.items():
+        quantiles = np.quantile(samples, QUANTILES) if len(samples) else [np.nan] * 3
+        result["calls"][name] = {
+            "count": count,
+            "total_seconds": total,
+            "mean_seconds": total / count,
+            **{
+                f"p{int(q * 100)}_seconds": float(v)
+                for q, v in zip(QUANTILES, quantiles)
+            },
+        }
+    for name, (histogram, failures) in solvers.items():
+        runs = sum(histogram.values())
+        result["solvers"][name] = {
+            "runs": runs,
+            "failures": failures,
+            "mean_iterations": sum(k * v for k, v in histogram.items()) / runs,
+            "max_iterations": max(histogram),
+            "iterations_histogram": dict(sorted(histogram.items())),
+        }
+    return result
+
+
+def to_prometheus(prefix="interest_rate_models"):
+    """
+    export the collected metrics in the Prometheus text exposition format
+
+    Args:
+        prefix: str => metric name prefix (default 'interest_rate_models')
+    Returns:
+        text: str
+    """
+    metrics = snapshot()
+    lines = [
+        f"# TYPE {prefix}_calls_total counter",
+        f"# TYPE {prefix}_latency_seconds summary",
+    ]
+    for name, stats in metrics["calls"].items():
+        label = f'function="{name}"'
+        lines.append(f"{prefix}_calls_total{{{label}}} {stats['count']}")
+        for q in QUANTILES:
+            value = stats[f"p{int(q * 100)}_seconds"]
+            lines.append(
+                f'{prefix}_latency_seconds{{{label},quantile="{q}"}} {value!r}'
+            )
+        lines.append(
+            f"{prefix}_latency_seconds_sum{{{label}}} {stats['total_seconds']!r}"
+        )
+        lines.append(f"{prefix}_latency_seconds_count{{{label}}} {stats['count']}")
+
+    lines.append(f"# TYPE {prefix}_solver_iterations histogram")
+    lines.append(f"# TYPE {prefix}_solver_failures_total counter")
+    for name, stats in metrics["solvers"].items():
+        label = f'solver="{name}"'
+        cumulative = 0
+        for iterations, count in stats["iterations_histogram"].items():
+            cumulative += count
+            lines.append(
+                f'{prefix}_solver_iterations_bucket{{{label},le="{iterations}"}} {cumulative}'
+            )
+        lines.append(
+            f'{prefix}_solver_iterations_bucket{{{label},le="+Inf"}} {stats["runs"]}'
+        )
+        total = stats["mean_iterations"] * stats["runs"]
+        lines.append(f"{prefix}_solver_iterations_sum{{{label}}} {total:g}")
+        lines.append(f"{prefix}_solver_iterations_count{{{label}}} {stats['runs']}")
+        lines.append(f"{prefix}_solver_failures_total{{{label}}} {stats['failures']}")
+    return "\n".join(lines) + "\n"
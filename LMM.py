@@ -0,0 +1,339 @@
+import numpy as np
+from Precision import as_storage, storage_dtype
+from Templates import Model
+from utils import black_caplet_price
+
+__all__ = ["LMM", "exponential_correlation"]
+
+
+def exponential_correlation(times, beta=0.1, rho_inf=0.0):
+    """
+    forward-rate correlation rho_ij = rho_inf + (1 - rho_inf) * exp(-beta * |T_i - T_j|)
+
+    Args:
+        times: (list[float]) => reset times of the forwards in years
+        beta: (float) => decorrelation speed (default 0.1)
+        rho_inf: (float) => long-run correlation level in [0, 1) (default 0.0)
+    Returns:
+        rho: (np.ndarray) => correlation matrix
+    """
+    times = np.asarray(times, dtype=np.float64)
+    return rho_inf + (1.0 - rho_inf) * np.exp(
+        -beta * np.abs(times[:, None] - times[None, :])
+    )
+
+
+class LMM(Model):
+    """
+    Lognormal LIBOR Market Model (BGM) under the spot LIBOR measure.
+
+    Forward i covers period i of the Vol_curve schedule (reset_times[i] -> payment at
+    tenors[i + 1], accrual accruals[i]) and has a constant vol equal to its stripped caplet
+    Black vol, which reprices the caplets exactly. Paths are generated in chunks; the drift
+    of all forwards on all paths of a chunk is one matrix product per time step, with a
+    predictor-corrector step for the state dependence of the drift.
+    """
+
+    def __init__(self, vol_curve=None, beta=0.1, rho_inf=0.0, steps_per_period=1):
+        """
+        Class constructor
+
+        Args:
+            vol_curve: Vol_curve => stripped vol curve to calibrate to (default None => call calibrate_model later)
+            beta: float => correlation decay, see exponential_correlation (default 0.1)
+            rho_inf: float => long-run correlation, see exponential_correlation (default 0.0)
+            steps_per_period: int => time steps between consecutive reset dates (default 1)
+        Returns:
+            LMM object
+        """
+        Model.__init__(self)
+        assert steps_per_period >= 1, "steps_per_period must be >= 1"
+        self.steps_per_period = steps_per_period
+        if vol_curve is not None:
+            self.calibrate_model(vol_curve, beta=beta, rho_inf=rho_inf)
+
+    def calibrate_model(self, vol_curve, beta=0.1, rho_inf=0.0):
+        """
+        calibrate to the caplet Black vols of a stripped Vol_curve and set the correlation
+
+        Args:
+            vol_curve: Vol_curve => vol curve after generate_caplet_vol_term_structure()
+            beta: float => correlation decay (default 0.1)
+            rho_inf: float => long-run correlation (default 0.0)
+        Returns:
+            -
+        """
+        n = len(vol_curve.caplet_black_vols)
+        schedule = vol_curve.schedule
+        self.tenors = np.asarray(vol_curve.tenors, dtype=np.float64)
+        self.reset_times = np.asarray(schedule.reset_times, dtype=np.float64)
+        self.accruals = np.asarray(schedule.accruals, dtype=np.float64)
+        self.initial_forwards = np.asarray(
+            vol_curve.forward_curve[1 : n + 1], dtype=np.float64
+        )
+        self.vols = np.asarray(vol_curve.caplet_black_vols, dtype=np.float64)
+        self.discount_curve = np.asarray(vol_curve.discount_curve, dtype=np.float64)
+        assert np.isfinite(self.vols).all(), "caplet_black_vols must be finite"
+        self.set_correlation(exponential_correlation(self.reset_times, beta, rho_inf))
+
+    def set_correlation(self, rho):
+        """
+        set the forward-rate correlation matrix
+
+        Args:
+            rho: np.ndarray => (n, n) correlation matrix
+        Returns:
+            -
+        """
+        n = len(self.vols)
+        assert np.shape(rho) == (n, n), f"rho must be ({n}, {n})"
+        self.rho = np.asarray(rho, dtype=np.float64)
+        self.cholesky = np.linalg.cholesky(self.rho)
+        # drift kernel M_ij = rho_ij * sigma_j for j <= i (spot measure sums j = q..i)
+        self._drift_kernel_t = (np.tril(self.rho) * self.vols[None, :]).T
+
+        # time grid: 0, the reset dates and steps_per_period - 1 substeps in between
+        nodes = np.concatenate(([0.0], self.reset_times))
+        grid = [0.0]
+        for start, end in zip(nodes[:-1], nodes[1:]):
+            grid.extend(np.linspace(start, end, self.steps_per_period + 1)[1:])
+        self.time_grid = np.asarray(grid)
+        self._observation_steps = (
+            np.arange(1, len(self.reset_times) + 1) * self.steps_per_period
+        )
+
+    def _drift(self, forwards, alive, parameters):
+        # mu_i = sigma_i * sum_{j alive, j <= i} rho_ij sigma_j tau_j F_j / (1 + tau_j F_j)
+        accruals, kernel_t, model_vols = parameters
+        x = accruals * forwards / (1.0 + accruals * forwards) * alive
+        return (x @ kernel_t) * (model_vols * alive)
+
+    def _simulate_chunk(self, n_paths, rng):
+        # paths are stored in the Precision storage dtype, deflators are accumulated in float64
+        dtype = storage_dtype()
+        n = len(self.vols)
+        parameters = tuple(
+            as_storage(x) for x in (self.accruals, self._drift_kernel_t, self.vols)
+        )
+        cholesky_t = as_storage(self.cholesky.T)
+        log_forwards = np.tile(as_storage(np.log(self.initial_forwards)), (n_paths, 1))
+        observed = np.empty((n_paths, n, n), dtype=dtype)
+        observation = 0
+        for step in range(len(self.time_grid) - 1):
+            start = self.time_grid[step]
+            dt = float(self.time_grid[step + 1] - start)
+            # forwards that reset at or before the step start are fixed
+            alive = (self.reset_times > start + 1e-12).astype(dtype)
+            vols = parameters[2] * alive
+            shocks = (rng.standard_normal((n_paths, n), dtype=dtype) @ cholesky_t) * (
+                vols * np.sqrt(dt)
+            )
+
+            drift = self._drift(np.exp(log_forwards), alive, parameters)
+            predicted = log_forwards + (drift - 0.5 * vols**2) * dt + shocks
+            drift = 0.5 * (drift + self._drift(np.exp(predicted), alive, parameters))
+            log_forwards = log_forwards + (drift - 0.5 * vols**2) * dt + shocks
+
+            if step + 1 == self._observation_steps[observation]:
+                observed[:, observation, :] = np.exp(log_forwards)
+                observation += 1
+
+        # deflators: D_0 = P(0, T_0), D_{k+1} = D_k / (1 + tau_k F_k(T_k))
+        fixings = observed[:, np.arange(n), np.arange(n)]
+        deflators = np.empty((n_paths, n + 1))
+        deflators[:, 0] = self.discount_curve[0]
+        deflators[:, 1:] = self.discount_curve[0] / np.cumprod(
+            1.0 + self.accruals * fixings, axis=1, dtype=np.float64
+        )
+        return {"forwards": observed, "deflators": deflators}
+
+    def simulate(self, n_paths, chunk_size=10000, seed=0):
+        """
+        generate paths in chunks
+
+        Note: chunk c uses np.random.default_rng([seed, c]), so any chunk can be regenerated
+              on its own (e.g. for a backward pass)
+
+        Args:
+            n_paths: int => total number of paths
+            chunk_size: int => paths per chunk (default 10000)
+            seed: int => random seed (default 0)
+        Returns:
+            chunks: generator => dicts with
+                "forwards": (paths, n_dates, n) forwards observed at each reset date
+                            (forwards that already reset keep their fixing)
+                "deflators": (paths, n + 1) numeraire deflators of cashflows paid at
+                             tenors[0], ..., tenors[n]
+        """
+        for chunk, start in enumerate(range(0, n_paths, chunk_size)):
+            rng = np.random.default_rng([seed, chunk])
+            yield self._simulate_chunk(min(chunk_size, n_paths - start), rng)
+
+    def _monte_carlo(self, payoff, n_paths, chunk_size, seed):
+        # payoff(chunk) -> deflated payoff per path; returns (mean, standard error)
+        total = 0.0
+        total_sq = 0.0
+        for chunk in self.simulate(n_paths, chunk_size, seed):
+            values = np.asarray(payoff(chunk), dtype=np.float64)
+            total += values.sum()
+            total_sq += (values**2).sum()
+        mean = total / n_paths
+        return mean, np.sqrt(max(total_sq / n_paths - mean**2, 0.0) / n_paths)
+
+    def price_calplet(
+        self, index, strike, N=1.0, n_paths=20000, chunk_size=10000, seed=0
+    ):
+        """
+        Monte Carlo caplet price
+
+        Args:
+            index: int => caplet (forward) index
+            strike: float => strike rate
+            N: float => notional amount (default 1.0)
+            n_paths: int => number of paths (default 20000)
+            chunk_size: int => paths per chunk (default 10000)
+            seed: int => random seed (default 0)
+        Returns:
+            (price, standard_error): (float, float)
+        """
+
+        def payoff(chunk):
+            fixing = chunk["forwards"][:, index, index]
+            return (
+                N
+                * self.accruals[index]
+                * np.maximum(fixing - strike, 0.0)
+                * chunk["deflators"][:, index + 1]
+            )
+
+        return self._monte_carlo(payoff, n_paths, chunk_size, seed)
+
+    def price_cap(
+        self, strike, n_caplets=None, N=1.0, n_paths=20000, chunk_size=10000, seed=0
+    ):
+        """
+        Monte Carlo cap price over the first n_caplets caplets
+
+        Args:
+            strike: float => strike rate
+            n_caplets: int => number of caplets (default None => all)
+            N: float => notional amount (default 1.0)
+            n_paths, chunk_size, seed => see price_calplet
+        Returns:
+            (price, standard_error): (float, float)
+        """
+        n_caplets = len(self.vols) if n_caplets is None else n_caplets
+        index = np.arange(n_caplets)
+
+        def payoff(chunk):
+            fixings = chunk["forwards"][:, index, index]
+            cashflows = N * self.accruals[index] * np.maximum(fixings - strike, 0.0)
+            return np.sum(cashflows * chunk["deflators"][:, 1 : n_caplets + 1], axis=1)
+
+        return self._monte_carlo(payoff, n_paths, chunk_size, seed)
+
+    def model_zcb_prices(self, tenors):
+        """
+        zcb prices P(0, T) of the model (the deflators reprice the calibration discount curve)
+
+        Args:
+            tenors: np.ndarray => tenors in years, any shape
+        Returns:
+            zcb: np.ndarray => linear interpolation of the discount curve @ tenors
+        """
+        return np.interp(tenors, self.tenors, self.discount_curve)
+
+    def model_caplet_prices(self, reset_times, payment_times, strikes, taus):
+        """
+        closed-form caplet prices of the model: forward i is lognormal under its forward
+        measure, so the caplet on period i is Black's formula with vol i
+
+        Args:
+            reset_times: np.ndarray => reset times in years, each a reset time of the model
+            payment_times: np.ndarray => payment times in years (period i pays at tenors[i + 1])
+            strikes: np.ndarray => strike rates
+            taus: np.ndarray => accrual fractions
+        Returns:
+            prices: np.ndarray
+        """
+        periods = np.searchsorted(self.reset_times, np.asarray(reset_times) - 1e-12)
+        assert (periods < len(self.vols)).all() and np.allclose(
+            self.reset_times[periods], reset_times
+        ), "reset_times must be reset times of the model"
+        return black_caplet_price(
+            self.initial_forwards[periods],
+            strikes,
+            self.vols[periods],
+            np.interp(payment_times, self.tenors, self.discount_curve),
+            reset_times,
+            taus,
+        )
+
+    def swap_features(self, chunk, expiry_index, end_index):
+        """
+        forward swap rate and deflated annuity at reset date expiry_index of the swap over
+        periods expiry_index..end_index - 1
+
+        Args:
+            chunk: dict => a chunk from simulate()
+            expiry_index: int => exercise / swap start period
+            end_index: int => swap end period (exclusive)
+        Returns:
+            (swap_rates, annuities): (np.ndarray, np.ndarray) => (paths,) each
+        """
+        periods = np.arange(expiry_index, end_index)
+        forwards = chunk["forwards"][:, expiry_index, periods]
+        taus = self.accruals[periods]
+        # P(T_m, T_{j+1}) = prod_{l=m}^{j} 1 / (1 + tau_l F_l(T_m))
+        weights = taus / np.cumprod(1.0 + taus * forwards, axis=1)
+        annuities = np.sum(weights, axis=1)
+        swap_rates = np.sum(weights * forwards, axis=1) / annuities
+        return swap_rates, annuities * chunk["deflators"][:, expiry_index]
+
+    def swap_values(self, chunk, expiry_index, end_index, strike):
+        """
+        deflated payer swap values at reset date expiry_index for periods expiry_index..end_index - 1
+
+        Args:
+            chunk: dict => a chunk from simulate()
+            expiry_index: int => exercise / swap start period
+            end_index: int => swap end period (exclusive)
+            strike: float => fixed rate
+        Returns:
+            values: np.ndarray => (paths,) deflated swap values
+        """
+        swap_rates, annuities = self.swap_features(chunk, expiry_index, end_index)
+        return annuities * (swap_rates - strike)
+
+    def price_swaption(
+        self,
+        expiry_index,
+        end_index,
+        strike,
+        payer=True,
+        N=1.0,
+        n_paths=20000,
+        chunk_size=10000,
+        seed=0,
+    ):
+        """
+        Monte Carlo European swaption price
+
+        Args:
+            expiry_index: int => expiry at reset_times[expiry_index], the swap starts there
+            end_index: int => swap end period (exclusive, <= number of forwards)
+            strike: float => fixed rate
+            payer: bool => payer (True) or receiver (False) swaption (default True)
+            N: float => notional amount (default 1.0)
+            n_paths, chunk_size, seed => see price_calplet
+        Returns:
+            (price, standard_error): (float, float)
+        """
+        assert 0 <= expiry_index < end_index <= len(self.vols), "invalid swap periods"
+        sign = 1.0 if payer else -1.0
+
+        def payoff(chunk):
+            values = self.swap_values(chunk, expiry_index, end_index, strike)
+            return N * np.maximum(sign * values, 0.0)
+
+        return self._monte_carlo(payoff, n_paths, chunk_size, seed)
@@ -0,0 +1,211 @@
+"""
+Columnar market-data ingestion for ZCB and cap quotes
+
+Quote files are in long format, one row per (date, tenor) and sorted by date:
+
+    date,tenor,zcb,cap_price
+    20240102,0.25,0.9923,
+    20240102,0.5,0.9844,0.000477
+    ...
+
+Dates are yyyymmdd integers, as in Curve_store. cap_price is the price of the ATM cap
+maturing at that tenor, so the first tenor of a date has none (empty or nan). Files are
+parsed in chunks of rows and every chunk is validated in bulk (tenors strictly increasing,
+no missing values, ZCB in (0, 1], cap prices > 0), so multi-GB histories stream with
+bounded memory. Parquet files need the optional pyarrow package.
+
+    for date, tenors, zcb_curve, cap_prices in read_quotes("quotes.csv"):
+        ...
+    results = run_backtest("quotes.csv")   # Backtest.read_snapshots reads quote files too
+"""
+
+import itertools
+import os
+import re
+
+import numpy as np
+
+__all__ = ["QUOTE_COLUMNS", "INVALID_POLICIES", "validate_quotes", "read_quotes"]
+
+QUOTE_COLUMNS = ["date", "tenor", "zcb", "cap_price"]
+INVALID_POLICIES = ["raise", "skip"]
+
+# an empty csv field (between delimiters or at a line end) parses as nan
+_EMPTY_FIELD = re.compile(r"(?<=,)(?=,|$)|^(?=,)", re.MULTILINE)
+
+
+def validate_quotes(dates, tenors, zcb, cap_prices, n_tenors=None, last_date=None):
+    """
+    validate a block of long-format rows sorted by date, all dates at once
+
+    Args:
+        dates: np.ndarray => (rows,) yyyymmdd dates
+        tenors: np.ndarray => (rows,) tenors in years
+        zcb: np.ndarray => (rows,) zcb prices
+        cap_prices: np.ndarray => (rows,) cap prices, ignored on the first row of a date
+        n_tenors: int => required number of tenors per date (default None => any, >= 2)
+        last_date: int => largest date of the rows before this block (default None)
+    Returns:
+        problems: list[dict] => one dict per invalid group of rows of one date, with keys
+                  "date", "rows" ((start, end) row range in the block) and "reason"
+    """
+    if len(dates) == 0:
+        return []
+    new_date = np.r_[True, dates[1:] != dates[:-1]]
+    starts = np.flatnonzero(new_date)
+    ends = np.r_[starts[1:], len(dates)]
+    counts = ends - starts
+
+    checks = [
+        ("tenors are not finite and > 0", ~(np.isfinite(tenors) & (tenors > 0.0))),
+        (
+            "tenors are not strictly increasing",
+            ~new_date & ~(np.diff(tenors, prepend=0.0) > 0.0),
+        ),
+        ("zcb prices are not in (0, 1]", ~((zcb > 0.0) & (zcb <= 1.0))),
+        ("cap prices are missing or not > 0", ~new_date & ~(cap_prices > 0.0)),
+    ]
+    reasons = [
+        (reason, np.logical_or.reduceat(bad_rows, starts))
+        for reason, bad_rows in checks
+    ]
+    # a date must be later than every earlier date, so repeats are caught too
+    group_dates = dates[starts]
+    first = np.iinfo(np.int64).min if last_date is None else last_date
+    earlier_max = np.maximum.accumulate(np.r_[first, group_dates[:-1]])
+    reasons.insert(0, ("dates are not strictly increasing", group_dates <= earlier_max))
+    if n_tenors is None:
+        reasons.append(("fewer than 2 tenors", counts < 2))
+    else:
+        reasons.append((f"number of tenors != {n_tenors}", counts != n_tenors))
+    invalid = np.logical_or.reduce([bad_groups for _, bad_groups in reasons])
+
+    return [
+        {
+            "date": int(group_dates[group]),
+            "rows": (int(starts[group]), int(ends[group])),
+            "reason": "; ".join(
+                reason for reason, bad_groups in reasons if bad_groups[group]
+            ),
+        }
+        for group in np.flatnonzero(invalid)
+    ]
+
+
+def _csv_blocks(path, chunk_rows):
+    # (dates, tenors, zcb, cap_prices) blocks of at most chunk_rows rows
+    with open(path) as file:
+        header = [name.strip() for name in file.readline().strip().split(",")]
+        missing = [name for name in QUOTE_COLUMNS if name not in header]
+        assert not missing, f"{path} has no column(s) {missing}"
+        usecols = [header.index(name) for name in QUOTE_COLUMNS]
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                return
+            text = _EMPTY_FIELD.sub(
+                "nan", "".join(lines).replace(" ", "").replace("\r", "")
+            )
+            block = np.loadtxt(
+                text.splitlines(),
+                delimiter=",",
+                usecols=usecols,
+                dtype=np.float64,
+                ndmin=2,
+            )
+            yield block[:, 0].astype(np.int64), block[:, 1], block[:, 2], block[:, 3]
+
+
+def _parquet_blocks(path, chunk_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("reading parquet quote files requires pyarrow") from error
+
+    for batch in pq.ParquetFile(path).iter_batches(
+        batch_size=chunk_rows, columns=QUOTE_COLUMNS
+    ):
+        # nulls (the first cap price of each date) come back as nan
+        date, tenor, zcb, cap_price = (
+            batch.column(name).to_numpy(zero_copy_only=False) for name in QUOTE_COLUMNS
+        )
+        yield (
+            date.astype(np.int64),
+            tenor.astype(np.float64),
+            zcb.astype(np.float64),
+            cap_price.astype(np.float64),
+        )
+
+
+def read_quotes(
+    path, chunk_rows=1_000_000, n_tenors=None, on_invalid="raise", diagnostics=None
+):
+    """
+    stream the snapshots of a long-format quote file
+
+    Args:
+        path: str => .csv or .parquet quote file (see the module docstring for the layout)
+        chunk_rows: int => rows parsed and validated per chunk (default 1000000)
+        n_tenors: int => required number of tenors per date (default None => any)
+        on_invalid: str => "raise" (ValueError) or "skip" the invalid dates (default 'raise')
+        diagnostics: list => if given, a dict with keys "date", "rows" ((start, end) data
+                     row range in the file) and "reason" is appended per skipped group of
+                     rows (default None)
+    Returns:
+        snapshots: generator => (date, tenors, zcb_curve, cap_prices) tuples of np.ndarray,
+                   len(cap_prices) = len(tenors) - 1, the input of Backtest.bootstrap_stage
+    """
+    assert on_invalid in INVALID_POLICIES, f"on_invalid must be in {INVALID_POLICIES}"
+    assert chunk_rows >= 1, "chunk_rows must be >= 1"
+    extension = os.path.splitext(path)[1].lower()
+    assert extension in [".csv", ".parquet"], "quote files must be .csv or .parquet"
+    blocks = (_parquet_blocks if extension == ".parquet" else _csv_blocks)(
+        path, chunk_rows
+    )
+
+    policy = (path, n_tenors, on_invalid, diagnostics)
+    carry = None  # rows of the last date of the previous chunk, the date may continue
+    offset = 0  # file row of the first row of carry
+    last_date = None
+    for block in blocks:
+        columns = (
+            block if carry is None else tuple(map(np.concatenate, zip(carry, block)))
+        )
+        dates = columns[0]
+        earlier = np.flatnonzero(dates != dates[-1]) if len(dates) else dates
+        complete = int(earlier[-1]) + 1 if len(earlier) else 0
+        carry = tuple(column[complete:] for column in columns)
+        if complete:
+            done = [column[:complete] for column in columns]
+            yield from _snapshots(done, offset, last_date, *policy)
+            block_last = int(dates[:complete].max())
+            last_date = block_last if last_date is None else max(last_date, block_last)
+            offset += complete
+    if carry is not None:
+        yield from _snapshots(carry, offset, last_date, *policy)
+
+
+def _snapshots(columns, offset, last_date, path, n_tenors, on_invalid, diagnostics):
+    # split complete dates into snapshots, validated together; invalid groups are keyed by
+    # row range, so a repeated date never takes a valid earlier group down with it
+    dates, tenors, zcb, cap_prices = columns
+    invalid_starts = set()
+    for problem in validate_quotes(dates, tenors, zcb, cap_prices, n_tenors, last_date):
+        start, end = problem["rows"]
+        problem["rows"] = (offset + start, offset + end)
+        if on_invalid == "raise":
+            raise ValueError(
+                f"{path}: date {problem['date']}: {problem['reason']} (rows {problem['rows']})"
+            )
+        if diagnostics is not None:
+            diagnostics.append(problem)
+        invalid_starts.add(start)
+
+    starts = (
+        np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]]) if len(dates) else dates
+    )
+    for start, end in zip(starts, np.r_[starts[1:], len(dates)]):
+        if start not in invalid_starts:
+            yield int(dates[start]), tenors[start:end], zcb[start:end], cap_prices[
+                start + 1 : end
+            ]
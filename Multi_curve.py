@@ -0,0 +1,101 @@
+import numpy as np
+from Curves import Vol_curve
+from Schedules import legacy_schedule
+from utils import _readonly_array
+
+__all__ = ["Multi_curve"]
+
+
+class Multi_curve:
+    """
+    OIS discount curve plus one or more projection (index) curves on a common tenor grid.
+
+    Discount factors, annuities, and per projection curve the forwards and forward swap
+    rates are computed once at construction and shared (read-only) by every instrument
+    priced off the grid, instead of being recomputed per instrument.
+
+    Grid convention (same as Vol_curve): period i runs tenors[i] -> tenors[i + 1], resets at
+    schedule.reset_times[i], accrues schedule.accruals[i] and pays at tenors[i + 1].
+    """
+
+    def __init__(self, discount_curve, projection_curves, tenors, schedule=None):
+        """
+        Class constructor
+
+        Args:
+            discount_curve: Zcb_curve => OIS discount curve (any object with interp(T))
+            projection_curves: dict[str, Zcb_curve] => projection curve per index, e.g. {"3M": ...}
+            tenors: list[float] => common tenor grid in years
+            schedule: Schedule => period schedule (default None => legacy_schedule(tenors))
+        Returns:
+            Multi_curve object
+        """
+        assert len(projection_curves) > 0, "at least one projection curve is required"
+        assert (
+            schedule is None or len(schedule) == len(tenors) - 1
+        ), "len(schedule) must = len(tenors) - 1"
+        self.discount_curve = discount_curve
+        self.projection_curves = dict(projection_curves)
+        self.tenors = _readonly_array(tenors)
+        self.schedule = legacy_schedule(list(tenors)) if schedule is None else schedule
+
+        accruals = self.schedule.accruals
+        self.discount_factors = _readonly_array(discount_curve.interp(self.tenors))
+        # annuity of the periods 0..i, discounted at their payment dates
+        self.annuities = _readonly_array(
+            np.cumsum(accruals * self.discount_factors[1:])
+        )
+
+        self.projection_factors = {}
+        self.forwards = {}
+        self.forward_swap_rates = {}
+        for name, curve in self.projection_curves.items():
+            projection = np.asarray(curve.interp(self.tenors), dtype=np.float64)
+            forwards = (projection[:-1] / projection[1:] - 1.0) / accruals
+            self.projection_factors[name] = _readonly_array(projection)
+            self.forwards[name] = _readonly_array(forwards)
+            # swap rate of the periods 0..i: projected floating leg / OIS annuity
+            self.forward_swap_rates[name] = _readonly_array(
+                np.cumsum(accruals * self.discount_factors[1:] * forwards)
+                / self.annuities
+            )
+
+    def cap_inputs(self, projection, n_periods=None):
+        """
+        inputs of utils.black_cap_price for a cap over the first n_periods periods
+
+        Args:
+            projection: str => projection curve name
+            n_periods: int => number of caplets (default None => all periods)
+        Returns:
+            inputs: dict => forward_curve, zcb_prices, time_to_reset_date and taus arrays
+        """
+        n_periods = len(self.schedule) if n_periods is None else n_periods
+        return {
+            "forward_curve": self.forwards[projection][:n_periods],
+            "zcb_prices": self.discount_factors[1 : n_periods + 1],
+            "time_to_reset_date": self.schedule.reset_times[:n_periods],
+            "taus": self.schedule.accruals[:n_periods],
+        }
+
+    def vol_curve(
+        self, cap_price_curve, projection, interp_method="piecewise constant"
+    ):
+        """
+        Vol_curve for caps on a projection index, discounted on the OIS curve
+
+        Args:
+            cap_price_curve: list[float] => ATM cap prices (len(tenors) - 1)
+            projection: str => projection curve name
+            interp_method: str => Vol_curve interp_method (default 'piecewise constant')
+        Returns:
+            vol_curve: Vol_curve (not stripped yet)
+        """
+        return Vol_curve(
+            cap_price_curve,
+            self.projection_factors[projection].tolist(),
+            self.tenors.tolist(),
+            interp_method,
+            schedule=self.schedule,
+            discount_curve=self.discount_factors.tolist(),
+        )
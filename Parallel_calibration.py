@@ -0,0 +1,184 @@
+"""
+Parallel calibration runner over independent (key, tenors, zcb_curve, cap_prices) jobs
+
+The job inputs are packed once into a shared-memory block that every worker maps on start,
+so a job submission only sends its row index. Each worker caps its BLAS / OpenMP thread
+pools (one thread by default), so N workers use N cores instead of N * cores threads.
+Results stream back as they complete, or in job order with ordered=True.
+
+    jobs = [(("USD", date), tenors, zcb_curve, cap_prices), ...]
+    for result in run_calibrations(jobs, calibrate=fit_model, max_workers=8):
+        ...
+"""
+
+import contextlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+from Curves import Vol_curve
+
+__all__ = ["BLAS_THREAD_VARIABLES", "run_calibrations"]
+
+BLAS_THREAD_VARIABLES = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+# worker state, set by _initialize_worker
+_shared = None
+_inputs = None
+
+
+@contextlib.contextmanager
+def _blas_threads_env(blas_threads):
+    # new worker processes inherit the environment they are started with
+    previous = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+    os.environ.update({name: str(blas_threads) for name in BLAS_THREAD_VARIABLES})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _attach(name):
+    try:
+        # python >= 3.13: the parent owns (and unlinks) the block
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # older versions register it again with the parent's resource tracker, a no-op
+        return shared_memory.SharedMemory(name=name)
+
+
+def _initialize_worker(name, shape, blas_threads):
+    global _shared, _inputs
+    os.environ.update(
+        {variable: str(blas_threads) for variable in BLAS_THREAD_VARIABLES}
+    )
+    try:
+        # limits pools of BLAS libraries that were loaded before the variables were set
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(blas_threads)
+    except ImportError:
+        pass
+    _shared = _attach(name)
+    _inputs = np.ndarray(shape, dtype=np.float64, buffer=_shared.buf)
+
+
+def _pack_jobs(jobs):
+    # (3, jobs, width) float64: tenors, zcb curves, cap prices, NaN padded
+    width = max(len(tenors) for _, tenors, _, _ in jobs)
+    shape = (3, len(jobs), width)
+    block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    inputs = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    inputs.fill(np.nan)
+    for row, (_, tenors, zcb_curve, cap_prices) in enumerate(jobs):
+        assert len(zcb_curve) == len(tenors), "len(zcb_curve) must = len(tenors)"
+        assert (
+            len(cap_prices) == len(tenors) - 1
+        ), "len(cap_prices) must = len(tenors) - 1"
+        inputs[0, row, : len(tenors)] = tenors
+        inputs[1, row, : len(tenors)] = zcb_curve
+        inputs[2, row, : len(cap_prices)] = cap_prices
+    del inputs
+    return block, shape
+
+
+def _calibrate_job(row, interp_method, failure_policy, calibrate):
+    tenors = _inputs[0, row]
+    n = int(np.count_nonzero(~np.isnan(tenors)))
+    vol_curve = Vol_curve(
+        _inputs[2, row, : n - 1].tolist(),
+        _inputs[1, row, :n].tolist(),
+        tenors[:n].tolist(),
+        interp_method=interp_method,
+    )
+    vol_curve.generate_caplet_vol_term_structure(failure_policy=failure_policy)
+    return {
+        "cap_black_vols": np.asarray(vol_curve.cap_black_vols),
+        "caplet_black_vols": np.asarray(vol_curve.caplet_black_vols),
+        "caplet_normal_vols": np.asarray(vol_curve.caplet_normal_vols),
+        "strip_diagnostics": vol_curve.strip_diagnostics,
+        "calibration": None if calibrate is None else calibrate(vol_curve, None),
+    }
+
+
+def run_calibrations(
+    jobs,
+    calibrate=None,
+    max_workers=None,
+    ordered=False,
+    interp_method="piecewise constant",
+    failure_policy="raise",
+    blas_threads=1,
+    mp_context=None,
+):
+    """
+    strip (and optionally calibrate) many independent curves across a process pool
+
+    Args:
+        jobs: list => (key, tenors, zcb_curve, cap_prices) tuples, e.g. key = (currency, date)
+        calibrate: callable => calibrate(vol_curve, None) -> picklable result, a module-level
+                   function (same signature as Backtest.calibration_stage, jobs are independent
+                   so there is no previous result) (default None => strip only)
+        max_workers: int => worker processes (default None => os.cpu_count())
+        ordered: bool => yield in job order instead of completion order (default False)
+        interp_method: str => Vol_curve interp_method (default 'piecewise constant')
+        failure_policy: str => see Vol_curve.generate_caplet_vol_term_structure (default 'raise')
+        blas_threads: int => BLAS / OpenMP threads per worker (default 1)
+        mp_context: multiprocessing context => (default None => platform default)
+    Returns:
+        results: generator => dicts with keys "key", "cap_black_vols", "caplet_black_vols",
+                 "caplet_normal_vols", "strip_diagnostics" and "calibration"; a failed job
+                 raises its exception when its result is reached
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+    block, shape = _pack_jobs(jobs)
+    executor = None
+    try:
+        with _blas_threads_env(blas_threads):
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=mp_context,
+                initializer=_initialize_worker,
+                initargs=(block.name, shape, blas_threads),
+            )
+            # workers are started on submission, inside the pinned environment
+            futures = {
+                executor.submit(
+                    _calibrate_job, row, interp_method, failure_policy, calibrate
+                ): row
+                for row in range(len(jobs))
+            }
+        pending = set(futures)
+        completed = {}
+        next_row = 0
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                completed[futures[future]] = future
+            rows = [] if ordered else sorted(completed)
+            while ordered and next_row in completed:
+                rows.append(next_row)
+                next_row += 1
+            for row in rows:
+                result = completed.pop(row).result()
+                result["key"] = jobs[row][0]
+                yield result
+    finally:
+        # also reached when the consumer stops early: drop the jobs not started yet
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        block.close()
+        block.unlink()
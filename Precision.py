@@ -0,0 +1,138 @@
+"""
+Precision policy for batch pricing, scenario and simulation arrays
+
+"float64" (default) leaves everything as it is. "float32" stores and computes the batch
+arrays (inputs of the utils caplet pricers, shocked curves, LMM paths, Bermudan features)
+in float32, while sums, cumulative discount products and regression Gram matrices
+accumulate in float64. Implied vol solves and the caplet strip always run in float64
+(their tolerances are below float32 resolution), and so do the zcb_curve_to_* converters,
+which build per-curve python lists rather than batch arrays. The policy is a context
+variable: it applies to the current thread or asyncio task only.
+
+    import Precision
+    with Precision.precision("float32"):
+        for chunk in model.simulate(1_000_000):
+            ...
+"""
+
+import contextlib
+import contextvars
+import functools
+
+import numpy as np
+
+__all__ = [
+    "PRECISIONS",
+    "set_precision",
+    "get_precision",
+    "precision",
+    "storage_dtype",
+    "as_storage",
+    "accumulate_sum",
+    "in_float64",
+]
+
+PRECISIONS = ["float64", "float32"]
+ACCUMULATION_DTYPE = np.float64
+
+# per thread / asyncio task, so a float32 block never leaks into concurrent strips or solves
+_storage = contextvars.ContextVar("storage_dtype", default=np.float64)
+
+
+def set_precision(name):
+    """
+    select the precision policy
+
+    Args:
+        name: str => "float64" or "float32"
+    Returns:
+        -
+    """
+    assert name in PRECISIONS, f"precision must be in {PRECISIONS}"
+    _storage.set(np.dtype(name).type)
+
+
+def get_precision():
+    return np.dtype(_storage.get()).name
+
+
+@contextlib.contextmanager
+def precision(name):
+    """
+    select a precision policy inside a with block, then restore the previous one
+
+    Args:
+        name: str => "float64" or "float32"
+    Returns:
+        context manager
+    """
+    assert name in PRECISIONS, f"precision must be in {PRECISIONS}"
+    token = _storage.set(np.dtype(name).type)
+    try:
+        yield
+    finally:
+        _storage.reset(token)
+
+
+def storage_dtype():
+    """
+    dtype of the batch arrays under the current policy
+
+    Args:
+        -
+    Returns:
+        dtype: np.float64 or np.float32
+    """
+    return _storage.get()
+
+
+def as_storage(values):
+    """
+    cast arrays (numpy arrays, numpy scalars, lists) to the storage dtype; python scalars are
+    left alone, numpy promotes them to the array dtype
+
+    Args:
+        values: float, list or np.ndarray
+    Returns:
+        values: float or np.ndarray
+    """
+    dtype = _storage.get()
+    if dtype is np.float64 or isinstance(values, (float, int)):
+        return values
+    return np.asarray(values, dtype=dtype)
+
+
+def accumulate_sum(values, axis=None):
+    """
+    sum with float64 accumulation whatever the storage dtype
+
+    Args:
+        values: np.ndarray => values to sum
+        axis: int => axis (default None => all)
+    Returns:
+        sum: np.float64 or np.ndarray
+    """
+    return np.sum(values, axis=axis, dtype=ACCUMULATION_DTYPE)
+
+
+def in_float64(func):
+    """
+    decorator running func under the float64 policy whatever the current one
+
+    Args:
+        func: callable
+    Returns:
+        wrapped: callable
+    """
+
+    @functools.wraps(func)
+    def wrapped(*args, **kwargs):
+        if _storage.get() is np.float64:
+            return func(*args, **kwargs)
+        token = _storage.set(np.float64)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _storage.reset(token)
+
+    return wrapped
@@ -0,0 +1,198 @@
+"""
+Model-vs-market pricing errors in bulk
+
+Prices are (..., instruments) arrays with any leading axes (dates, scenarios): residuals,
+weighted metrics and calibration residual vectors are computed for all of them in one pass.
+Missing quotes (NaN market prices, e.g. the padding of curves with fewer caplets) get a
+zero weight.
+
+    market = caplet_market_inputs(vol_curves)                  # (dates, caplets)
+    model_prices = model.model_caplet_prices(*market["instruments"])
+    errors = pricing_errors(model_prices, market["prices"], relative=True, metric="rmse")
+"""
+
+import numpy as np
+from utils import black_caplet_price, normal_caplet_price
+
+__all__ = [
+    "ERROR_METRICS",
+    "pricing_residuals",
+    "weighted_metric",
+    "pricing_errors",
+    "calibration_objective",
+    "caplet_market_inputs",
+]
+
+ERROR_METRICS = ["mse", "rmse", "mae", "max"]
+
+
+def pricing_residuals(model_prices, market_prices, relative=False):
+    """
+    model minus market prices
+
+    Args:
+        model_prices: np.ndarray => (..., instruments) model prices
+        market_prices: np.ndarray => (..., instruments) market prices, NaN if missing
+        relative: bool => divide by the market prices (default False)
+    Returns:
+        residuals: (np.ndarray) => (..., instruments), NaN where the market price is missing
+    """
+    model_prices = np.asarray(model_prices, dtype=np.float64)
+    market_prices = np.asarray(market_prices, dtype=np.float64)
+    residuals = model_prices - market_prices
+    return residuals / market_prices if relative else residuals
+
+
+def _weights(residuals, weights):
+    # broadcast weights, zero where the residual is missing
+    weights = (
+        np.ones_like(residuals) if weights is None else np.asarray(weights, np.float64)
+    )
+    missing = np.isnan(residuals)
+    return np.where(missing, 0.0, np.broadcast_to(weights, residuals.shape)), missing
+
+
+def weighted_metric(residuals, weights=None, metric="mse", axis=-1):
+    """
+    weighted error metric, NaN residuals are ignored
+
+    Args:
+        residuals: np.ndarray => (..., instruments) residuals
+        weights: np.ndarray => weights broadcastable to residuals (default None => equal)
+        metric: str => "mse", "rmse", "mae" (weighted means) or "max" (largest |residual|
+                with a positive weight) (default 'mse')
+        axis: int or None => reduced axis, None for all (default -1, i.e. per date)
+    Returns:
+        metric: (float or np.ndarray) => NaN where no residual has a positive weight
+    """
+    assert metric in ERROR_METRICS, f"metric must be in {ERROR_METRICS}"
+    residuals = np.asarray(residuals, dtype=np.float64)
+    weights, missing = _weights(residuals, weights)
+    absolute = np.where(missing, 0.0, np.abs(residuals))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if metric == "max":
+            counted = np.sum(weights > 0.0, axis=axis)
+            value = np.where(
+                counted > 0,
+                np.max(np.where(weights > 0.0, absolute, 0.0), axis=axis),
+                np.nan,
+            )
+        else:
+            power = 1 if metric == "mae" else 2
+            value = np.sum(weights * absolute**power, axis=axis) / np.sum(
+                weights, axis=axis
+            )
+            value = np.sqrt(value) if metric == "rmse" else value
+    return float(value) if np.ndim(value) == 0 else value
+
+
+def pricing_errors(
+    model_prices, market_prices, weights=None, relative=False, metric="mse"
+):
+    """
+    residuals and weighted metrics of model vs market prices
+
+    Args:
+        model_prices: np.ndarray => (..., instruments) model prices
+        market_prices: np.ndarray => (..., instruments) market prices, NaN if missing
+        weights: np.ndarray => weights broadcastable to the prices (default None => equal)
+        relative: bool => relative residuals, (model - market) / market (default False)
+        metric: str => see weighted_metric (default 'mse')
+    Returns:
+        errors: dict =>
+            "residuals": np.ndarray => (..., instruments) per-instrument residuals
+            "metric": float or np.ndarray => metric per leading index (e.g. per date)
+            "total": float => metric over all instruments
+    """
+    residuals = pricing_residuals(model_prices, market_prices, relative)
+    return {
+        "residuals": residuals,
+        "metric": weighted_metric(residuals, weights, metric),
+        "total": weighted_metric(residuals, weights, metric, axis=None),
+    }
+
+
+def calibration_objective(model_prices, market_prices, weights=None, relative=False):
+    """
+    residual function for scipy.optimize.least_squares: its sum of squares is the weighted
+    sum of squared residuals
+
+    Args:
+        model_prices: callable => model_prices(params) -> (..., instruments) model prices
+        market_prices: np.ndarray => (..., instruments) market prices, NaN if missing
+        weights: np.ndarray => weights broadcastable to the prices (default None => equal)
+        relative: bool => relative residuals (default False)
+    Returns:
+        objective: callable => objective(params) -> flat np.ndarray of sqrt(weight) * residual
+                   (0 for missing quotes)
+    """
+    market_prices = np.asarray(market_prices, dtype=np.float64)
+    weights, missing = _weights(market_prices, weights)
+    scale = np.sqrt(weights).ravel()
+    missing = missing.ravel()
+
+    def objective(params):
+        residuals = pricing_residuals(
+            model_prices(params), market_prices, relative
+        ).ravel()
+        return np.where(missing, 0.0, residuals * scale)
+
+    return objective
+
+
+def caplet_market_inputs(vol_curves, vol_type="black"):
+    """
+    ATM caplet quotes of stripped vol curves (one per date), stacked and NaN padded, priced
+    with one batched caplet pricer call
+
+    Args:
+        vol_curves: list[Vol_curve] => vol curves after generate_caplet_vol_term_structure()
+        vol_type: str => price with the "black" or "normal" caplet vols (default 'black')
+    Returns:
+        inputs: dict =>
+            "instruments": tuple => (reset_times, payment_times, strikes, taus), each
+                           (dates, caplets), the arguments of Model.model_caplet_prices
+            "prices": np.ndarray => (dates, caplets) market caplet prices, NaN padded
+    """
+    assert vol_type in ["black", "normal"], "vol_type must be in ['black', 'normal']"
+    n = max(len(vol_curve.caplet_black_vols) for vol_curve in vol_curves)
+    shape = (len(vol_curves), n)
+    columns = {
+        name: np.empty(shape)
+        for name in ["reset_times", "payment_times", "strikes", "taus", "vols", "dfs"]
+    }
+    counts = np.zeros(len(vol_curves), dtype=np.int64)
+    for row, vol_curve in enumerate(vol_curves):
+        m = len(vol_curve.caplet_black_vols)
+        vols = (
+            vol_curve.caplet_black_vols
+            if vol_type == "black"
+            else vol_curve.caplet_normal_vols
+        )
+        for name, values in [
+            ("reset_times", vol_curve.schedule.reset_times[:m]),
+            ("payment_times", vol_curve.tenors[1 : m + 1]),
+            ("strikes", vol_curve.forward_curve[1 : m + 1]),
+            ("taus", vol_curve.schedule.accruals[:m]),
+            ("vols", vols),
+            ("dfs", vol_curve.discount_curve[1 : m + 1]),
+        ]:
+            # padding repeats the last caplet, so any model can price it (masked below)
+            columns[name][row, :m] = values
+            columns[name][row, m:] = values[-1]
+        counts[row] = m
+
+    pricer = black_caplet_price if vol_type == "black" else normal_caplet_price
+    prices = pricer(
+        columns["strikes"],
+        columns["strikes"],
+        columns["vols"],
+        columns["dfs"],
+        columns["reset_times"],
+        columns["taus"],
+    )
+    prices = np.where(np.arange(n) < counts[:, None], prices, np.nan)
+    instruments = tuple(
+        columns[name] for name in ["reset_times", "payment_times", "strikes", "taus"]
+    )
+    return {"instruments": instruments, "prices": prices}
@@ -0,0 +1,217 @@
+"""
+Asyncio pricing service with micro-batching
+
+Concurrent requests of the same kind that arrive within `window` seconds are coalesced
+into one vectorized call of the utils pricers and the results are fanned back out to the
+awaiting callers. A batch is flushed early once it reaches `max_batch_size`, so a request
+never waits longer than `window` for its batch to start.
+
+    async with Pricing_service(window=0.001) as service:
+        client = Local_client(service)
+        response = await client.request({"op": "black_caplet_price", "f": 0.03, ...})
+"""
+
+import asyncio
+
+import numpy as np
+from utils import black_caplet_price, get_black_caplet_iv
+
+__all__ = ["Pricing_service", "Local_client"]
+
+# op -> (argument names, defaults)
+OPERATIONS = {
+    "black_caplet_price": (
+        ("f", "k", "sigma", "df", "t", "tau", "N"),
+        {"tau": 0.25, "N": 1.0},
+    ),
+    "black_caplet_iv": (
+        ("price", "f", "k", "df", "t", "tau", "N", "initial_guess"),
+        {"tau": 0.25, "N": 1.0, "initial_guess": 0.3},
+    ),
+    "strip_vol_curve": (
+        ("cap_prices", "zcb_curve", "tenors"),
+        {},
+    ),
+}
+
+
+def _batch_black_caplet_price(f, k, sigma, df, t, tau, N):
+    return black_caplet_price(f, k, sigma, df, t, tau, N)
+
+
+def _batch_black_caplet_iv(price, f, k, df, t, tau, N, initial_guess):
+    # batch-safe: a quote that does not converge gets NaN instead of failing the batch
+    return get_black_caplet_iv(
+        price, f, k, df, t, tau, N, initial_guess, on_failure="nan"
+    )
+
+
+def _strip_vol_curve(cap_prices, zcb_curve, tenors):
+    from Curves import Vol_curve
+
+    vol_curve = Vol_curve(
+        list(cap_prices), list(zcb_curve), list(tenors), "piecewise constant"
+    )
+    vol_curve.generate_caplet_vol_term_structure()
+    return {
+        "cap_black_vols": vol_curve.cap_black_vols,
+        "caplet_black_vols": vol_curve.caplet_black_vols,
+        "caplet_normal_vols": vol_curve.caplet_normal_vols,
+    }
+
+
+BATCH_FUNCTIONS = {
+    "black_caplet_price": _batch_black_caplet_price,
+    "black_caplet_iv": _batch_black_caplet_iv,
+}
+
+
+class Pricing_service:
+    def __init__(self, window=0.001, max_batch_size=4096):
+        """
+        Class constructor
+
+        Args:
+            window: float => coalescing window in seconds (default 0.001)
+            max_batch_size: int => flush a batch as soon as it holds this many requests (default 4096)
+        Returns:
+            Pricing_service object
+        """
+        assert window >= 0.0, "window must be >= 0"
+        assert max_batch_size >= 1, "max_batch_size must be >= 1"
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending = {op: [] for op in BATCH_FUNCTIONS}
+        self._timers = {}
+        self.batch_sizes = []  # size of every flushed batch, for monitoring
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        flush everything still pending
+
+        Args:
+            -
+        Returns:
+            -
+        """
+        for op in list(self._pending):
+            self._flush(op)
+        await asyncio.sleep(0)
+
+    def _submit(self, op, args):
+        # convert here so one malformed request fails on its own, not its whole batch
+        try:
+            args = tuple(float(arg) for arg in args)
+        except (TypeError, ValueError) as exc:
+            raise TypeError(f"arguments of op {op!r} must be numbers: {exc}") from None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending[op]
+        pending.append((args, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(op)
+        elif op not in self._timers:
+            self._timers[op] = loop.call_later(self.window, self._flush, op)
+        return future
+
+    def _flush(self, op):
+        timer = self._timers.pop(op, None)
+        if timer is not None:
+            timer.cancel()
+        batch, self._pending[op] = self._pending[op], []
+        if not batch:
+            return
+        self.batch_sizes.append(len(batch))
+        try:
+            columns = [
+                np.array([args[i] for args, _ in batch], dtype=np.float64)
+                for i in range(len(batch[0][0]))
+            ]
+            results = np.broadcast_to(BATCH_FUNCTIONS[op](*columns), (len(batch),))
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(float(result))
+
+    async def black_caplet_price(self, f, k, sigma, df, t, tau=0.25, N=1.0):
+        """
+        batched black_caplet_price (see utils.black_caplet_price)
+        """
+        return await self._submit("black_caplet_price", (f, k, sigma, df, t, tau, N))
+
+    async def black_caplet_iv(
+        self, price, f, k, df, t, tau=0.25, N=1.0, initial_guess=0.3
+    ):
+        """
+        batched get_black_caplet_iv (see utils.get_black_caplet_iv)
+        Note: returns NaN when the solver does not converge for this quote
+        """
+        return await self._submit(
+            "black_caplet_iv", (price, f, k, df, t, tau, N, initial_guess)
+        )
+
+    async def strip_vol_curve(self, cap_prices, zcb_curve, tenors):
+        """
+        strip a Vol_curve in the default executor (not batched, CPU bound)
+
+        Args:
+            cap_prices: list[float] => ATM cap prices
+            zcb_curve: list[float] => zcb prices
+            tenors: list[float] => tenors in years
+        Returns:
+            vols: dict => cap_black_vols, caplet_black_vols and caplet_normal_vols
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, _strip_vol_curve, cap_prices, zcb_curve, tenors
+        )
+
+    async def handle(self, request):
+        """
+        request/response entry point
+
+        Args:
+            request: dict => {"op": <OPERATIONS key>, <argument>: value, ...}
+        Returns:
+            response: dict => {"result": value} or {"error": message}
+        """
+        op = request.get("op")
+        if op not in OPERATIONS:
+            return {"error": f"unknown op {op!r}, must be in {list(OPERATIONS)}"}
+        names, defaults = OPERATIONS[op]
+        try:
+            args = [
+                request[name] if name in request else defaults[name] for name in names
+            ]
+        except KeyError as exc:
+            return {"error": f"missing argument {exc.args[0]!r} for op {op!r}"}
+        try:
+            return {"result": await getattr(self, op)(*args)}
+        except Exception as exc:
+            return {"error": f"{type(exc).__name__}: {exc}"}
+
+
+class Local_client:
+    """
+    In-process client speaking the service's request/response protocol (for tests and
+    for embedding the service without a transport).
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    async def request(self, request):
+        return await self.service.handle(request)
+
+    async def request_many(self, requests):
+        return await asyncio.gather(*(self.request(request) for request in requests))
@@ -0,0 +1,174 @@
+import functools
+
+import numpy as np
+from utils import _readonly_array
+
+__all__ = [
+    "DAY_COUNTS",
+    "Schedule",
+    "get_schedule",
+    "legacy_schedule",
+    "year_fractions",
+    "schedule_from_dates",
+]
+
+DAY_COUNTS = ["ACT/360", "ACT/365", "30/360"]
+
+
+class Schedule:
+    """
+    Caplet schedule as read-only arrays (one entry per caplet period):
+        reset_times   => time to the reset (fixing) date in years, the option expiry
+        payment_times => time to the payment date in years
+        accruals      => accrual (day count) fraction of the period
+    Instances are shared through get_schedule(), treat them as immutable.
+    """
+
+    __slots__ = ("reset_times", "payment_times", "accruals")
+
+    def __init__(self, reset_times, payment_times, accruals):
+        """
+        Class constructor (prefer get_schedule, which caches)
+
+        Args:
+            reset_times: list[float] => reset times in years
+            payment_times: list[float] => payment times in years
+            accruals: list[float] => accrual fractions
+        Returns:
+            Schedule object
+        """
+        assert len(reset_times) == len(payment_times) and len(payment_times) == len(
+            accruals
+        ), "len(reset_times), len(payment_times) and len(accruals) must be equal"
+        self.reset_times = _readonly_array(reset_times)
+        self.payment_times = _readonly_array(payment_times)
+        self.accruals = _readonly_array(accruals)
+        assert (
+            self.payment_times > self.reset_times
+        ).all(), "payment must be after reset"
+        assert (self.accruals > 0.0).all(), "accruals must be positive"
+
+    def __len__(self):
+        return len(self.accruals)
+
+    def __repr__(self):
+        return f"Schedule(periods={len(self)}, last_payment={self.payment_times[-1]:g})"
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_schedule(reset_times, payment_times, accruals):
+    return Schedule(reset_times, payment_times, accruals)
+
+
+def get_schedule(reset_times, payment_times, accruals=None):
+    """
+    cached Schedule for an instrument definition
+    Note: identical inputs return the same Schedule object, so a schedule is built once per
+          instrument definition rather than on every strip
+
+    Args:
+        reset_times: list[float] => reset times in years
+        payment_times: list[float] => payment times in years
+        accruals: list[float] => accrual fractions (default None => payment - reset times)
+    Returns:
+        schedule: Schedule
+    """
+    reset_times = tuple(map(float, reset_times))
+    payment_times = tuple(map(float, payment_times))
+    if accruals is None:
+        accruals = tuple(p - r for r, p in zip(reset_times, payment_times))
+    return _cached_schedule(reset_times, payment_times, tuple(map(float, accruals)))
+
+
+def legacy_schedule(tenors):
+    """
+    the quarterly schedule Vol_curve has always assumed: caplet i resets at tenors[i],
+    pays at tenors[i + 1] and accrues 0.25
+
+    Args:
+        tenors: list[float] => tenors in years
+    Returns:
+        schedule: Schedule
+    """
+    return get_schedule(tenors[:-1], tenors[1:], [0.25] * (len(tenors) - 1))
+
+
+def year_fractions(start_dates, end_dates, day_count="ACT/360"):
+    """
+    vectorized day count fractions
+
+    Args:
+        start_dates: array-like of np.datetime64 or date strings => period start dates
+        end_dates: array-like of np.datetime64 or date strings => period end dates
+        day_count: str => "ACT/360", "ACT/365" or "30/360" (default 'ACT/360')
+    Returns:
+        fractions: (np.ndarray) => year fractions
+    """
+    assert day_count in DAY_COUNTS, f"day_count must be in {DAY_COUNTS}"
+    start_dates = np.asarray(start_dates, dtype="datetime64[D]")
+    end_dates = np.asarray(end_dates, dtype="datetime64[D]")
+    if day_count == "ACT/360":
+        return (end_dates - start_dates).astype(np.float64) / 360.0
+    if day_count == "ACT/365":
+        return (end_dates - start_dates).astype(np.float64) / 365.0
+
+    # 30/360 (bond basis)
+    def _split(dates):
+        years = dates.astype("datetime64[Y]")
+        months = dates.astype("datetime64[M]")
+        y = years.astype(np.int64) + 1970
+        m = (months - years).astype(np.int64) + 1
+        d = (dates - months).astype(np.int64) + 1
+        return y, m, d
+
+    y1, m1, d1 = _split(start_dates)
+    y2, m2, d2 = _split(end_dates)
+    d1 = np.minimum(d1, 30)
+    d2 = np.where((d2 == 31) & (d1 == 30), 30, d2)
+    return (360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)) / 360.0
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_date_schedule(
+    valuation_date, start_dates, end_dates, day_count, time_day_count, fixing_lag_days
+):
+    start = np.asarray(start_dates, dtype="datetime64[D]")
+    end = np.asarray(end_dates, dtype="datetime64[D]")
+    fixing = start - np.timedelta64(fixing_lag_days, "D")
+    valuation = np.full(len(start), np.datetime64(valuation_date, "D"))
+    return Schedule(
+        year_fractions(valuation, fixing, time_day_count),
+        year_fractions(valuation, end, time_day_count),
+        year_fractions(start, end, day_count),
+    )
+
+
+def schedule_from_dates(
+    valuation_date,
+    start_dates,
+    end_dates,
+    day_count="ACT/360",
+    time_day_count="ACT/365",
+    fixing_lag_days=0,
+):
+    """
+    cached Schedule from accrual period dates (stubs and any frequency are allowed)
+
+    Args:
+        valuation_date: np.datetime64 or str => valuation date
+        start_dates: list of np.datetime64 or str => accrual start dates
+        end_dates: list of np.datetime64 or str => accrual end (payment) dates
+        day_count: str => accrual day count (default 'ACT/360')
+        time_day_count: str => day count of the reset/payment times (default 'ACT/365')
+        fixing_lag_days: int => calendar days between fixing and accrual start (default 0)
+    Returns:
+        schedule: Schedule
+    """
+    return _cached_date_schedule(
+        str(np.datetime64(valuation_date, "D")),
+        tuple(str(np.datetime64(d, "D")) for d in start_dates),
+        tuple(str(np.datetime64(d, "D")) for d in end_dates),
+        day_count,
+        time_day_count,
+        int(fixing_lag_days),
+    )
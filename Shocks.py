@@ -0,0 +1,260 @@
+"""
+Scenario shocks on zero rates with incremental revaluation
+
+A shock set is a (shocks, tenors) array of absolute zero-rate shifts (continuously
+compounded, 0.0001 = 1bp) at the curve tenors, applied as P(T) * exp(-shift * T). Only what
+a shock can change is recomputed, per shock: forwards of the periods touching its shocked
+tenors, annuities and swap rates from its first shocked period on, and caplet vols from its
+first affected cap on (the earlier caplets are copied from the base strip). A parallel shock
+in the batch does not make the bucket shocks recompute everything.
+
+    shocks = np.vstack([parallel_shocks(tenors, [-0.01, 0.01]), bucket_shocks(tenors)])
+    scenarios = Shocked_curve(multi_curve, shocks)
+    result = value_portfolio(trades, {"USD": scenarios})   # (shocks, trades) PVs
+"""
+
+import numpy as np
+from Curves import Vol_curve
+from Precision import storage_dtype
+from Schedules import legacy_schedule
+
+__all__ = [
+    "parallel_shocks",
+    "twist_shocks",
+    "bucket_shocks",
+    "shock_zcb_curves",
+    "first_affected_indices",
+    "Shocked_curve",
+    "restrip_vol_curves",
+]
+
+
+def _readonly(values, dtype=np.float64):
+    # read-only array of any shape (utils._readonly_array is 1d float64 only)
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+def parallel_shocks(tenors, sizes):
+    """
+    parallel zero-rate shifts
+
+    Args:
+        tenors: list[float] => curve tenors in years
+        sizes: list[float] => one shift per shock
+    Returns:
+        shocks: (np.ndarray) => (len(sizes), len(tenors))
+    """
+    return np.repeat(np.asarray(sizes, dtype=np.float64)[:, None], len(tenors), axis=1)
+
+
+def twist_shocks(tenors, short_sizes, long_sizes):
+    """
+    shifts linear in the tenor, from short_sizes at tenors[0] to long_sizes at tenors[-1]
+
+    Args:
+        tenors: list[float] => curve tenors in years
+        short_sizes: list[float] => shift at the first tenor, one per shock
+        long_sizes: list[float] => shift at the last tenor, one per shock
+    Returns:
+        shocks: (np.ndarray) => (len(short_sizes), len(tenors))
+    """
+    tenors = np.asarray(tenors, dtype=np.float64)
+    weight = (tenors - tenors[0]) / (tenors[-1] - tenors[0])
+    short_sizes = np.asarray(short_sizes, dtype=np.float64)[:, None]
+    long_sizes = np.asarray(long_sizes, dtype=np.float64)[:, None]
+    return short_sizes + (long_sizes - short_sizes) * weight
+
+
+def bucket_shocks(tenors, size=0.0001):
+    """
+    key-rate shocks: one shock per tenor, shifting that tenor only
+
+    Args:
+        tenors: list[float] => curve tenors in years
+        size: float => shift size (default 0.0001)
+    Returns:
+        shocks: (np.ndarray) => (len(tenors), len(tenors))
+    """
+    return size * np.eye(len(tenors))
+
+
+def shock_zcb_curves(zcb_curve, tenors, shocks):
+    """
+    shocked zcb curves, P(T) * exp(-shift * T)
+
+    Args:
+        zcb_curve: list[float] => base zcb curve @ tenors
+        tenors: list[float] => tenors in years
+        shocks: np.ndarray => (shocks, tenors) zero-rate shifts
+    Returns:
+        zcb_curves: (np.ndarray) => (shocks, tenors)
+    """
+    return np.asarray(zcb_curve, dtype=np.float64) * np.exp(
+        -np.atleast_2d(shocks) * np.asarray(tenors, dtype=np.float64)
+    )
+
+
+def first_affected_indices(shocks):
+    """
+    first shocked tenor per shock
+
+    Args:
+        shocks: np.ndarray => (shocks, tenors) zero-rate shifts
+    Returns:
+        indices: (np.ndarray) => first tenor index with a non-zero shift (len(tenors) if none)
+    """
+    shocked = np.atleast_2d(shocks) != 0.0
+    return np.where(shocked.any(axis=1), np.argmax(shocked, axis=1), shocked.shape[1])
+
+
+class Shocked_curve:
+    """
+    A Multi_curve under a set of shocks, applied to the discount and all projection curves.
+    cap_inputs() has the Multi_curve layout with a leading shock axis, so
+    Portfolio.value_portfolio values every trade under every shock in the same calls.
+    """
+
+    def __init__(self, base, shocks):
+        """
+        Class constructor
+
+        Args:
+            base: Multi_curve => unshocked curves
+            shocks: np.ndarray => (shocks, len(base.tenors)) zero-rate shifts at base.tenors
+        Returns:
+            Shocked_curve object
+        """
+        shocks = np.atleast_2d(np.asarray(shocks, dtype=np.float64))
+        assert shocks.shape[1] == len(
+            base.tenors
+        ), "shocks must have one column per tenor"
+        self.base = base
+        self.shocks = _readonly(shocks)
+        self.schedule = base.schedule
+        # scenario arrays in the Precision storage dtype, running sums in float64
+        dtype = storage_dtype()
+        accruals = base.schedule.accruals
+        factors = np.exp(-shocks * base.tenors)
+
+        # per shock, the periods touching a shocked tenor (period i uses tenors i and i + 1);
+        # annuities and swap rates change from the first of them on, so shocks are grouped by
+        # that period and each group only recomputes its own tail
+        shocked = shocks != 0.0
+        affected = shocked[:, :-1] | shocked[:, 1:]
+        rows, periods = np.nonzero(affected)
+        firsts = np.where(
+            affected.any(axis=1), np.argmax(affected, axis=1), len(accruals)
+        )
+        groups = [
+            (first, np.flatnonzero(firsts == first))
+            for first in np.unique(firsts)
+            if first < len(accruals)
+        ]
+
+        self.discount_factors = _readonly(base.discount_factors * factors, dtype)
+        discount_factors = self.discount_factors[:, 1:]
+        annuities = np.repeat(base.annuities[None, :], len(shocks), axis=0)
+        for first, group in groups:
+            previous = base.annuities[first - 1] if first > 0 else 0.0
+            annuities[group, first:] = previous + np.cumsum(
+                accruals[first:] * discount_factors[group, first:],
+                axis=1,
+                dtype=np.float64,
+            )
+        self.annuities = _readonly(annuities, dtype)
+
+        self.forwards = {}
+        self.forward_swap_rates = {}
+        for name, projection in base.projection_factors.items():
+            forwards = np.repeat(base.forwards[name][None, :], len(shocks), axis=0)
+            forwards[rows, periods] = (
+                (projection[periods] * factors[rows, periods])
+                / (projection[periods + 1] * factors[rows, periods + 1])
+                - 1.0
+            ) / accruals[periods]
+            swap_rates = np.repeat(
+                base.forward_swap_rates[name][None, :], len(shocks), axis=0
+            )
+            base_floating = np.cumsum(
+                accruals * base.discount_factors[1:] * base.forwards[name]
+            )
+            for first, group in groups:
+                previous = base_floating[first - 1] if first > 0 else 0.0
+                floating = previous + np.cumsum(
+                    accruals[first:]
+                    * discount_factors[group, first:]
+                    * forwards[group, first:],
+                    axis=1,
+                    dtype=np.float64,
+                )
+                swap_rates[group, first:] = floating / annuities[group, first:]
+            self.forwards[name] = _readonly(forwards, dtype)
+            self.forward_swap_rates[name] = _readonly(swap_rates, dtype)
+
+    def __len__(self):
+        return len(self.shocks)
+
+    def cap_inputs(self, projection, n_periods=None):
+        """
+        inputs of utils.black_cap_price per shock, see Multi_curve.cap_inputs
+
+        Args:
+            projection: str => projection curve name
+            n_periods: int => number of caplets (default None => all periods)
+        Returns:
+            inputs: dict => forward_curve and zcb_prices (shocks, n_periods), time_to_reset_date
+                    and taus (n_periods,)
+        """
+        n_periods = len(self.schedule) if n_periods is None else n_periods
+        return {
+            "forward_curve": self.forwards[projection][:, :n_periods],
+            "zcb_prices": self.discount_factors[:, 1 : n_periods + 1],
+            "time_to_reset_date": self.schedule.reset_times[:n_periods],
+            "taus": self.schedule.accruals[:n_periods],
+        }
+
+
+def restrip_vol_curves(base, shocks, failure_policy="raise"):
+    """
+    re-strip a Vol_curve under zcb shocks (cap prices unchanged), from the first affected cap
+    on: a shift at tenor j changes the forwards, swap rates and discount factors of caps j - 1
+    onwards, the caplets before are copied from base
+
+    Args:
+        base: Vol_curve => stripped unshocked curve
+        shocks: np.ndarray => (shocks, len(base.tenors)) zero-rate shifts at base.tenors
+        failure_policy: str => see Vol_curve.generate_caplet_vol_term_structure (default 'raise')
+    Returns:
+        vol_curves: generator => one stripped Vol_curve per shock
+    """
+    shocks = np.atleast_2d(shocks)
+    assert shocks.shape[1] == len(base.tenors), "shocks must have one column per tenor"
+    single_curve = base.discount_curve is base.zcb_curve
+    # an explicit schedule changes how Vol_curve accrues the forwards, keep the base's choice
+    schedule = None if base.schedule is legacy_schedule(base.tenors) else base.schedule
+    zcb_curves = shock_zcb_curves(base.zcb_curve, base.tenors, shocks)
+    if not single_curve:
+        discount_curves = shock_zcb_curves(base.discount_curve, base.tenors, shocks)
+    n_caps = len(base.cap_price_curve)
+    start_indices = np.minimum(
+        np.maximum(first_affected_indices(shocks) - 1, 0), n_caps
+    )
+
+    for row, start_index in enumerate(start_indices):
+        vol_curve = Vol_curve(
+            base.cap_price_curve,
+            zcb_curves[row].tolist(),
+            base.tenors,
+            base.interp_method,
+            schedule=schedule,
+            discount_curve=None if single_curve else discount_curves[row].tolist(),
+        )
+        vol_curve.generate_caplet_vol_term_structure(
+            warm_start=base,
+            failure_policy=failure_policy,
+            base=base,
+            start_index=int(start_index),
+        )
+        yield vol_curve
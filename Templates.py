@@ -1,18 +1,84 @@
 from abc import abstractmethod
 
+__all__ = ["Model", "Curve", "Price_curve"]
+
 
 class Model:
     def __init__(self):
         pass
 
     @abstractmethod
-    def get_zcb_mse(self):
+    def model_zcb_prices(self, tenors):
+        # model zcb prices P(0, T) @ tenors, any array shape
         raise NotImplementedError
 
     @abstractmethod
-    def get_caplet_mse(self):
+    def model_caplet_prices(self, reset_times, payment_times, strikes, taus):
+        # model caplet prices (unit notional), all arguments of the same shape
         raise NotImplementedError
 
+    def get_zcb_errors(
+        self, tenors, zcb_curves, weights=None, relative=False, metric="mse"
+    ):
+        """
+        model vs market zcb pricing errors, all dates in one pass (see Pricing_errors)
+
+        Args:
+            tenors: np.ndarray => (..., tenors) tenors in years
+            zcb_curves: np.ndarray => (..., tenors) market zcb prices, NaN if missing
+            weights: np.ndarray => weights broadcastable to zcb_curves (default None => equal)
+            relative: bool => relative errors (default False)
+            metric: str => "mse", "rmse", "mae" or "max" (default 'mse')
+        Returns:
+            errors: dict => "residuals", "metric" (per date) and "total"
+        """
+        from Pricing_errors import pricing_errors
+
+        return pricing_errors(
+            self.model_zcb_prices(tenors), zcb_curves, weights, relative, metric
+        )
+
+    def get_zcb_mse(self, tenors, zcb_curves, weights=None, relative=False):
+        """
+        weighted mean squared zcb pricing error over all tenors and dates
+
+        Args:
+            see get_zcb_errors
+        Returns:
+            mse: float
+        """
+        return self.get_zcb_errors(tenors, zcb_curves, weights, relative)["total"]
+
+    def get_caplet_errors(self, vol_curves, weights=None, relative=False, metric="mse"):
+        """
+        model vs market ATM caplet pricing errors of stripped vol curves, all dates in one pass
+        (see Pricing_errors.caplet_market_inputs)
+
+        Args:
+            vol_curves: list[Vol_curve] => stripped vol curves, one per date
+            weights: np.ndarray => weights broadcastable to (dates, caplets) (default None => equal)
+            relative: bool => relative errors (default False)
+            metric: str => "mse", "rmse", "mae" or "max" (default 'mse')
+        Returns:
+            errors: dict => "residuals" (dates, caplets), "metric" (per date) and "total"
+        """
+        from Pricing_errors import caplet_market_inputs, pricing_errors
+
+        market = caplet_market_inputs(vol_curves)
+        model_prices = self.model_caplet_prices(*market["instruments"])
+        return pricing_errors(model_prices, market["prices"], weights, relative, metric)
+
+    def get_caplet_mse(self, vol_curves, weights=None, relative=False):
+        """
+        weighted mean squared caplet pricing error over all caplets and dates
+
+        Args:
+            see get_caplet_errors
+        Returns:
+            mse: float
+        """
+        return self.get_caplet_errors(vol_curves, weights, relative)["total"]
+
     @abstractmethod
     def calibrate_model(self):
         raise NotImplementedError
@@ -32,6 +98,8 @@ class Model:
 
 class Curve:
     # For interest rate and volatility curves
+    __slots__ = ()  # lets __slots__ subclasses stay free of an instance __dict__
+
     def __init__(self):
         pass
 
@@ -0,0 +1,60 @@
+"""
+Import-time benchmark
+
+Measures the cold import time of each module in a fresh interpreter and reports
+whether SciPy was pulled in by the import. Run with:
+
+    python bench_import.py [--repeat 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+MODULES = ["numpy", "Templates", "utils", "Curves"]
+
+_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+print(t1 - t0, int(any(m == "scipy" or m.startswith("scipy.") for m in sys.modules)))
+"""
+
+
+def time_import(module, repeat=5):
+    """
+    time a cold import of module in fresh interpreters
+
+    Args:
+        module: (str) => module name
+        repeat: (int) => number of fresh interpreters (default 5)
+    Returns:
+        (best_seconds, scipy_loaded): (float, bool)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    scipy_loaded = False
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=here,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        timings.append(float(out[0]))
+        scipy_loaded = scipy_loaded or out[1] == "1"
+    return min(timings), scipy_loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<12}{'best [ms]':>12}{'scipy loaded':>16}")
+    for module in MODULES:
+        best, scipy_loaded = time_import(module, args.repeat)
+        print(f"{module:<12}{best * 1e3:>12.2f}{str(scipy_loaded):>16}")
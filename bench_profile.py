@@ -0,0 +1,398 @@
+"""
+End-to-end profiling harness
+
+Runs a production-shaped workload stage by stage: build Zcb_curves and interpolate them on
+a payment grid, strip a Vol_curve per curve, then value a book of caps and swaptions. Per
+stage it reports the wall time, the tracemalloc peak, the net allocated blocks and their
+top allocation sites, a cProfile dump, and sampled stacks in the folded format that
+flamegraph.pl, inferno and speedscope read. An unprofiled warm-up on a tiny market runs
+first, so the lazy SciPy imports are reported on their own, not charged to the first
+stage. Run with:
+
+    python bench_profile.py --scenario desk --output profile_out
+    flamegraph.pl profile_out/stacks.folded > flamegraph.svg
+
+Profiling slows the stages down; compare timings only between runs with the same options.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+from Curves import Array_zcb_curve, Vol_curve, Zcb_curve
+from Multi_curve import Multi_curve
+from Portfolio import Trade_table, value_portfolio
+from utils import black_cap_price
+
+SCENARIOS = {
+    "smoke": {"n_curves": 2, "n_tenors": 20, "n_caps": 50, "n_swaptions": 50},
+    "desk": {"n_curves": 20, "n_tenors": 40, "n_caps": 5000, "n_swaptions": 5000},
+    "production": {
+        "n_curves": 200,
+        "n_tenors": 40,
+        "n_caps": 100000,
+        "n_swaptions": 100000,
+    },
+}
+STAGES = ["build_zcb_curves", "strip_vol_curves", "value_portfolio"]
+
+
+def synthetic_market(n_curves, n_tenors, seed=0):
+    """
+    random but strippable markets: upward sloping zero curves and ATM cap prices from a
+    humped cap vol term structure
+
+    Args:
+        n_curves: int => number of curves
+        n_tenors: int => quarterly tenors per curve (0.25 .. n_tenors / 4)
+        seed: int => random seed (default 0)
+    Returns:
+        markets: list[tuple] => (tenors, zcb_curve, cap_prices) per curve
+    """
+    rng = np.random.default_rng(seed)
+    tenors = 0.25 * np.arange(1, n_tenors + 1)
+    markets = []
+    for _ in range(n_curves):
+        level, slope, vol = rng.uniform([0.01, 0.005, 0.15], [0.04, 0.02, 0.35])
+        zero_rates = level + slope * (1.0 - np.exp(-tenors / 2.0))
+        zcb_curve = np.exp(-zero_rates * tenors).tolist()
+        cap_vols = vol * (1.0 + 0.3 * tenors * np.exp(-tenors / 1.5))
+        # forwards and ATM strikes on the same conventions as the strip
+        curve = Vol_curve(
+            [0.0] * (n_tenors - 1), zcb_curve, tenors.tolist(), "piecewise constant"
+        )
+        cap_prices = [
+            black_cap_price(
+                curve.forward_curve[1 : ind + 2],
+                curve.forward_swap_curve[ind + 1],
+                cap_vols[ind],
+                curve.discount_curve[1 : ind + 2],
+                curve.schedule.reset_times[: ind + 1],
+                curve.schedule.accruals[: ind + 1],
+            )
+            for ind in range(n_tenors - 1)
+        ]
+        markets.append((tenors.tolist(), zcb_curve, cap_prices))
+    return markets
+
+
+def synthetic_book(n_caps, n_swaptions, n_curves, n_periods, seed=0):
+    """
+    random caps and swaptions spread over the curves (index "3M")
+
+    Args:
+        n_caps: int => number of caps
+        n_swaptions: int => number of swaptions
+        n_curves: int => number of curves, keys "curve0" .. "curve{n_curves - 1}"
+        n_periods: int => periods per curve
+        seed: int => random seed (default 0)
+    Returns:
+        trades: Trade_table
+    """
+    rng = np.random.default_rng(seed)
+    n = n_caps + n_swaptions
+    start = rng.integers(0, n_periods - 1, n)
+    return Trade_table(
+        kind=["cap"] * n_caps + ["swaption"] * n_swaptions,
+        curve=[f"curve{i}" for i in rng.integers(0, n_curves, n)],
+        index="3M",
+        start=start,
+        end=rng.integers(start + 1, n_periods + 1),
+        strike=rng.uniform(0.01, 0.05, n),
+        vol=rng.uniform(0.15, 0.4, n),
+        vol_type="black",
+        payer=rng.random(n) < 0.5,
+    )
+
+
+class Stack_sampler:
+    """
+    Sampling profiler of one thread: a daemon thread records the thread's Python stack every
+    interval seconds, prefixed with the current stage, as folded stacks
+    ("stage;file:function;...;file:function count").
+    """
+
+    def __init__(self, thread_id=None, interval=0.001):
+        """
+        Class constructor
+
+        Args:
+            thread_id: int => thread to sample (default None => the calling thread)
+            interval: float => seconds between samples (default 0.001)
+        Returns:
+            Stack_sampler object
+        """
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.stage = "idle"
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.stage == "idle":
+                continue  # harness bookkeeping between stages
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(self.stage)
+            self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        """
+        collected samples in the folded stack format
+
+        Args:
+            -
+        Returns:
+            lines: list[str] => "frame;frame;... count", most sampled first
+        """
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+
+def profile_stage(name, function, profile=True, memory=True, sampler=None):
+    """
+    run function() as one profiled stage
+
+    Args:
+        name: str => stage name
+        function: callable => stage body, no arguments
+        profile: bool => collect a cProfile profile (default True)
+        memory: bool => collect tracemalloc statistics, tracemalloc must be tracing (default True)
+        sampler: Stack_sampler => sampler to label with the stage name (default None)
+    Returns:
+        (result, stats): (any, dict) => function() and the stage statistics, with the
+                         pstats.Stats under "profile" when profile is True
+    """
+    if memory:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        start_memory = tracemalloc.get_traced_memory()[0]
+    profiler = cProfile.Profile() if profile else None
+    if sampler is not None:
+        sampler.stage = name
+
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = function()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+        if sampler is not None:
+            sampler.stage = "idle"
+
+    stats = {"stage": name, "seconds": seconds}
+    if memory:
+        stats["peak_bytes"] = tracemalloc.get_traced_memory()[1] - start_memory
+        differences = tracemalloc.take_snapshot().compare_to(before, "lineno")
+        stats["allocated_blocks"] = sum(
+            d.count_diff for d in differences if d.count_diff > 0
+        )
+        stats["top_allocations"] = [
+            {"site": str(d.traceback), "bytes": d.size_diff, "blocks": d.count_diff}
+            for d in differences[:5]
+        ]
+    if profiler is not None:
+        stats["profile"] = pstats.Stats(profiler)
+    return result, stats
+
+
+def _stages(markets, trades, interp_method, payment_grid):
+    # the stage bodies, in STAGES order
+    def build_zcb_curves():
+        curves = [Zcb_curve(zcb, tenors, interp_method) for tenors, zcb, _ in markets]
+        for curve in curves:
+            curve.interp(payment_grid)
+        return curves
+
+    def strip_vol_curves():
+        vol_curves = []
+        for tenors, zcb, cap_prices in markets:
+            vol_curve = Vol_curve(cap_prices, zcb, tenors, "piecewise constant")
+            vol_curve.generate_caplet_vol_term_structure()
+            vol_curves.append(vol_curve)
+        return vol_curves
+
+    def value_book():
+        curves = {}
+        for i, (tenors, zcb, _) in enumerate(markets):
+            curve = Array_zcb_curve(zcb, tenors)
+            curves[f"curve{i}"] = Multi_curve(curve, {"3M": curve}, tenors)
+        return value_portfolio(trades, curves)
+
+    return build_zcb_curves, strip_vol_curves, value_book
+
+
+def warm_up(interp_method="cubic spline", seed=0):
+    """
+    run every stage once on a tiny market, unprofiled, so the lazy SciPy imports and other
+    first-call costs are not attributed to the first stage; the tiny grids do not share
+    any cached schedules or query plans with the real workload
+
+    Args:
+        interp_method: str => interp_method of the Zcb_curves (default 'cubic spline')
+        seed: int => random seed (default 0)
+    Returns:
+        seconds: float => wall time of the warm-up
+    """
+    start = time.perf_counter()
+    markets = synthetic_market(1, 3, seed)
+    trades = synthetic_book(1, 1, 1, 2, seed)
+    for function in _stages(markets, trades, interp_method, np.array([0.3, 0.6])):
+        function()
+    return time.perf_counter() - start
+
+
+def run_scenario(config, profile=True, memory=True, sample_interval=0.001, seed=0):
+    """
+    run the three workload stages, after an unprofiled warm_up()
+
+    Args:
+        config: dict => "n_curves", "n_tenors", "n_caps", "n_swaptions" (see SCENARIOS), and
+                optionally "interp_method" of the Zcb_curves (default 'cubic spline')
+        profile: bool => cProfile every stage (default True)
+        memory: bool => trace allocations (default True)
+        sample_interval: float => seconds between stack samples, None to disable (default 0.001)
+        seed: int => random seed of the market and the book (default 0)
+    Returns:
+        report: dict => "config", "warm_up_seconds", "stages" (one stats dict per stage, see
+                profile_stage) and "folded" (folded stack lines, empty without sampling)
+    """
+    markets = synthetic_market(config["n_curves"], config["n_tenors"], seed)
+    trades = synthetic_book(
+        config["n_caps"],
+        config["n_swaptions"],
+        config["n_curves"],
+        config["n_tenors"] - 1,
+        seed,
+    )
+    interp_method = config.get("interp_method", "cubic spline")
+    payment_grid = np.linspace(0.25, 0.25 * config["n_tenors"], 4 * config["n_tenors"])
+    functions = _stages(markets, trades, interp_method, payment_grid)
+    warm_up_seconds = warm_up(interp_method, seed)
+
+    sampler = None
+    if sample_interval is not None:
+        sampler = Stack_sampler(interval=sample_interval)
+        sampler.start()
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    stages = []
+    try:
+        for name, function in zip(STAGES, functions):
+            stages.append(profile_stage(name, function, profile, memory, sampler)[1])
+    finally:
+        if tracing:
+            tracemalloc.stop()
+        if sampler is not None:
+            sampler.stop()
+    return {
+        "config": dict(config),
+        "warm_up_seconds": warm_up_seconds,
+        "stages": stages,
+        "folded": [] if sampler is None else sampler.folded(),
+    }
+
+
+def write_report(report, output):
+    """
+    write report.json, <stage>.pstats (cProfile dumps, e.g. for snakeviz) and stacks.folded
+
+    Args:
+        report: dict => from run_scenario
+        output: str => output directory (created if missing)
+    Returns:
+        -
+    """
+    os.makedirs(output, exist_ok=True)
+    summary = {
+        "config": report["config"],
+        "warm_up_seconds": report["warm_up_seconds"],
+        "stages": [],
+    }
+    for stats in report["stages"]:
+        stats = dict(stats)
+        profile = stats.pop("profile", None)
+        if profile is not None:
+            profile.dump_stats(os.path.join(output, f"{stats['stage']}.pstats"))
+        summary["stages"].append(stats)
+    with open(os.path.join(output, "report.json"), "w") as file:
+        json.dump(summary, file, indent=2)
+    with open(os.path.join(output, "stacks.folded"), "w") as file:
+        file.writelines(line + "\n" for line in report["folded"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="smoke")
+    parser.add_argument("--n-curves", type=int)
+    parser.add_argument("--n-caps", type=int)
+    parser.add_argument("--n-swaptions", type=int)
+    parser.add_argument(
+        "--interp-method", choices=["linear", "cubic spline"], default="cubic spline"
+    )
+    parser.add_argument("--output", default="profile_out")
+    parser.add_argument("--no-cprofile", action="store_true")
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument(
+        "--sample-interval", type=float, default=0.001, help="0 disables sampling"
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="cProfile rows printed per stage"
+    )
+    args = parser.parse_args()
+
+    config = dict(SCENARIOS[args.scenario], interp_method=args.interp_method)
+    for name in ["n_curves", "n_caps", "n_swaptions"]:
+        if getattr(args, name) is not None:
+            config[name] = getattr(args, name)
+    report = run_scenario(
+        config,
+        profile=not args.no_cprofile,
+        memory=not args.no_memory,
+        sample_interval=args.sample_interval or None,
+    )
+    write_report(report, args.output)
+
+    print(
+        f"warm-up (imports, first calls, not profiled): {report['warm_up_seconds']:.3f}s"
+    )
+    print(f"{'stage':<20}{'seconds':>10}{'peak [MB]':>12}{'blocks':>10}")
+    for stats in report["stages"]:
+        peak = stats.get("peak_bytes", float("nan")) / 2**20
+        print(
+            f"{stats['stage']:<20}{stats['seconds']:>10.3f}{peak:>12.2f}"
+            f"{stats.get('allocated_blocks', 0):>10}"
+        )
+    for stats in report["stages"]:
+        if "profile" in stats:
+            print(f"\n== {stats['stage']} ==")
+            stats["profile"].sort_stats("cumulative").print_stats(args.top)
+    print(f"reports written to {args.output}/")
@@ -0,0 +1,62 @@
+from Curves import Vol_curve
+
+CAP_PRICES = [
+    0.000476999,
+    0.001218952,
+    0.001989746,
+    0.002982203,
+    0.004110025,
+    0.00539507,
+    0.006859078,
+    0.008234175,
+    0.009697875,
+    0.011272431,
+    0.012940934,
+    0.014564239,
+    0.016245701,
+    0.017994826,
+    0.019795692,
+    0.021591312,
+    0.02340779,
+    0.025289734,
+    0.027202241,
+]
+
+TENORS = [0.25 * (i + 1) for i in range(20)]
+
+ZCB_CURVE = [
+    0.988412022,
+    0.978829041,
+    0.9708342,
+    0.963157821,
+    0.955975519,
+    0.9489389,
+    0.94188292,
+    0.934884149,
+    0.927855883,
+    0.920949452,
+    0.913943255,
+    0.906990357,
+    0.900043085,
+    0.893140513,
+    0.886216191,
+    0.879345551,
+    0.872459024,
+    0.865692769,
+    0.858830977,
+    0.852023574,
+]
+
+
+def stripped_vol_curve():
+    """
+    strip the sample cap prices into a piecewise constant Vol_curve
+
+    Returns:
+        vol_curve: (Vol_curve) => stripped vol curve
+    """
+    vol_curve = Vol_curve(
+        CAP_PRICES, ZCB_CURVE, TENORS, interp_method="piecewise constant"
+    )
+    vol_curve.generate_caplet_vol_term_structure()
+    return vol_curve
@@ -2,6 +2,18 @@ from utils import *
 import numpy as np
 
 
+def test_norm_cdf_pdf():
+    from scipy.stats import norm
+
+    x = np.linspace(-10.0, 10.0, 2001)
+
+    assert np.max(np.abs(norm_cdf(x) - norm.cdf(x))) <= 1e-15
+    assert np.max(np.abs(norm_pdf(x) - norm.pdf(x))) <= 1e-15
+    for value in [-7.5, -1.0, 0.0, 0.3, 4.2]:
+        assert abs(norm_cdf(value) - norm.cdf(value)) <= 1e-15
+        assert abs(norm_pdf(value) - norm.pdf(value)) <= 1e-15
+
+
 def test_black_caplet_price():
     PRECISION = 7
 
@@ -384,3 +396,168 @@ def test_zcb_curve_to_forward_swap_curve():
         assert (np.isnan(result[i]) and np.isnan(answer[i])) or result[i] == answer[
             i
         ], f"value should be {answer} but got {result}"
+
+
+def test_import_does_not_load_scipy():
+    import os
+    import subprocess
+    import sys
+
+    probe = (
+        "import sys, utils, Curves; "
+        "print(any(m.split('.')[0] == 'scipy' for m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "False", "importing utils/Curves loaded scipy"
+
+
+def test_get_black_caplet_iv_nan_on_failure():
+    diagnostics = []
+
+    # price above the caplet's upper bound df * tau * f => no implied vol exists
+    result = get_black_caplet_iv(
+        0.01, 0.03, 0.0335, 0.95, 1.0, on_failure="nan", diagnostics=diagnostics
+    )
+
+    assert np.isnan(result)
+    assert len(diagnostics) == 1 and diagnostics[0]["solver"] == "get_black_caplet_iv"
+
+    diagnostics = []
+    result = get_black_caplet_iv(
+        np.array([0.01, 0.000553777]),
+        0.0300522,
+        0.03353653,
+        0.955975519,
+        1.0,
+        initial_guess=np.array([0.3, 0.3]),
+        on_failure="nan",
+        diagnostics=diagnostics,
+    )
+
+    assert np.isnan(result[0]) and np.around(result[1], 5) == 0.30169
+    assert [d["index"] for d in diagnostics] == [0]
+
+
+def test_black_cap_vega_and_safeguarded_iv():
+    forward_curve = [0.0300522, 0.0310428, 0.0318835, 0.0326233]
+    zcb_prices = [0.9925, 0.9848, 0.9770, 0.9691]
+    time_to_reset_date = [0.25, 0.5, 0.75, 1.0]
+    k = 0.031
+
+    price = black_cap_price(forward_curve, k, 0.3, zcb_prices, time_to_reset_date, 0.25)
+    bump = 1e-6
+    finite_difference = (
+        black_cap_price(
+            forward_curve, k, 0.3 + bump, zcb_prices, time_to_reset_date, 0.25
+        )
+        - black_cap_price(
+            forward_curve, k, 0.3 - bump, zcb_prices, time_to_reset_date, 0.25
+        )
+    ) / (2 * bump)
+    vega = black_cap_vega(forward_curve, k, 0.3, zcb_prices, time_to_reset_date, 0.25)
+    assert np.isclose(vega, finite_difference, rtol=1e-6)
+    assert np.isclose(
+        black_caplet_vega(0.0300522, k, 0.3, 0.9925, 0.25)
+        + black_caplet_vega(0.0310428, k, 0.3, 0.9848, 0.5)
+        + black_caplet_vega(0.0318835, k, 0.3, 0.9770, 0.75)
+        + black_caplet_vega(0.0326233, k, 0.3, 0.9691, 1.0),
+        vega,
+    )
+
+    # far-away initial guesses are pulled back into the bracket
+    for initial_guess in [0.01, 0.3, 5.0]:
+        iv = get_black_cap_iv(
+            price,
+            forward_curve,
+            k,
+            zcb_prices,
+            time_to_reset_date,
+            initial_guess=initial_guess,
+        )
+        assert np.around(iv, 10) == 0.3
+
+    diagnostics = []
+    iv = get_black_cap_iv(
+        1.0,
+        forward_curve,
+        k,
+        zcb_prices,
+        time_to_reset_date,
+        on_failure="nan",
+        diagnostics=diagnostics,
+    )
+    assert np.isnan(iv) and diagnostics[0]["solver"] == "get_black_cap_iv"
+
+
+def test_caplet_kernels_put_call_parity():
+    f = np.array([0.0300522, 0.0310428, 0.0318835, 0.0326233])
+    df = np.array([0.9925, 0.9848, 0.9770, 0.9691])
+    t = np.array([0.25, 0.5, 0.75, 1.0])
+    strikes = np.array([[0.02], [0.031], [0.045]])  # (strikes, caplets) in one pass
+
+    caplets, floorlets, digitals = black_caplet_kernel(f, strikes, 0.3, df, t)
+    assert np.array_equal(caplets, black_caplet_price(f, strikes, 0.3, df, t))
+    assert np.allclose(
+        caplets - floorlets, df * 0.25 * (f - strikes), rtol=0, atol=1e-15
+    )
+    bump = 1e-7
+    finite_difference = (
+        black_caplet_price(f, strikes - bump, 0.3, df, t)
+        - black_caplet_price(f, strikes + bump, 0.3, df, t)
+    ) / (2 * bump)
+    assert np.allclose(digitals, finite_difference, rtol=1e-6)
+
+    caplets, floorlets, digitals = normal_caplet_kernel(f, strikes, 0.008, df, t)
+    assert np.array_equal(caplets, normal_caplet_price(f, strikes, 0.008, df, t))
+    assert np.allclose(
+        caplets - floorlets, df * 0.25 * (f - strikes), rtol=0, atol=1e-15
+    )
+    assert np.allclose(digitals, normal_digital_caplet_price(f, strikes, 0.008, df, t))
+
+    # floors and collars sum the same kernel outputs
+    floor = black_floor_price(f, 0.031, 0.3, df, t, 0.25)
+    assert np.isclose(floor, np.sum(black_floorlet_price(f, 0.031, 0.3, df, t)))
+    cap = black_cap_price(f, 0.031, 0.3, df, t, 0.25)
+    assert np.isclose(cap - floor, np.sum(df * 0.25 * (f - 0.031)), rtol=1e-12)
+    collar = black_collar_price(f, 0.035, 0.025, 0.3, 0.35, df, t, 0.25)
+    assert np.isclose(
+        collar,
+        black_cap_price(f, 0.035, 0.3, df, t, 0.25)
+        - black_floor_price(f, 0.025, 0.35, df, t, 0.25),
+    )
+    collar = normal_collar_price(f, 0.031, 0.031, 0.008, 0.008, df, t, 0.25)
+    assert np.isclose(collar, np.sum(df * 0.25 * (f - 0.031)), rtol=1e-12)
+    assert np.isclose(
+        normal_cap_price(f, 0.031, 0.008, df, t, 0.25)
+        - normal_floor_price(f, 0.031, 0.008, df, t, 0.25),
+        collar,
+    )
+
+    # cap, floor and digital cap of one book from one kernel pass
+    for cap_floor_prices, cap_price, floor_price, digital_price, sigma in [
+        (
+            black_cap_floor_prices,
+            black_cap_price,
+            black_floor_price,
+            black_digital_caplet_price,
+            0.3,
+        ),
+        (
+            normal_cap_floor_prices,
+            normal_cap_price,
+            normal_floor_price,
+            normal_digital_caplet_price,
+            0.008,
+        ),
+    ]:
+        cap, floor, digital = cap_floor_prices(f, 0.031, sigma, df, t, 0.25)
+        assert cap == cap_price(f, 0.031, sigma, df, t, 0.25)
+        assert floor == floor_price(f, 0.031, sigma, df, t, 0.25)
+        assert np.isclose(digital, np.sum(digital_price(f, 0.031, sigma, df, t)))
@@ -0,0 +1,31 @@
+import numpy as np
+from Backtest import run_backtest
+from Curve_store import Curve_store
+from sample_curves import CAP_PRICES, TENORS, ZCB_CURVE, stripped_vol_curve
+
+
+def test_run_backtest_streams_store(tmp_path):
+    PRECISION = 7
+
+    path = str(tmp_path / "store")
+    store = Curve_store.create(path, n_tenors=len(TENORS))
+    for date in [20240102, 20240103, 20240104]:
+        store.append(date, TENORS, ZCB_CURVE, CAP_PRICES)
+
+    answer = np.around(stripped_vol_curve().caplet_black_vols, PRECISION)
+
+    calls = []
+
+    def calibrate(vol_curve, previous):
+        calls.append(previous)
+        return vol_curve.caplet_black_vols[-1]
+
+    results = run_backtest(path, calibrate=calibrate)
+    dates = []
+    for result in results:
+        dates.append(int(result["date"]))
+        result = np.around(result["vol_curve"].caplet_black_vols, PRECISION)
+        assert (result == answer).all(), f"value should be {answer} but got {result}"
+
+    assert dates == [20240102, 20240103, 20240104]
+    assert calls[0] is None and calls[1] is not None
@@ -0,0 +1,33 @@
+import numpy as np
+from Bermudan import fit_exercise_boundary, price_bermudan_swaption
+from LMM import LMM
+from sample_curves import stripped_vol_curve
+
+
+def test_bermudan_single_exercise_matches_european():
+    model = LMM(stripped_vol_curve(), beta=0.1)
+    strike = 0.03
+    european, error = model.price_swaption(4, 12, strike, n_paths=20000, seed=3)
+    # same paths => identical exercise decisions on the last (only) date
+    bermudan, _ = price_bermudan_swaption(model, [4], 12, strike, n_paths=20000, seed=3)
+    assert np.isclose(bermudan, european, rtol=1e-10)
+
+
+def test_bermudan_exceeds_europeans():
+    model = LMM(stripped_vol_curve(), beta=0.1)
+    strike = 0.03
+    exercise_indices = [4, 8, 12, 16]
+    boundary = fit_exercise_boundary(
+        model, exercise_indices, 19, strike, chunk_size=6000
+    )
+    assert boundary["coefficients"].shape == (4, 4)
+
+    bermudan, error = price_bermudan_swaption(
+        model, exercise_indices, 19, strike, chunk_size=6000, boundary=boundary
+    )
+    europeans = [
+        model.price_swaption(m, 19, strike, n_paths=20000, seed=1)[0]
+        for m in exercise_indices
+    ]
+    assert bermudan > max(europeans) - 3.0 * error
+    assert bermudan < sum(europeans)
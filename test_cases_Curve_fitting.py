@@ -0,0 +1,55 @@
+import numpy as np
+from Curve_fitting import (
+    fit_nelson_siegel_svensson,
+    fit_nelson_siegel_svensson_batch,
+    fit_smoothing_spline,
+    nss_jacobian,
+    nss_yields,
+)
+from sample_curves import TENORS, ZCB_CURVE
+
+NSS_PARAMS = [0.04, -0.015, 0.01, -0.008, 1.2, 6.0]
+FIT_TENORS = np.array([0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30])
+
+
+def test_nss_jacobian_matches_finite_differences():
+    h = 1e-7
+    result = nss_jacobian(FIT_TENORS, NSS_PARAMS)
+    for i in range(6):
+        bumped = np.array(NSS_PARAMS)
+        bumped[i] += h
+        answer = (
+            nss_yields(FIT_TENORS, bumped) - nss_yields(FIT_TENORS, NSS_PARAMS)
+        ) / h
+        assert np.allclose(result[:, i], answer, atol=1e-6)
+
+
+def test_fit_nelson_siegel_svensson_recovers_prices():
+    rng = np.random.default_rng(0)
+    zcb_curve = np.exp(-nss_yields(FIT_TENORS, NSS_PARAMS) * FIT_TENORS)
+    noisy = zcb_curve * (1.0 + 1e-5 * rng.standard_normal(len(FIT_TENORS)))
+
+    curve = fit_nelson_siegel_svensson(noisy, FIT_TENORS)
+
+    assert np.max(np.abs(curve.interp(FIT_TENORS) - zcb_curve)) < 5e-5
+    assert np.max(np.abs(curve.residuals())) < 5e-5
+
+
+def test_fit_nelson_siegel_svensson_batch_and_spline():
+    curves = np.exp(
+        -np.array(
+            [
+                nss_yields(FIT_TENORS, NSS_PARAMS),
+                nss_yields(FIT_TENORS, [0.03, 0.01, 0, 0, 2.0, 8.0]),
+            ]
+        )
+        * FIT_TENORS
+    )
+    fitted = fit_nelson_siegel_svensson_batch(curves, FIT_TENORS)
+    assert len(fitted) == 2
+    for curve, zcb_curve in zip(fitted, curves):
+        assert np.max(np.abs(curve.interp(FIT_TENORS) - zcb_curve)) < 1e-3
+
+    spline = fit_smoothing_spline(ZCB_CURVE, TENORS)
+    assert np.max(np.abs(spline.interp(TENORS) - np.array(ZCB_CURVE))) < 2e-4
+    assert len(fit_smoothing_spline(curves, FIT_TENORS)) == 2
@@ -0,0 +1,49 @@
+import numpy as np
+from Curve_store import Curve_store
+from sample_curves import CAP_PRICES, TENORS, ZCB_CURVE, stripped_vol_curve
+
+
+def test_curve_store_append_and_reopen(tmp_path):
+    path = str(tmp_path / "store")
+    store = Curve_store.create(path, n_tenors=len(TENORS))
+    assert len(store) == 0
+
+    vol_curve = stripped_vol_curve()
+    store.append_vol_curve(20240102, vol_curve)
+    store.append(20240103, TENORS, ZCB_CURVE, CAP_PRICES)
+    store.extend(
+        [20240104, 20240104],
+        [TENORS, TENORS],
+        [ZCB_CURVE, ZCB_CURVE],
+        [CAP_PRICES, CAP_PRICES],
+        scenarios=[0, 1],
+    )
+
+    store = Curve_store(path)
+    assert len(store) == 4
+    assert isinstance(store.column("zcb_curve"), np.memmap)
+    assert store.column("cap_prices").shape == (4, len(TENORS) - 1)
+    assert list(store.find(20240104, scenario=1)) == [3]
+
+    row = store[0]
+    assert isinstance(row["zcb_curve"], np.memmap)
+    assert np.allclose(row["zcb_curve"], ZCB_CURVE)
+    assert np.allclose(row["caplet_black_vols"], vol_curve.caplet_black_vols)
+    assert np.isnan(store[1]["caplet_black_vols"]).all()
+
+    rebuilt = store.to_vol_curve(0)
+    assert np.allclose(rebuilt.interp(1.1), vol_curve.interp(1.1))
+
+
+def test_curve_store_keeps_partially_failed_strips(tmp_path):
+    # a strip that could not solve one tenor stores NaN there and vols everywhere else
+    vol_curve = stripped_vol_curve()
+    black_vols = list(vol_curve.caplet_black_vols)
+    normal_vols = list(vol_curve.caplet_normal_vols)
+    black_vols[3] = normal_vols[3] = np.nan
+
+    store = Curve_store.create(str(tmp_path / "store"), n_tenors=len(TENORS))
+    store.append(20240102, TENORS, ZCB_CURVE, CAP_PRICES, black_vols, normal_vols)
+    rebuilt = store.to_vol_curve(0)
+    assert np.allclose(rebuilt.caplet_black_vols, black_vols, equal_nan=True)
+    assert np.allclose(rebuilt.caplet_normal_vols, normal_vols, equal_nan=True)
@@ -1,4 +1,7 @@
+import numpy as np
 from Curves import *
+from sample_curves import CAP_PRICES, TENORS, ZCB_CURVE, stripped_vol_curve
+from utils import zcb_curve_to_forward_curve
 
 
 def test_generate_caplet_vol_term_structure_black_vol():
@@ -110,6 +113,185 @@ def test_generate_caplet_vol_term_structure_black_vol():
         ], f"value should be {answer} but got {result}"
 
 
+def test_array_zcb_curve():
+    curve = Array_zcb_curve(ZCB_CURVE, TENORS)
+
+    assert not hasattr(curve, "__dict__")
+    assert curve.zcb_curve.dtype == np.float64 and not curve.zcb_curve.flags.writeable
+    assert np.allclose(curve.interp(TENORS), ZCB_CURVE)
+    assert np.isclose(curve.interp(0.375), 0.5 * (ZCB_CURVE[0] + ZCB_CURVE[1]))
+
+    forward_curve = zcb_curve_to_forward_curve(ZCB_CURVE, TENORS)
+    assert np.allclose(curve.forward_curve(), forward_curve[:-1])
+
+    sub_curve = curve[2:10]
+    assert len(sub_curve) == 8
+    assert np.shares_memory(sub_curve.zcb_curve, curve.zcb_curve)
+    assert np.shares_memory(sub_curve.tenors, curve.tenors)
+
+
+def test_array_vol_curve_matches_vol_curve():
+    vol_curve = stripped_vol_curve()
+    curve = Array_vol_curve.from_vol_curve(vol_curve)
+
+    assert not hasattr(curve, "__dict__")
+    T = np.array([0.1, 0.3, 0.61, 1.1, 2.37, 4.6, 4.9, 7.0])
+    for vol_type in ["black", "normal"]:
+        assert np.allclose(curve.interp(T, vol_type), vol_curve.interp(T, vol_type))
+
+    sub_curve = curve[3:]
+    assert np.shares_memory(sub_curve.caplet_black_vols, curve.caplet_black_vols)
+    assert sub_curve.interp(10.0) == curve.caplet_black_vols[-1]
+
+
+def test_vol_curve_interp_builds_once_across_threads():
+    import pickle
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    vol_curve = stripped_vol_curve()
+    builds = []
+    build_interpolators = vol_curve._build_interpolators
+    barrier = threading.Barrier(16)
+
+    def counting_build():
+        builds.append(1)
+        return build_interpolators()
+
+    vol_curve._build_interpolators = counting_build
+
+    def query(T):
+        barrier.wait()
+        return float(vol_curve.interp(T))
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(query, [1.1] * 16))
+
+    assert len(builds) == 1
+    assert len(set(results)) == 1
+    vol_curve.interp(2.0)
+    assert len(builds) == 1
+
+    restored = pickle.loads(pickle.dumps(stripped_vol_curve()))
+    assert float(restored.interp(1.1)) == results[0]
+
+
+def test_vol_curve_interp_during_restrip(monkeypatch):
+    import threading
+    import Curves
+
+    T = [0.3, 1.1, 2.6, 4.9]
+    vol_curve = stripped_vol_curve()
+    old = vol_curve.interp(T)
+    cap_prices = [1.1 * price for price in CAP_PRICES]
+    answer = Vol_curve(
+        cap_prices, ZCB_CURVE, TENORS, interp_method="piecewise constant"
+    )
+    answer.generate_caplet_vol_term_structure()
+    new = answer.interp(T)
+
+    # every cap of the re-strip lets another thread read the curve mid-strip
+    seen = []
+    get_black_cap_iv = Curves.get_black_cap_iv
+
+    def reading_get_black_cap_iv(*args, **kwargs):
+        reader = threading.Thread(target=lambda: seen.append(vol_curve.interp(T)))
+        reader.start()
+        reader.join()
+        return get_black_cap_iv(*args, **kwargs)
+
+    monkeypatch.setattr(Curves, "get_black_cap_iv", reading_get_black_cap_iv)
+    vol_curve.cap_price_curve = cap_prices
+    vol_curve.generate_caplet_vol_term_structure()
+
+    assert len(seen) == len(CAP_PRICES)
+    assert all(np.array_equal(values, old) for values in seen)
+    assert np.array_equal(vol_curve.interp(T), new)
+
+
+def test_generate_caplet_vol_term_structure_failure_policies():
+    import pytest
+
+    cap_prices = list(CAP_PRICES)
+    cap_prices[5] = 0.9 * cap_prices[4]  # stripped caplet 5 becomes negative
+
+    with pytest.raises(AssertionError):
+        Vol_curve(
+            cap_prices, ZCB_CURVE, TENORS, interp_method="piecewise constant"
+        ).generate_caplet_vol_term_structure()
+
+    results = {}
+    for policy in ["skip", "flat", "intrinsic"]:
+        vol_curve = Vol_curve(
+            cap_prices, ZCB_CURVE, TENORS, interp_method="piecewise constant"
+        )
+        vol_curve.generate_caplet_vol_term_structure(failure_policy=policy)
+        results[policy] = vol_curve
+        assert [(d["index"], d["action"]) for d in vol_curve.strip_diagnostics] == [
+            (5, policy),
+            (5, policy),
+        ]
+        assert np.isfinite(vol_curve.caplet_black_vols[6:]).all()
+
+    assert np.isnan(results["skip"].caplet_black_vols[5])
+    assert results["flat"].caplet_black_vols[5] == results["flat"].caplet_black_vols[4]
+    assert results["intrinsic"].caplet_black_vols[5] == 0.0
+    # tenors before the bad quote are untouched
+    answer = np.around(stripped_vol_curve().caplet_black_vols[:5], 7)
+    result = np.around(results["skip"].caplet_black_vols[:5], 7)
+    assert (result == answer).all()
+
+
+def test_caplet_vol_sensitivities_match_restrip():
+    vol_curve = stripped_vol_curve()
+    for vol_type, vols in [
+        ("black", "caplet_black_vols"),
+        ("normal", "caplet_normal_vols"),
+    ]:
+        sensitivities = vol_curve.caplet_vol_sensitivities(vol_type)
+        assert np.allclose(sensitivities, np.tril(sensitivities))
+        for j in [0, 7, 18]:
+            bump = 1e-7
+            cap_prices = list(CAP_PRICES)
+            cap_prices[j] += bump
+            bumped = Vol_curve(
+                cap_prices, ZCB_CURVE, TENORS, interp_method="piecewise constant"
+            )
+            bumped.generate_caplet_vol_term_structure()
+            finite_difference = (
+                np.array(getattr(bumped, vols)) - getattr(vol_curve, vols)
+            ) / bump
+            assert np.allclose(
+                sensitivities[:, j], finite_difference, rtol=1e-3, atol=1e-3
+            )
+
+
+def test_query_plans_match_interp():
+    T = np.linspace(0.25, 5.0, 37)
+    for method in ["linear", "cubic spline"]:
+        curve = Zcb_curve(ZCB_CURVE, TENORS, method)
+        plan = curve.query_plan(T)
+        assert plan is curve.query_plan(T.tolist())  # cached per grid
+        assert np.allclose(plan.evaluate(curve.zcb_curve), curve.interp(T), rtol=1e-12)
+        # new values on the same tenors reuse the plan, several curves at once
+        discount = np.exp(-0.01 * np.array(TENORS))
+        shocked = np.array(ZCB_CURVE) * np.stack([discount, discount**2])
+        for row, values in enumerate(shocked):
+            answer = Zcb_curve(values.tolist(), TENORS, method).interp(T)
+            assert np.allclose(plan.evaluate(shocked)[row], answer, rtol=1e-12)
+
+    vol_curve = stripped_vol_curve()
+    T = np.linspace(0.0, 6.0, 97)
+    plan = vol_curve.query_plan(T)
+    assert np.array_equal(
+        plan.evaluate(vol_curve.caplet_black_vols), vol_curve.interp(T)
+    )
+    assert np.array_equal(
+        plan.evaluate(vol_curve.caplet_normal_vols),
+        vol_curve.interp(T, vol_type="normal"),
+    )
+
+
 # def test_generate_caplet_vol_term_structure_normal_vol():
 #     PRECISION = 5
 
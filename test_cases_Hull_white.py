@@ -0,0 +1,54 @@
+import numpy as np
+from Curves import Zcb_curve
+from Hull_white import Hull_white, get_lattice
+from sample_curves import TENORS, ZCB_CURVE
+
+
+def test_lattices_reprice_zcb_curve():
+    PRECISION = 10
+
+    curve = Zcb_curve(ZCB_CURVE, TENORS, "cubic spline")
+    for method in ["tree", "pde"]:
+        lattice = get_lattice(curve, 0.1, 0.01, 5.0, method=method)
+        for T in [0.25, 1.0, 2.5, 5.0]:
+            assert np.around(lattice.zcb(T), PRECISION) == np.around(
+                curve.interp(T), PRECISION
+            )
+
+
+def test_lattice_cache_is_shared():
+    curve = Zcb_curve(ZCB_CURVE, TENORS, "cubic spline")
+    same_curve = Zcb_curve(list(ZCB_CURVE), list(TENORS), "cubic spline")
+    assert Hull_white(curve).lattice(4.2) is Hull_white(same_curve).lattice(5.0)
+    assert Hull_white(curve).lattice(5.0) is not Hull_white(curve, sigma=0.02).lattice(
+        5.0
+    )
+
+
+def test_lattice_caplets_match_closed_form():
+    curve = Zcb_curve(ZCB_CURVE, TENORS, "cubic spline")
+    for method in ["tree", "pde"]:
+        model = Hull_white(curve, 0.1, 0.01, method=method)
+        answer = model.analytic_caplet_prices(
+            TENORS[:-1], TENORS[1:], [0.03] * (len(TENORS) - 1)
+        )
+        assert np.isclose(model.price_calplet(1.0, 1.25, 0.03), answer[3], rtol=1e-2)
+        assert np.isclose(model.price_cap(TENORS, 0.03), answer.sum(), rtol=2e-3)
+
+
+def test_bermudan_swaption_exceeds_european():
+    curve = Zcb_curve(ZCB_CURVE, TENORS, "cubic spline")
+    tenors = np.arange(1.0, 5.01, 0.25)
+    for method in ["tree", "pde"]:
+        model = Hull_white(curve, 0.1, 0.01, method=method)
+        european = model.price_swaption([1.0], tenors, 0.03)
+        bermudan = model.price_swaption([1.0, 2.0, 3.0], tenors, 0.03)
+        receiver = model.price_swaption([1.0], tenors, 0.03, payer=False)
+        assert bermudan > european > 0.0
+        # payer - receiver = forward swap value
+        swap = (
+            curve.interp(1.0)
+            - curve.interp(5.0)
+            - 0.03 * 0.25 * np.sum(curve.interp(tenors[1:]))
+        )
+        assert np.isclose(european - receiver, swap, atol=1e-6)
@@ -0,0 +1,42 @@
+import Instrumentation
+from sample_curves import stripped_vol_curve
+from utils import black_caplet_price, get_black_caplet_iv
+
+
+def test_instrumentation_disabled_records_nothing():
+    Instrumentation.reset()
+    Instrumentation.disable()
+
+    black_caplet_price(0.0300522, 0.03353653, 0.301687537, 0.955975519, 1.0)
+
+    assert Instrumentation.snapshot() == {"calls": {}, "solvers": {}}
+
+
+def test_instrumentation_collects_calls_solvers_and_stages():
+    Instrumentation.reset()
+    Instrumentation.enable()
+    try:
+        get_black_caplet_iv(0.000553777, 0.0300522, 0.03353653, 0.955975519, 1.0)
+        stripped_vol_curve()
+    finally:
+        Instrumentation.disable()
+
+    metrics = Instrumentation.snapshot()
+    calls = metrics["calls"]
+    assert calls["get_black_caplet_iv"]["count"] >= 1
+    assert calls["black_caplet_price"]["count"] > calls["get_black_caplet_iv"]["count"]
+    assert calls["generate_caplet_vol_term_structure"]["count"] == 1
+    for name in ["cap_iv", "black_strip", "normal_strip"]:
+        assert calls[f"generate_caplet_vol_term_structure.{name}"]["count"] > 0
+
+    solver = metrics["solvers"]["get_black_caplet_iv"]
+    assert solver["failures"] == 0
+    assert 1 <= solver["mean_iterations"] <= solver["max_iterations"] < 50
+
+    text = Instrumentation.to_prometheus()
+    assert 'interest_rate_models_calls_total{function="black_caplet_price"}' in text
+    assert (
+        'interest_rate_models_solver_failures_total{solver="get_black_cap_iv"} 0'
+        in text
+    )
+    Instrumentation.reset()
@@ -0,0 +1,40 @@
+import numpy as np
+from LMM import LMM, exponential_correlation
+from sample_curves import TENORS, ZCB_CURVE, stripped_vol_curve
+from utils import black_caplet_price
+
+
+def test_exponential_correlation():
+    rho = exponential_correlation([0.25, 0.5, 1.0], beta=0.2, rho_inf=0.3)
+    assert np.allclose(np.diag(rho), 1.0)
+    assert np.isclose(rho[0, 2], 0.3 + 0.7 * np.exp(-0.2 * 0.75))
+    assert np.allclose(rho, rho.T)
+
+
+def test_lmm_deflators_reprice_zcbs():
+    model = LMM(stripped_vol_curve(), beta=0.1)
+    total = 0.0
+    n_paths = 0
+    for chunk in model.simulate(20000, chunk_size=7000, seed=1):
+        assert chunk["forwards"].shape[1:] == (len(TENORS) - 1, len(TENORS) - 1)
+        total = total + chunk["deflators"].sum(axis=0)
+        n_paths += len(chunk["deflators"])
+    assert n_paths == 20000
+    # the deflated zcbs are martingales: E[D_k] = P(0, T_k)
+    assert np.allclose(total / n_paths, ZCB_CURVE, rtol=5e-3)
+
+
+def test_lmm_caplet_prices_match_black():
+    vol_curve = stripped_vol_curve()
+    model = LMM(vol_curve, beta=0.1, steps_per_period=2)
+    for index in [0, 5, 18]:
+        forward = vol_curve.forward_curve[index + 1]
+        answer = black_caplet_price(
+            forward,
+            forward,
+            vol_curve.caplet_black_vols[index],
+            ZCB_CURVE[index + 1],
+            TENORS[index],
+        )
+        price, error = model.price_calplet(index, forward, n_paths=20000, seed=2)
+        assert abs(price - answer) < 4.0 * error + 1e-3 * answer
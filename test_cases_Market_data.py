@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from Backtest import run_backtest
+from Market_data import read_quotes, validate_quotes
+from sample_curves import CAP_PRICES, TENORS, ZCB_CURVE, stripped_vol_curve
+
+
+def _write_quotes(path, dates, bad_date=None):
+    lines = ["date,tenor,zcb,cap_price,source"]
+    for date in dates:
+        for ind, (tenor, zcb) in enumerate(zip(TENORS, ZCB_CURVE)):
+            cap_price = "" if ind == 0 else repr(CAP_PRICES[ind - 1])
+            if date == bad_date and ind == 3:
+                zcb = 1.5
+            lines.append(f"{date},{tenor},{zcb!r},{cap_price},broker")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_read_quotes_streams_across_chunks(tmp_path):
+    path = tmp_path / "quotes.csv"
+    dates = [20240102, 20240103, 20240104]
+    _write_quotes(path, dates)
+    # chunks of 7 rows split every date across chunks
+    snapshots = list(read_quotes(str(path), chunk_rows=7, n_tenors=len(TENORS)))
+    assert [date for date, *_ in snapshots] == dates
+    for _, tenors, zcb_curve, cap_prices in snapshots:
+        assert np.array_equal(tenors, TENORS)
+        assert np.array_equal(zcb_curve, ZCB_CURVE)
+        assert np.array_equal(cap_prices, CAP_PRICES)
+
+    answer = stripped_vol_curve().caplet_black_vols
+    for result in run_backtest(str(path)):
+        assert np.allclose(result["vol_curve"].caplet_black_vols, answer, rtol=1e-10)
+
+
+def test_read_quotes_validation(tmp_path):
+    path = tmp_path / "quotes.csv"
+    _write_quotes(path, [20240102, 20240103, 20240104], bad_date=20240103)
+    with pytest.raises(ValueError, match="20240103: zcb prices are not in"):
+        list(read_quotes(str(path), chunk_rows=11))
+
+    diagnostics = []
+    snapshots = read_quotes(
+        str(path), chunk_rows=11, on_invalid="skip", diagnostics=diagnostics
+    )
+    assert [date for date, *_ in snapshots] == [20240102, 20240104]
+    assert diagnostics == [
+        {"date": 20240103, "rows": (20, 40), "reason": "zcb prices are not in (0, 1]"}
+    ]
+
+    dates = np.array([1, 1, 1, 2, 2, 3])
+    tenors = np.array([0.25, 0.5, 0.5, 0.25, 0.5, 0.25])
+    zcb = np.array([0.99, 0.98, 0.97, 0.99, 0.98, 0.99])
+    cap_prices = np.array([np.nan, 0.001, 0.002, np.nan, -0.001, np.nan])
+    problems = validate_quotes(dates, tenors, zcb, cap_prices)
+    assert problems == [
+        {"date": 1, "rows": (0, 3), "reason": "tenors are not strictly increasing"},
+        {"date": 2, "rows": (3, 5), "reason": "cap prices are missing or not > 0"},
+        {"date": 3, "rows": (5, 6), "reason": "fewer than 2 tenors"},
+    ]
+
+
+def test_read_quotes_out_of_order_dates(tmp_path):
+    path = tmp_path / "quotes.csv"
+    _write_quotes(path, [20240102, 20240104, 20240103, 20240104, 20240105])
+    unsorted = "dates are not strictly increasing"
+    # chunks of one date put every date change on a chunk boundary, chunks of 7 inside one
+    for chunk_rows in [len(TENORS), 7]:
+        with pytest.raises(ValueError, match=f"20240103: {unsorted}"):
+            list(read_quotes(str(path), chunk_rows=chunk_rows))
+
+        diagnostics = []
+        snapshots = read_quotes(
+            str(path), chunk_rows=chunk_rows, on_invalid="skip", diagnostics=diagnostics
+        )
+        # the repeated 20240104 is skipped by row range, its first block is kept
+        assert [date for date, *_ in snapshots] == [20240102, 20240104, 20240105]
+        assert diagnostics == [
+            {"date": 20240103, "rows": (40, 60), "reason": unsorted},
+            {"date": 20240104, "rows": (60, 80), "reason": unsorted},
+        ]
+
+
+def test_read_quotes_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    dates = [20240102, 20240103, 20240104]
+    n = len(TENORS)
+    table = pa.table(
+        {
+            "date": np.repeat(dates, n),
+            "tenor": np.tile(TENORS, len(dates)),
+            "zcb": np.tile(ZCB_CURVE, len(dates)),
+            "cap_price": pa.array(
+                ([None] + list(CAP_PRICES)) * len(dates), pa.float64()
+            ),
+        }
+    )
+    path = str(tmp_path / "quotes.parquet")
+    pq.write_table(table, path, row_group_size=11)
+
+    snapshots = list(read_quotes(path, chunk_rows=7, n_tenors=n))
+    assert [date for date, *_ in snapshots] == dates
+    for _, tenors, zcb_curve, cap_prices in snapshots:
+        assert np.array_equal(tenors, TENORS)
+        assert np.array_equal(zcb_curve, ZCB_CURVE)
+        assert np.array_equal(cap_prices, CAP_PRICES)
@@ -0,0 +1,64 @@
+import numpy as np
+from Curves import Zcb_curve
+from Multi_curve import Multi_curve
+from sample_curves import TENORS, ZCB_CURVE
+from utils import black_cap_price, black_caplet_price, zcb_curve_to_forward_swap_curve
+
+
+def test_multi_curve_single_curve_limit():
+    curve = Zcb_curve(ZCB_CURVE, TENORS, "cubic spline")
+    multi_curve = Multi_curve(curve, {"3M": curve}, TENORS)
+
+    answer = zcb_curve_to_forward_swap_curve(ZCB_CURVE, TENORS)[1:-1]
+    assert np.allclose(multi_curve.forward_swap_rates["3M"], answer, atol=1e-12)
+    assert not multi_curve.forwards["3M"].flags.writeable
+
+
+def test_multi_curve_strip_recovers_caplet_vols():
+    PRECISION = 6
+
+    ois = Zcb_curve(ZCB_CURVE, TENORS, "cubic spline")
+    # projection curve 20bp above OIS
+    projection = Zcb_curve(
+        list(np.array(ZCB_CURVE) * np.exp(-0.002 * np.array(TENORS))),
+        TENORS,
+        "cubic spline",
+    )
+    multi_curve = Multi_curve(ois, {"3M": projection}, TENORS)
+    caplet_vols = np.linspace(0.25, 0.35, len(TENORS) - 1)
+
+    cap_prices = []
+    for n in range(1, len(TENORS)):
+        inputs = multi_curve.cap_inputs("3M", n)
+        strike = multi_curve.forward_swap_rates["3M"][n - 1]
+        cap_prices.append(
+            np.sum(
+                black_caplet_price(
+                    inputs["forward_curve"],
+                    strike,
+                    caplet_vols[:n],
+                    inputs["zcb_prices"],
+                    inputs["time_to_reset_date"],
+                    inputs["taus"],
+                )
+            )
+        )
+    inputs = multi_curve.cap_inputs("3M")
+    answer = np.sum(
+        black_caplet_price(
+            inputs["forward_curve"],
+            0.03,
+            0.3,
+            inputs["zcb_prices"],
+            inputs["time_to_reset_date"],
+            inputs["taus"],
+        )
+    )
+    assert np.isclose(black_cap_price(k=0.03, sigma=0.3, **inputs), answer)
+
+    vol_curve = multi_curve.vol_curve(cap_prices, "3M")
+    vol_curve.generate_caplet_vol_term_structure()
+
+    answer = np.around(caplet_vols, PRECISION)
+    result = np.around(vol_curve.caplet_black_vols, PRECISION)
+    assert (result == answer).all(), f"value should be {answer} but got {result}"
@@ -0,0 +1,55 @@
+import multiprocessing
+
+import numpy as np
+from Parallel_calibration import run_calibrations
+from sample_curves import CAP_PRICES, TENORS, ZCB_CURVE, stripped_vol_curve
+
+
+def _first_caplet_vol(vol_curve, previous):
+    return vol_curve.caplet_black_vols[0]
+
+
+def _jobs():
+    jobs = []
+    for day in range(6):
+        n = len(TENORS) - (day % 3)  # mixed tenor counts
+        scale = 1.0 + 0.01 * day
+        jobs.append(
+            (
+                (("USD", "EUR")[day % 2], day),
+                TENORS[:n],
+                ZCB_CURVE[:n],
+                [p * scale for p in CAP_PRICES[: n - 1]],
+            )
+        )
+    return jobs
+
+
+def test_run_calibrations_ordered_matches_serial():
+    context = multiprocessing.get_context("fork")
+    jobs = _jobs()
+    results = list(
+        run_calibrations(
+            jobs,
+            calibrate=_first_caplet_vol,
+            max_workers=2,
+            ordered=True,
+            mp_context=context,
+        )
+    )
+    assert [result["key"] for result in results] == [job[0] for job in jobs]
+
+    answer = stripped_vol_curve()
+    assert np.allclose(results[0]["caplet_black_vols"], answer.caplet_black_vols)
+    assert len(results[1]["caplet_black_vols"]) == len(TENORS) - 2
+    assert results[0]["calibration"] == answer.caplet_black_vols[0]
+
+
+def test_run_calibrations_streams_all_jobs():
+    context = multiprocessing.get_context("fork")
+    jobs = _jobs()
+    keys = [
+        result["key"]
+        for result in run_calibrations(jobs, max_workers=3, mp_context=context)
+    ]
+    assert sorted(keys) == sorted(job[0] for job in jobs)
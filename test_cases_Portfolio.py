@@ -0,0 +1,123 @@
+import numpy as np
+from Curves import Zcb_curve
+from Multi_curve import Multi_curve
+from Portfolio import Trade_table, value_portfolio
+from sample_curves import TENORS, ZCB_CURVE
+from utils import black_cap_price, black_caplet_price, normal_caplet_price
+
+
+def _curves():
+    curve = Zcb_curve(ZCB_CURVE, TENORS, "cubic spline")
+    return {"USD": Multi_curve(curve, {"3M": curve}, TENORS)}
+
+
+def test_portfolio_matches_per_trade_pricers():
+    curves = _curves()
+    inputs = curves["USD"].cap_inputs("3M")
+    trades = Trade_table.from_records(
+        [
+            {
+                "kind": "caplet",
+                "curve": "USD",
+                "index": "3M",
+                "start": 3,
+                "end": 4,
+                "strike": 0.03,
+                "vol": 0.3,
+            },
+            {
+                "kind": "cap",
+                "curve": "USD",
+                "index": "3M",
+                "start": 0,
+                "end": 12,
+                "strike": 0.035,
+                "vol": 0.25,
+            },
+            {
+                "kind": "caplet",
+                "curve": "USD",
+                "index": "3M",
+                "start": 7,
+                "end": 8,
+                "strike": 0.03,
+                "vol": 0.008,
+                "vol_type": "normal",
+            },
+        ]
+    )
+    result = value_portfolio(trades, curves, chunk_size=1)
+
+    answer = [
+        black_caplet_price(
+            inputs["forward_curve"][3],
+            0.03,
+            0.3,
+            inputs["zcb_prices"][3],
+            inputs["time_to_reset_date"][3],
+        ),
+        black_cap_price(
+            inputs["forward_curve"][:12],
+            0.035,
+            0.25,
+            inputs["zcb_prices"][:12],
+            inputs["time_to_reset_date"][:12],
+            inputs["taus"][:12],
+        ),
+        normal_caplet_price(
+            inputs["forward_curve"][7],
+            0.03,
+            0.008,
+            inputs["zcb_prices"][7],
+            inputs["time_to_reset_date"][7],
+        ),
+    ]
+    assert np.allclose(result["pv"], answer, rtol=1e-10)
+    assert np.isclose(result["total_pv"], sum(answer))
+    assert [group["trades"] for group in result["groups"]] == [2, 1]
+
+
+def test_portfolio_swaptions_and_risk():
+    curves = _curves()
+    strikes = np.array([0.03, 0.03, 0.035, 0.035])
+    vols = np.array([0.25, 0.25, 0.007, 0.007])
+    trades = Trade_table(
+        kind=["swaption"] * 4,
+        curve="USD",
+        index="3M",
+        vol_type=["black", "black", "normal", "normal"],
+        start=4,
+        end=16,
+        strike=strikes,
+        vol=vols,
+        payer=[True, False, True, False],
+    )
+    result = value_portfolio(trades, curves)
+
+    multi_curve = curves["USD"]
+    annuity = multi_curve.annuities[15] - multi_curve.annuities[3]
+    # payer - receiver = annuity * (S - K)
+    inputs = multi_curve.cap_inputs("3M")
+    weights = inputs["taus"][4:16] * inputs["zcb_prices"][4:16]
+    swap_rate = np.sum(weights * inputs["forward_curve"][4:16]) / weights.sum()
+    assert np.isclose(annuity, weights.sum())
+    for payer, receiver, strike in [(0, 1, 0.03), (2, 3, 0.035)]:
+        assert np.isclose(
+            result["pv"][payer] - result["pv"][receiver], annuity * (swap_rate - strike)
+        )
+
+    # vega against a vol bump
+    bump = 1e-6
+    bumped = Trade_table(
+        kind=trades.kind,
+        curve="USD",
+        index="3M",
+        vol_type=trades.vol_type,
+        start=4,
+        end=16,
+        strike=strikes,
+        vol=vols + bump,
+        payer=trades.payer,
+    )
+    vega = (value_portfolio(bumped, curves)["pv"] - result["pv"]) / bump
+    assert np.allclose(result["vega"], vega, rtol=1e-4)
@@ -0,0 +1,88 @@
+import threading
+
+import numpy as np
+import Precision
+from Curves import Array_zcb_curve
+from LMM import LMM
+from Multi_curve import Multi_curve
+from Shocks import Shocked_curve, parallel_shocks
+from sample_curves import TENORS, ZCB_CURVE, stripped_vol_curve
+from utils import (
+    black_cap_price,
+    black_caplet_price,
+    get_black_caplet_iv,
+    normal_caplet_price,
+)
+
+
+def test_precision_context_restores_policy():
+    assert Precision.get_precision() == "float64"
+    with Precision.precision("float32"):
+        assert Precision.storage_dtype() is np.float32
+        assert Precision.as_storage(np.ones(3)).dtype == np.float32
+        assert Precision.as_storage(0.5) == 0.5
+        assert (
+            Precision.accumulate_sum(np.ones(3, dtype=np.float32)).dtype == np.float64
+        )
+    assert Precision.get_precision() == "float64"
+    assert Precision.as_storage(np.ones(3)).dtype == np.float64
+
+
+def test_float32_caplet_pricers_match_float64():
+    f = np.linspace(0.01, 0.05, 50)
+    t = np.linspace(0.25, 10.0, 50)
+    black = black_caplet_price(f, 0.03, 0.3, 0.9, t)
+    normal = normal_caplet_price(f, 0.03, 0.01, 0.9, t)
+    cap = black_cap_price(f, 0.03, 0.3, np.full(50, 0.9), t, np.full(50, 0.25))
+    with Precision.precision("float32"):
+        black32 = black_caplet_price(f, 0.03, 0.3, 0.9, t)
+        normal32 = normal_caplet_price(f, 0.03, 0.01, 0.9, t)
+        cap32 = black_cap_price(f, 0.03, 0.3, np.full(50, 0.9), t, np.full(50, 0.25))
+    assert black32.dtype == np.float32 and normal32.dtype == np.float32
+    assert np.allclose(black32, black, rtol=1e-4, atol=1e-8)
+    assert np.allclose(normal32, normal, rtol=1e-4, atol=1e-8)
+    assert np.isclose(cap32, cap, rtol=1e-5)
+
+
+def test_float32_lmm_and_shocks():
+    model = LMM(stripped_vol_curve(), beta=0.1)
+    price, error = model.price_calplet(5, 0.03, n_paths=20000, seed=2)
+    with Precision.precision("float32"):
+        chunk = next(model.simulate(100))
+        price32, error32 = model.price_calplet(5, 0.03, n_paths=20000, seed=2)
+        curve = Array_zcb_curve(ZCB_CURVE, TENORS)
+        scenarios = Shocked_curve(
+            Multi_curve(curve, {"3M": curve}, TENORS), parallel_shocks(TENORS, [0.001])
+        )
+    assert chunk["forwards"].dtype == np.float32
+    assert chunk["deflators"].dtype == np.float64
+    # float32 normals are a different stream, so the estimates agree within their errors
+    assert abs(price32 - price) < 4.0 * np.hypot(error, error32)
+    assert scenarios.forwards["3M"].dtype == np.float32
+
+
+def test_float32_policy_keeps_solvers_in_float64_and_stays_local():
+    p = black_caplet_price(0.0300522, 0.03353653, 0.301687537, 0.955975519, 1.0)
+    answer = stripped_vol_curve().caplet_black_vols
+    with Precision.precision("float32"):
+        iv = get_black_caplet_iv(p, 0.0300522, 0.03353653, 0.955975519, 1.0)
+        vols = stripped_vol_curve().caplet_black_vols
+        assert Precision.get_precision() == "float32"
+    assert np.isclose(iv, 0.301687537)
+    assert np.allclose(vols, answer, rtol=1e-10)
+
+    # a float32 block in one thread leaves the policy of other threads alone
+    entered, release, seen = threading.Event(), threading.Event(), []
+
+    def float32_block():
+        with Precision.precision("float32"):
+            entered.set()
+            release.wait()
+
+    thread = threading.Thread(target=float32_block)
+    thread.start()
+    entered.wait()
+    seen.append(Precision.get_precision())
+    release.set()
+    thread.join()
+    assert seen == ["float64"]
@@ -0,0 +1,50 @@
+import numpy as np
+from Curves import Vol_curve, Zcb_curve
+from Hull_white import Hull_white
+from LMM import LMM
+from Pricing_errors import pricing_errors, weighted_metric
+from sample_curves import CAP_PRICES, TENORS, ZCB_CURVE, stripped_vol_curve
+
+
+def test_weighted_metrics():
+    residuals = np.array([[1.0, -2.0, np.nan], [3.0, 0.0, 1.0]])
+    weights = np.array([1.0, 3.0, 1.0])
+    assert np.allclose(weighted_metric(residuals, weights), [13.0 / 4.0, 10.0 / 5.0])
+    assert np.allclose(
+        weighted_metric(residuals, weights, "mae"), [7.0 / 4.0, 4.0 / 5.0]
+    )
+    assert np.allclose(weighted_metric(residuals, None, "max"), [2.0, 3.0])
+    assert np.isclose(
+        weighted_metric(residuals, weights, "rmse", axis=None), np.sqrt(23.0 / 9.0)
+    )
+
+    errors = pricing_errors([[1.1, 2.0]], [[1.0, np.nan]], relative=True)
+    assert np.allclose(errors["residuals"][0, 0], 0.1) and np.isnan(
+        errors["residuals"][0, 1]
+    )
+    assert np.isclose(errors["total"], 0.01)
+
+
+def test_model_errors_across_dates():
+    vol_curve = stripped_vol_curve()
+    short_curve = Vol_curve(
+        CAP_PRICES[:9], ZCB_CURVE[:10], TENORS[:10], "piecewise constant"
+    )
+    short_curve.generate_caplet_vol_term_structure()
+
+    # the LMM reprices its calibration caplets and curve exactly
+    model = LMM(vol_curve)
+    errors = model.get_caplet_errors(
+        [vol_curve, short_curve], relative=True, metric="max"
+    )
+    assert errors["residuals"].shape == (2, len(TENORS) - 1)
+    assert np.isnan(errors["residuals"][1, 9:]).all()
+    assert np.all(np.asarray(errors["metric"]) < 1e-10)
+    assert model.get_zcb_mse(np.array(TENORS), np.array(ZCB_CURVE)) < 1e-20
+
+    # the calibration objective is the same residual layer
+    hull_white = Hull_white(Zcb_curve(ZCB_CURVE, TENORS, "cubic spline"))
+    result = hull_white.calibrate_model(vol_curve)
+    errors = hull_white.get_caplet_errors([vol_curve], relative=True)
+    assert np.isclose(errors["total"], np.mean(result.fun**2))
+    assert np.allclose(errors["residuals"].ravel(), result.fun)
@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+from Pricing_service import Local_client, Pricing_service
+from utils import black_caplet_price
+
+
+def test_pricing_service_batches_requests():
+    PRECISION = 7
+
+    strikes = np.linspace(0.02, 0.04, 25)
+
+    async def run():
+        async with Pricing_service(window=0.01) as service:
+            client = Local_client(service)
+            prices = await client.request_many(
+                [
+                    {
+                        "op": "black_caplet_price",
+                        "f": 0.0300522,
+                        "k": k,
+                        "sigma": 0.301687537,
+                        "df": 0.955975519,
+                        "t": 1.0,
+                    }
+                    for k in strikes
+                ]
+            )
+            ivs = await client.request_many(
+                [
+                    {
+                        "op": "black_caplet_iv",
+                        "price": p["result"],
+                        "f": 0.0300522,
+                        "k": k,
+                        "df": 0.955975519,
+                        "t": 1.0,
+                    }
+                    for p, k in zip(prices, strikes)
+                ]
+            )
+            error = await client.request({"op": "black_caplet_price", "f": 0.03})
+            return prices, ivs, error, service.batch_sizes
+
+    prices, ivs, error, batch_sizes = asyncio.run(run())
+
+    answer = np.around(
+        black_caplet_price(0.0300522, strikes, 0.301687537, 0.955975519, 1.0), PRECISION
+    )
+    result = np.around([p["result"] for p in prices], PRECISION)
+    assert (result == answer).all(), f"value should be {answer} but got {result}"
+    assert np.allclose([iv["result"] for iv in ivs], 0.301687537, atol=1e-4)
+    assert batch_sizes == [25, 25]
+    assert "error" in error
+
+
+def test_pricing_service_isolates_malformed_requests():
+    request = {
+        "op": "black_caplet_price",
+        "f": 0.03,
+        "k": 0.03,
+        "sigma": 0.3,
+        "df": 0.96,
+        "t": 1.0,
+    }
+
+    async def run():
+        async with Pricing_service(window=0.01) as service:
+            client = Local_client(service)
+            return await asyncio.wait_for(
+                client.request_many(
+                    [request, {**request, "f": "abc"}, {**request, "k": None}]
+                ),
+                timeout=5.0,
+            )
+
+    good, bad, missing = asyncio.run(run())
+    assert np.isclose(good["result"], black_caplet_price(0.03, 0.03, 0.3, 0.96, 1.0))
+    assert "must be numbers" in bad["error"] and "must be numbers" in missing["error"]
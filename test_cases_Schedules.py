@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from Curves import Vol_curve
+from Schedules import get_schedule, legacy_schedule, schedule_from_dates, year_fractions
+from utils import (
+    black_cap_price,
+    zcb_curve_to_forward_curve,
+    zcb_curve_to_forward_swap_curve,
+)
+
+
+def test_year_fractions():
+    PRECISION = 10
+
+    start = ["2024-01-31", "2024-02-29", "2024-06-15"]
+    end = ["2024-03-31", "2024-08-31", "2025-06-15"]
+
+    result = np.around(year_fractions(start, end, "ACT/360"), PRECISION)
+    answer = np.around([60 / 360, 184 / 360, 365 / 360], PRECISION)
+    assert (result == answer).all(), f"value should be {answer} but got {result}"
+
+    result = np.around(year_fractions(start, end, "30/360"), PRECISION)
+    answer = np.around([60 / 360, 182 / 360, 1.0], PRECISION)
+    assert (result == answer).all(), f"value should be {answer} but got {result}"
+
+
+def test_schedules_are_cached():
+    tenors = [0.25, 0.5, 0.75, 1.0]
+
+    assert legacy_schedule(tenors) is legacy_schedule(list(tenors))
+    assert get_schedule([0.5, 1.0], [1.0, 1.5]) is get_schedule((0.5, 1.0), (1.0, 1.5))
+
+    schedule = schedule_from_dates(
+        "2024-01-02", ["2024-04-02", "2024-10-02"], ["2024-10-02", "2025-04-02"]
+    )
+    assert schedule is schedule_from_dates(
+        "2024-01-02", ["2024-04-02", "2024-10-02"], ["2024-10-02", "2025-04-02"]
+    )
+    assert np.allclose(schedule.accruals, [183 / 360, 182 / 360])
+    assert np.allclose(schedule.reset_times, [91 / 365, 274 / 365])
+
+
+def test_strip_with_semiannual_act360_schedule():
+    PRECISION = 6
+
+    # semiannual schedule with a short front stub, ACT/360 accruals
+    tenors = [0.3, 0.8, 1.3, 1.8, 2.3, 2.8]
+    zcb_curve = list(np.exp(-0.03 * np.array(tenors)))
+    accruals = [0.5 * 365 / 360 + 0.002 * i for i in range(len(tenors) - 1)]
+    reset_times = [t - 0.01 for t in tenors[:-1]]
+    schedule = get_schedule(reset_times, tenors[1:], accruals)
+    caplet_vols = [0.2, 0.22, 0.25, 0.24, 0.23]
+
+    dts = [tenors[0]] + accruals
+    forward_curve = zcb_curve_to_forward_curve(zcb_curve, tenors, dts)
+    forward_swap_curve = zcb_curve_to_forward_swap_curve(zcb_curve, tenors, dts)
+    cap_prices = []
+    for ind in range(len(tenors) - 1):
+        cap_prices.append(
+            sum(
+                black_cap_price(
+                    [forward_curve[i + 1]],
+                    forward_swap_curve[ind + 1],
+                    caplet_vols[i],
+                    [zcb_curve[i + 1]],
+                    [reset_times[i]],
+                    [accruals[i]],
+                )
+                for i in range(ind + 1)
+            )
+        )
+
+    vol_curve = Vol_curve(
+        cap_prices, zcb_curve, tenors, "piecewise constant", schedule=schedule
+    )
+    vol_curve.generate_caplet_vol_term_structure()
+
+    answer = np.around(caplet_vols, PRECISION)
+    result = np.around(vol_curve.caplet_black_vols, PRECISION)
+    assert (result == answer).all(), f"value should be {answer} but got {result}"
+
+    # caplets discount at tenors[1:], so a schedule paying elsewhere is rejected
+    shifted = get_schedule(reset_times, [t + 0.05 for t in tenors[1:]], accruals)
+    with pytest.raises(AssertionError, match="payment_times"):
+        Vol_curve(cap_prices, zcb_curve, tenors, "piecewise constant", schedule=shifted)
@@ -0,0 +1,83 @@
+import numpy as np
+from Curves import Array_zcb_curve, Vol_curve
+from Multi_curve import Multi_curve
+from Portfolio import Trade_table, value_portfolio
+from Shocks import (
+    Shocked_curve,
+    bucket_shocks,
+    parallel_shocks,
+    restrip_vol_curves,
+    shock_zcb_curves,
+    twist_shocks,
+)
+from sample_curves import CAP_PRICES, TENORS, ZCB_CURVE, stripped_vol_curve
+
+
+def _shocks():
+    return np.vstack(
+        [
+            parallel_shocks(TENORS, [-0.005, 0.005]),
+            twist_shocks(TENORS, [0.002], [-0.002]),
+            bucket_shocks(TENORS)[[5, 12, 19]],
+        ]
+    )
+
+
+def test_restrip_from_first_affected_cap_matches_full_strip():
+    base = stripped_vol_curve()
+    shocks = _shocks()
+    zcb_curves = shock_zcb_curves(ZCB_CURVE, TENORS, shocks)
+    for row, vol_curve in enumerate(restrip_vol_curves(base, shocks)):
+        answer = Vol_curve(
+            CAP_PRICES, zcb_curves[row].tolist(), TENORS, "piecewise constant"
+        )
+        answer.generate_caplet_vol_term_structure()
+        assert np.allclose(
+            vol_curve.caplet_black_vols, answer.caplet_black_vols, rtol=1e-8
+        )
+        assert np.allclose(
+            vol_curve.caplet_normal_vols, answer.caplet_normal_vols, rtol=1e-8
+        )
+    # bucket shock at tenor 19 only re-strips the last cap
+    assert vol_curve.caplet_black_vols[:17] == base.caplet_black_vols[:17]
+
+
+def test_shocked_portfolio_matches_rebuilt_curves():
+    curve = Array_zcb_curve(ZCB_CURVE, TENORS)
+    multi_curve = Multi_curve(curve, {"3M": curve}, TENORS)
+    trades = Trade_table(
+        kind=["caplet", "cap", "swaption", "swaption"],
+        curve="USD",
+        index="3M",
+        vol_type=["black", "normal", "black", "normal"],
+        start=[3, 0, 4, 8],
+        end=[4, 12, 16, 19],
+        strike=0.03,
+        vol=[0.3, 0.008, 0.25, 0.007],
+    )
+    shocks = _shocks()
+    scenarios = Shocked_curve(multi_curve, shocks)
+    result = value_portfolio(trades, {"USD": scenarios})
+    assert result["pv"].shape == (len(shocks), len(trades))
+
+    zcb_curves = shock_zcb_curves(ZCB_CURVE, TENORS, shocks)
+    for row, zcb_curve in enumerate(zcb_curves):
+        shocked = Array_zcb_curve(zcb_curve, TENORS)
+        answer = value_portfolio(
+            trades, {"USD": Multi_curve(shocked, {"3M": shocked}, TENORS)}
+        )
+        assert np.allclose(result["pv"][row], answer["pv"], rtol=1e-10)
+        assert np.allclose(result["delta"][row], answer["delta"], rtol=1e-10)
+        assert np.isclose(result["total_pv"][row], answer["total_pv"], rtol=1e-10)
+
+    # the bucket shock at tenor 12 (row 4) only touches periods 11 and 12 and the tails from
+    # period 11 on, although the parallel shocks of the same batch touch everything
+    untouched = np.r_[0:11, 13 : len(multi_curve.forwards["3M"])]
+    assert np.array_equal(
+        scenarios.forwards["3M"][4, untouched], multi_curve.forwards["3M"][untouched]
+    )
+    assert np.array_equal(scenarios.annuities[4, :11], multi_curve.annuities[:11])
+    assert np.array_equal(
+        scenarios.forward_swap_rates["3M"][4, :11],
+        multi_curve.forward_swap_rates["3M"][:11],
+    )
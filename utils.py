@@ -1,10 +1,299 @@
+import math
+import warnings
+
 import numpy as np
-from scipy import optimize
-from scipy.stats import norm
+from Instrumentation import instrumented, is_enabled, record_solver
+from Precision import accumulate_sum, as_storage, in_float64, storage_dtype
+
+# SciPy is imported lazily inside the functions that need it so that importing
+# the pricers/converters stays cheap for short-lived worker processes.
+
+__all__ = [
+    "EPSILON",
+    "FAILURE_MODES",
+    "norm_cdf",
+    "norm_pdf",
+    "black_d1_d2",
+    "black_caplet_price",
+    "get_black_caplet_iv",
+    "normal_caplet_price",
+    "get_normal_caplet_iv",
+    "black_caplet_vega",
+    "normal_caplet_vega",
+    "black_caplet_kernel",
+    "normal_caplet_kernel",
+    "black_floorlet_price",
+    "normal_floorlet_price",
+    "black_digital_caplet_price",
+    "normal_digital_caplet_price",
+    "black_cap_price",
+    "black_cap_floor_prices",
+    "black_cap_vega",
+    "get_black_cap_iv",
+    "normal_cap_price",
+    "normal_cap_floor_prices",
+    "black_floor_price",
+    "normal_floor_price",
+    "black_collar_price",
+    "normal_collar_price",
+    "spot_curve_to_zcb_curve",
+    "zcb_curve_to_spot_curve",
+    "zcb_curve_to_forward_curve",
+    "zcb_curve_to_forward_swap_curve",
+    "forward_curve_to_forward_swap_curve",
+]
 
 EPSILON = 1e-7
+FAILURE_MODES = ["raise", "nan"]
+SQRT_2 = math.sqrt(2.0)
+INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+def norm_cdf(x):
+    """
+    standard normal cumulative distribution function
+    Note: scalars go through math.erfc and arrays through scipy.special.ndtr,
+          both accurate to machine precision without scipy.stats dispatch
+
+    Args:
+        x: (float or np.ndarray) => input value(s)
+    Returns:
+        cdf: (float or np.ndarray) => N(x)
+    """
+    if np.ndim(x) == 0:
+        return 0.5 * math.erfc(-float(x) / SQRT_2)
+    from scipy.special import ndtr
+
+    return ndtr(x)
+
+
+def norm_pdf(x):
+    """
+    standard normal probability density function
+
+    Args:
+        x: (float or np.ndarray) => input value(s)
+    Returns:
+        pdf: (float or np.ndarray) => n(x)
+    """
+    if np.ndim(x) == 0:
+        return INV_SQRT_2PI * math.exp(-0.5 * float(x) * float(x))
+    return INV_SQRT_2PI * np.exp(-0.5 * np.square(x))
+
+
+def _readonly_array(values):
+    """
+    convert values to a read-only contiguous float64 array
+    Note: read-only float64 inputs are shared (zero-copy), anything else is copied once
+          so that no other owner can mutate the curve data afterwards
+
+    Args:
+        values: (list[float] or np.ndarray) => values
+    Returns:
+        array: (np.ndarray) => read-only 1d float64 array
+    """
+    if (
+        isinstance(values, np.ndarray)
+        and values.dtype == np.float64
+        and values.flags.c_contiguous
+        and not values.flags.writeable
+    ):
+        return values
+    array = np.array(values, dtype=np.float64).ravel()
+    array.flags.writeable = False
+    return array
+
+
+def black_d1_d2(log_moneyness, sigma, t, sqrt_t):
+    """
+    d1 and d2 of black's formula, shared by the caplet, cap and portfolio pricers
+    Note: sigma + EPSILON keeps d1 finite at zero vol
+
+    Args:
+        log_moneyness: (float or np.ndarray) => log(f / k)
+        sigma: (float or np.ndarray) => Black volatility
+        t: (float or np.ndarray) => time to reset date in years
+        sqrt_t: (float or np.ndarray) => sqrt(t), passed in so callers can reuse it
+    Returns:
+        (d1, d2): (float or np.ndarray)
+    """
+    d1 = (log_moneyness + (sigma**2) * t * 0.5) / ((sigma + EPSILON) * sqrt_t)
+    return d1, d1 - sigma * sqrt_t
+
+
+def _storage_inputs(*values):
+    # batch pricer inputs under the Precision policy (untouched in float64 mode); scalars are
+    # cast too, or np.sqrt(tau) of a python float would promote the result back to float64
+    dtype = storage_dtype()
+    if dtype is np.float64:
+        return values
+    return tuple(
+        as_storage(value) if np.ndim(value) else dtype(value) for value in values
+    )
+
+
+def _newton(func, x0, name, on_failure="raise", diagnostics=None):
+    """
+    scipy's secant/Newton root finder, recording iterations/failures when instrumented
+
+    Args:
+        func: callable => objective
+        x0: (float or np.ndarray) => initial guess
+        name: (str) => solver name for the instrumentation and diagnostics
+        on_failure: (str) => "raise" (scipy's RuntimeError) or "nan" (NaN root + diagnostics)
+        diagnostics: (list) => if given, one dict per failed quote is appended (default None)
+    Returns:
+        root: (float or np.ndarray)
+    """
+    from scipy import optimize
+
+    assert on_failure in FAILURE_MODES, f"on_failure must be in {FAILURE_MODES}"
+    if on_failure == "raise" and not is_enabled():
+        return optimize.newton(func, x0)
+
+    evaluations = [0]
+
+    def counted_func(x):
+        evaluations[0] += 1
+        return func(x)
+
+    if on_failure == "raise":
+        try:
+            root = optimize.newton(counted_func, x0)
+        except RuntimeError:
+            record_solver(name, evaluations[0] - 1, converged=False)
+            raise
+        # the secant method evaluates both starting points, then once per iteration
+        record_solver(name, evaluations[0] - 1, converged=True)
+        return root
+
+    reason = "did not converge"
+    try:
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            if np.ndim(x0) > 0:
+                root, converged, _ = optimize.newton(
+                    counted_func, x0, full_output=True, disp=False
+                )
+            else:
+                root, info = optimize.newton(
+                    counted_func, x0, full_output=True, disp=False
+                )
+                converged, reason = info.converged, info.flag
+    except (RuntimeError, ArithmeticError, ValueError) as exc:
+        root = np.full(np.shape(x0), np.nan)
+        converged = False
+        reason = f"{type(exc).__name__}: {exc}"
+
+    failed = ~(np.asarray(converged, dtype=bool) & np.isfinite(root))
+    iterations = evaluations[0] - 1
+    if is_enabled():
+        record_solver(name, iterations, converged=not failed.any())
+    if failed.any():
+        root = np.where(failed, np.nan, root)
+        if diagnostics is not None:
+            guesses = np.broadcast_to(x0, failed.shape)
+            for ind in np.flatnonzero(failed) if failed.ndim else [None]:
+                diagnostics.append(
+                    {
+                        "solver": name,
+                        "index": None if ind is None else int(ind),
+                        "initial_guess": float(
+                            guesses if ind is None else guesses[ind]
+                        ),
+                        "iterations": iterations,
+                        "reason": reason,
+                    }
+                )
+    return float(root) if np.ndim(root) == 0 else root
+
+
+def _safeguarded_newton(
+    func,
+    x0,
+    lower,
+    upper,
+    name,
+    on_failure="raise",
+    diagnostics=None,
+    xtol=1e-12,
+    maxiter=100,
+):
+    """
+    Newton's method with an analytic derivative for an increasing objective, safeguarded by a
+    bracket: a step that leaves [lower, upper] (or a vanishing derivative) bisects instead
+
+    Args:
+        func: callable => x -> (objective, derivative), objective increasing in x
+        x0: (float) => initial guess
+        lower: (float) => lower bound of the root
+        upper: (float) => upper bound of the root
+        name: (str) => solver name for the instrumentation and diagnostics
+        on_failure: (str) => "raise" (RuntimeError) or "nan" (NaN root + diagnostics)
+        diagnostics: (list) => if given, one dict per failed solve is appended (default None)
+        xtol: (float) => absolute step tolerance (default 1e-12)
+        maxiter: (int) => maximum iterations (default 100)
+    Returns:
+        root: (float)
+    """
+    assert on_failure in FAILURE_MODES, f"on_failure must be in {FAILURE_MODES}"
+    x = min(max(float(x0), lower), upper)
+    reason = f"did not converge after {maxiter} iterations"
+    root = np.nan
+    signs = set()  # bracket sides confirmed by an evaluation
+    iteration = 0
+    with np.errstate(all="ignore"):
+        while iteration < maxiter:
+            iteration += 1
+            value, derivative = func(x)
+            if not np.isfinite(value):
+                reason = f"objective is not finite at {x}"
+                break
+            if value == 0.0:
+                root = x
+                break
+            # shrink the bracket around the root
+            if value > 0.0:
+                upper = x
+            else:
+                lower = x
+            signs.add(value > 0.0)
+            step = value / derivative if derivative > 0.0 else np.inf
+            if abs(step) < xtol:
+                root = x - step
+                break
+            x_new = x - step
+            if not lower < x_new < upper:
+                if upper - lower < xtol:
+                    if len(signs) == 2:
+                        root = 0.5 * (lower + upper)
+                    else:
+                        reason = "no root inside the bounds"
+                    break
+                x_new = 0.5 * (lower + upper)
+            x = x_new
+
+    converged = not np.isnan(root)
+    if is_enabled():
+        record_solver(name, iteration, converged=converged)
+    if converged:
+        return root
+    if on_failure == "raise":
+        raise RuntimeError(f"{name}: {reason}")
+    if diagnostics is not None:
+        diagnostics.append(
+            {
+                "solver": name,
+                "index": None,
+                "initial_guess": float(x0),
+                "iterations": iteration,
+                "reason": reason,
+            }
+        )
+    return np.nan
 
 
+@instrumented
 def black_caplet_price(
     f,
     k,
@@ -28,12 +317,55 @@ def black_caplet_price(
     Returns:
         caplet price: (float)
     """
-    d1 = (np.log(f / k) + (sigma**2) * t * 0.5) / ((sigma + EPSILON) * np.sqrt(t))
-    d2 = d1 - sigma * np.sqrt(t)
-    return df * N * tau * (f * norm.cdf(d1) - k * norm.cdf(d2))
+    f, k, sigma, df, t, tau = _storage_inputs(f, k, sigma, df, t, tau)
+    d1, d2 = black_d1_d2(np.log(f / k), sigma, t, np.sqrt(t))
+    return df * N * tau * (f * norm_cdf(d1) - k * norm_cdf(d2))
 
 
-def get_black_caplet_iv(price, f, k, df, t, tau=0.25, N=1.0, initial_guess=0.3):
+@instrumented
+def black_caplet_vega(
+    f,
+    k,
+    sigma,
+    df,
+    t,
+    tau=0.25,
+    N=1.0,
+):
+    """
+    calculate caplet Black vega, d black_caplet_price / d sigma
+
+    Args:
+        f: (float) => forward rate
+        k: (float) => strike rate
+        sigma: (float) => Black volatility
+        df: (float) => discount factor
+        t: (float) => time to reset date in years
+        tau: (float) => forward duration in years (default 0.25)
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        caplet vega: (float)
+    """
+    f, k, sigma, df, t, tau = _storage_inputs(f, k, sigma, df, t, tau)
+    sqrt_t = np.sqrt(t)
+    d1, _ = black_d1_d2(np.log(f / k), sigma, t, sqrt_t)
+    return df * N * tau * f * norm_pdf(d1) * sqrt_t
+
+
+@instrumented
+@in_float64
+def get_black_caplet_iv(
+    price,
+    f,
+    k,
+    df,
+    t,
+    tau=0.25,
+    N=1.0,
+    initial_guess=0.3,
+    on_failure="raise",
+    diagnostics=None,
+):
     """
     calculate caplet black's implied volatility
 
@@ -47,18 +379,24 @@ def get_black_caplet_iv(price, f, k, df, t, tau=0.25, N=1.0, initial_guess=0.3):
         tau: (float) => forward duration in years (default 0.25)
         N: (float) => notional amount (default 1.0)
         initial_guess: (float) => initial guess of the Black implied volatility (default 0.3)
+        on_failure: (str) => "raise" or "nan" (batch-safe: NaN on non-convergence) (default 'raise')
+        diagnostics: (list) => collects one dict per failed solve when on_failure="nan" (default None)
     Returns:
         iv: (float) => caplet implied volatility
     """
-    iv = optimize.newton(
+    iv = _newton(
         lambda iv: price
         - black_caplet_price(f=f, k=k, sigma=iv, df=df, t=t, tau=tau, N=N),
         initial_guess,
+        "get_black_caplet_iv",
+        on_failure=on_failure,
+        diagnostics=diagnostics,
     )
 
     return iv
 
 
+@instrumented
 def normal_caplet_price(
     f,
     k,
@@ -82,12 +420,56 @@ def normal_caplet_price(
     Returns:
         caplet price: (float)
     """
+    f, k, sigma, df, t, tau = _storage_inputs(f, k, sigma, df, t, tau)
     d = (f - k) / (sigma * np.sqrt(tau))
 
-    return df * N * tau * ((f - k) * norm.cdf(d) + sigma * np.sqrt(tau) * norm.pdf(d))
+    return df * N * tau * ((f - k) * norm_cdf(d) + sigma * np.sqrt(tau) * norm_pdf(d))
 
 
-def get_normal_caplet_iv(price, f, k, df, t, tau=0.25, N=1.0, initial_guess=0.01):
+@instrumented
+def normal_caplet_vega(
+    f,
+    k,
+    sigma,
+    df,
+    t,
+    tau=0.25,
+    N=1.0,
+):
+    """
+    calculate caplet normal vega, d normal_caplet_price / d sigma
+
+    Args:
+        f: (float) => forward rate
+        k: (float) => strike rate
+        sigma: (float) => Normal volatility
+        df: (float) => discount factor
+        t: (float) => time to reset date in years
+        tau: (float) => forward duration in years (default 0.25)
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        caplet vega: (float)
+    """
+    f, k, sigma, df, t, tau = _storage_inputs(f, k, sigma, df, t, tau)
+    d = (f - k) / (sigma * np.sqrt(tau))
+
+    return df * N * tau * np.sqrt(tau) * norm_pdf(d)
+
+
+@instrumented
+@in_float64
+def get_normal_caplet_iv(
+    price,
+    f,
+    k,
+    df,
+    t,
+    tau=0.25,
+    N=1.0,
+    initial_guess=0.01,
+    on_failure="raise",
+    diagnostics=None,
+):
     """
     calculate caplet implied volatility (normal model)
 
@@ -101,18 +483,184 @@ def get_normal_caplet_iv(price, f, k, df, t, tau=0.25, N=1.0, initial_guess=0.01
         tau: (float) => forward duration in years (default 0.25)
         N: (float) => notional amount (default 1.0)
         initial_guess: (float) => initial guess of the Normal implied volatility (default 0.01)
+        on_failure: (str) => "raise" or "nan" (batch-safe: NaN on non-convergence) (default 'raise')
+        diagnostics: (list) => collects one dict per failed solve when on_failure="nan" (default None)
     Returns:
         iv: (float) => Normal caplet implied volatility
     """
-    iv = optimize.newton(
+    iv = _newton(
         lambda iv: price
         - normal_caplet_price(f=f, k=k, sigma=iv, df=df, t=t, tau=tau, N=N),
         initial_guess,
+        "get_normal_caplet_iv",
+        on_failure=on_failure,
+        diagnostics=diagnostics,
     )
 
     return iv
 
 
+@instrumented
+def black_caplet_kernel(
+    f,
+    k,
+    sigma,
+    df,
+    t,
+    tau=0.25,
+    N=1.0,
+):
+    """
+    caplet, floorlet and digital caplet prices with black's formula, from one d1 / d2 / CDF pass
+    Note: the floorlet uses N(-d) = 1 - N(d); the digital caplet pays N * tau when the forward
+          fixes above k, i.e. df * N * tau * N(d2); array inputs broadcast, so a whole book of
+          caplets is priced in one call
+
+    Args:
+        f: (float or np.ndarray) => forward rate
+        k: (float or np.ndarray) => strike rate
+        sigma: (float or np.ndarray) => Black volatility
+        df: (float or np.ndarray) => discount factor
+        t: (float or np.ndarray) => time to reset date in years
+        tau: (float or np.ndarray) => forward duration in years (default 0.25)
+        N: (float or np.ndarray) => notional amount (default 1.0)
+    Returns:
+        (caplet, floorlet, digital): (float or np.ndarray) => prices
+    """
+    f, k, sigma, df, t, tau = _storage_inputs(f, k, sigma, df, t, tau)
+    d1, d2 = black_d1_d2(np.log(f / k), sigma, t, np.sqrt(t))
+    cdf_d1 = norm_cdf(d1)
+    cdf_d2 = norm_cdf(d2)
+    scale = df * N * tau
+    caplet = scale * (f * cdf_d1 - k * cdf_d2)
+    floorlet = scale * (k * (1.0 - cdf_d2) - f * (1.0 - cdf_d1))
+    return caplet, floorlet, scale * cdf_d2
+
+
+@instrumented
+def normal_caplet_kernel(
+    f,
+    k,
+    sigma,
+    df,
+    t,
+    tau=0.25,
+    N=1.0,
+):
+    """
+    caplet, floorlet and digital caplet prices from the normal model, from one d / CDF pass
+    Note: same variance time as normal_caplet_price; the digital caplet is df * N * tau * N(d)
+
+    Args:
+        f: (float or np.ndarray) => forward rate
+        k: (float or np.ndarray) => strike rate
+        sigma: (float or np.ndarray) => Normal volatility
+        df: (float or np.ndarray) => discount factor
+        t: (float or np.ndarray) => time to reset date in years
+        tau: (float or np.ndarray) => forward duration in years (default 0.25)
+        N: (float or np.ndarray) => notional amount (default 1.0)
+    Returns:
+        (caplet, floorlet, digital): (float or np.ndarray) => prices
+    """
+    f, k, sigma, df, t, tau = _storage_inputs(f, k, sigma, df, t, tau)
+    std = sigma * np.sqrt(tau)
+    d = (f - k) / std
+    cdf_d = norm_cdf(d)
+    time_value = std * norm_pdf(d)
+    scale = df * N * tau
+    caplet = scale * ((f - k) * cdf_d + time_value)
+    floorlet = scale * ((k - f) * (1.0 - cdf_d) + time_value)
+    return caplet, floorlet, scale * cdf_d
+
+
+@instrumented
+def black_floorlet_price(f, k, sigma, df, t, tau=0.25, N=1.0):
+    """
+    calculate floorlet price with black's formula (see black_caplet_kernel)
+
+    Args:
+        f, k, sigma, df, t, tau, N: see black_caplet_price
+    Returns:
+        floorlet price: (float)
+    """
+    return black_caplet_kernel(f, k, sigma, df, t, tau, N)[1]
+
+
+@instrumented
+def normal_floorlet_price(f, k, sigma, df, t, tau=0.25, N=1.0):
+    """
+    calculate floorlet price (from normal model, see normal_caplet_kernel)
+
+    Args:
+        f, k, sigma, df, t, tau, N: see normal_caplet_price
+    Returns:
+        floorlet price: (float)
+    """
+    return normal_caplet_kernel(f, k, sigma, df, t, tau, N)[1]
+
+
+@instrumented
+def black_digital_caplet_price(f, k, sigma, df, t, tau=0.25, N=1.0):
+    """
+    calculate digital caplet price with black's formula, pays N * tau if the forward fixes
+    above k (see black_caplet_kernel)
+
+    Args:
+        f, k, sigma, df, t, tau, N: see black_caplet_price
+    Returns:
+        digital caplet price: (float)
+    """
+    return black_caplet_kernel(f, k, sigma, df, t, tau, N)[2]
+
+
+@instrumented
+def normal_digital_caplet_price(f, k, sigma, df, t, tau=0.25, N=1.0):
+    """
+    calculate digital caplet price (from normal model), pays N * tau if the forward fixes
+    above k (see normal_caplet_kernel)
+
+    Args:
+        f, k, sigma, df, t, tau, N: see normal_caplet_price
+    Returns:
+        digital caplet price: (float)
+    """
+    return normal_caplet_kernel(f, k, sigma, df, t, tau, N)[2]
+
+
+def _cap_arrays(forward_curve, zcb_prices, time_to_reset_date, taus):
+    if np.ndim(taus) == 0:
+        taus = [taus] * len(time_to_reset_date)
+    assert (
+        len(forward_curve) == len(zcb_prices)
+        and len(zcb_prices) == len(time_to_reset_date)
+        and len(time_to_reset_date) == len(taus)
+    ), f"The legnths must be equal. len(forward_curve): {len(forward_curve)}, len(zcb_prices): {len(zcb_prices)}, len(time_to_reset_date): {len(zcb_prices)}, len(taus): {len(taus)}"
+    return (
+        np.asarray(forward_curve, dtype=np.float64),
+        np.asarray(zcb_prices, dtype=np.float64),
+        np.asarray(time_to_reset_date, dtype=np.float64),
+        np.asarray(taus, dtype=np.float64),
+    )
+
+
+def _black_cap_pricer(forward_curve, k, zcb_prices, time_to_reset_date, taus, N=1.0):
+    # sigma -> (cap price, cap vega); the sigma-free parts of the caplet formula
+    # (log-moneyness, sqrt(t), df * N * tau) are computed once for all evaluations
+    f, df, t, taus = _cap_arrays(forward_curve, zcb_prices, time_to_reset_date, taus)
+    log_moneyness = np.log(f / k)
+    sqrt_t = np.sqrt(t)
+    scale = df * N * taus
+
+    def price_and_vega(sigma):
+        d1, d2 = black_d1_d2(log_moneyness, sigma, t, sqrt_t)
+        price = np.sum(scale * (f * norm_cdf(d1) - k * norm_cdf(d2)))
+        vega = np.sum(scale * f * norm_pdf(d1) * sqrt_t)
+        return float(price), float(vega)
+
+    return price_and_vega
+
+
+@instrumented
 def black_cap_price(
     forward_curve,
     k,
@@ -131,35 +679,55 @@ def black_cap_price(
         sigma: (float) => Black volatility
         zcb_prices: (list[float]) => discount factors
         time_to_reset_date: (list[float]) => time to reset date in years
-        taus: (list[float]) => forward durations in years (default [0.25] * len(time_to_reset_date))
+        taus: (list[float] or float) => accrual fractions of the caplet periods
         N: (float) => notional amount (default 1.0)
     Returns:
         cap_price: (float) => cap price
     """
+    # all caplets in one vectorized kernel call, discounted at maturity not reset date
+    return _cap_floor_prices(
+        black_caplet_kernel,
+        forward_curve,
+        k,
+        sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )[0]
 
-    assert (
-        len(forward_curve) == len(zcb_prices)
-        and len(zcb_prices) == len(time_to_reset_date)
-        and len(time_to_reset_date) == len(taus)
-    ), f"The legnths must be equal. len(forward_curve): {len(forward_curve)}, len(zcb_prices): {len(zcb_prices)}, len(time_to_reset_date): {len(zcb_prices)}, len(taus): {len(taus)}"
 
-    cap_price = 0
-
-    for i in range(len(zcb_prices)):
-        caplet_price = black_caplet_price(
-            forward_curve[i],
-            k,
-            sigma,
-            zcb_prices[i],  # Discount at maturity not reset date
-            time_to_reset_date[i],
-            taus[i],
-            N,
-        )
-        cap_price += caplet_price
+@instrumented
+def black_cap_vega(
+    forward_curve,
+    k,
+    sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate cap Black vega, d black_cap_price / d sigma (sum of the caplet vegas)
 
-    return cap_price
+    Args:
+        forward_curve: (list[float]) => forward curve
+        k: (float) => strike rate
+        sigma: (float) => Black volatility
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the caplet periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        cap_vega: (float) => cap vega
+    """
+    return _black_cap_pricer(forward_curve, k, zcb_prices, time_to_reset_date, taus, N)(
+        sigma
+    )[1]
 
 
+@instrumented
+@in_float64
 def get_black_cap_iv(
     price,
     forward_curve,
@@ -169,9 +737,13 @@ def get_black_cap_iv(
     taus=0.25,
     N=1.0,
     initial_guess=0.3,
+    on_failure="raise",
+    diagnostics=None,
 ):
     """
     calculate cap black's implied volatility
+    Note: Newton's method with the analytic cap vega (one price + vega pass per iteration),
+          safeguarded by bisection on the vol bracket [0, 10]
 
     Args:
         price: (float) => caplet price
@@ -182,21 +754,327 @@ def get_black_cap_iv(
         taus: (list[float]) => forward durations in years (default [0.25] * len(time_to_reset_date))
         N: (float) => notional amount (default 1.0)
         initial_guess: (float) => initial guess of the Black implied volatility (default 0.3)
+        on_failure: (str) => "raise" or "nan" (batch-safe: NaN on non-convergence) (default 'raise')
+        diagnostics: (list) => collects one dict per failed solve when on_failure="nan" (default None)
     Returns:
         iv: (float) => cap implied volatility
     """
+    price_and_vega = _black_cap_pricer(
+        forward_curve, k, zcb_prices, time_to_reset_date, taus, N
+    )
 
-    sigma = optimize.newton(
-        lambda iv: price
-        - black_cap_price(
-            forward_curve, k, iv, zcb_prices, time_to_reset_date, taus, N
-        ),
+    def objective(iv):
+        model_price, vega = price_and_vega(iv)
+        return model_price - price, vega
+
+    sigma = _safeguarded_newton(
+        objective,
         initial_guess,
+        0.0,
+        10.0,
+        "get_black_cap_iv",
+        on_failure=on_failure,
+        diagnostics=diagnostics,
     )
 
     return sigma
 
 
+def _cap_floor_prices(
+    kernel, forward_curve, k, sigma, zcb_prices, time_to_reset_date, taus, N
+):
+    # (cap, floor, digital cap) prices: the kernel outputs summed over the caplets
+    f, df, t, taus = _cap_arrays(forward_curve, zcb_prices, time_to_reset_date, taus)
+    return tuple(float(accumulate_sum(x)) for x in kernel(f, k, sigma, df, t, taus, N))
+
+
+def _collar_price(
+    kernel,
+    forward_curve,
+    cap_strike,
+    floor_strike,
+    cap_sigma,
+    floor_sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N,
+):
+    # both strikes in one kernel pass on (2, caplets) arrays
+    f, df, t, taus = _cap_arrays(forward_curve, zcb_prices, time_to_reset_date, taus)
+    strikes = np.array([[cap_strike], [floor_strike]], dtype=np.float64)
+    sigmas = np.stack(np.broadcast_arrays(cap_sigma, floor_sigma, f)[:2])
+    caplets, floorlets, _ = kernel(f, strikes, sigmas, df, t, taus, N)
+    return float(accumulate_sum(caplets[0]) - accumulate_sum(floorlets[1]))
+
+
+@instrumented
+def black_cap_floor_prices(
+    forward_curve,
+    k,
+    sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate cap, floor and digital cap prices with black's formula from one kernel pass
+
+    Args:
+        forward_curve: (list[float]) => forward curve
+        k: (float) => strike rate
+        sigma: (float or list[float]) => Black volatility (flat or per caplet)
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the caplet periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        (cap_price, floor_price, digital_cap_price): (float, float, float)
+    """
+    return _cap_floor_prices(
+        black_caplet_kernel,
+        forward_curve,
+        k,
+        sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )
+
+
+@instrumented
+def normal_cap_floor_prices(
+    forward_curve,
+    k,
+    sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate cap, floor and digital cap prices (from normal model) from one kernel pass
+
+    Args:
+        forward_curve: (list[float]) => forward curve
+        k: (float) => strike rate
+        sigma: (float or list[float]) => Normal volatility (flat or per caplet)
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the caplet periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        (cap_price, floor_price, digital_cap_price): (float, float, float)
+    """
+    return _cap_floor_prices(
+        normal_caplet_kernel,
+        forward_curve,
+        k,
+        sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )
+
+
+@instrumented
+def normal_cap_price(
+    forward_curve,
+    k,
+    sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate cap price (from normal model)
+
+    Args:
+        forward_curve: (list[float]) => forward curve
+        k: (float) => strike rate
+        sigma: (float or list[float]) => Normal volatility (flat or per caplet)
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the caplet periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        cap_price: (float) => cap price
+    """
+    return _cap_floor_prices(
+        normal_caplet_kernel,
+        forward_curve,
+        k,
+        sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )[0]
+
+
+@instrumented
+def black_floor_price(
+    forward_curve,
+    k,
+    sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate floor price with black's formula
+
+    Args:
+        forward_curve: (list[float]) => forward curve
+        k: (float) => strike rate
+        sigma: (float or list[float]) => Black volatility (flat or per floorlet)
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the floorlet periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        floor_price: (float) => floor price
+    """
+    return _cap_floor_prices(
+        black_caplet_kernel,
+        forward_curve,
+        k,
+        sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )[1]
+
+
+@instrumented
+def normal_floor_price(
+    forward_curve,
+    k,
+    sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate floor price (from normal model)
+
+    Args:
+        forward_curve: (list[float]) => forward curve
+        k: (float) => strike rate
+        sigma: (float or list[float]) => Normal volatility (flat or per floorlet)
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the floorlet periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        floor_price: (float) => floor price
+    """
+    return _cap_floor_prices(
+        normal_caplet_kernel,
+        forward_curve,
+        k,
+        sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )[1]
+
+
+@instrumented
+def black_collar_price(
+    forward_curve,
+    cap_strike,
+    floor_strike,
+    cap_sigma,
+    floor_sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate collar price with black's formula: long a cap at cap_strike, short a floor at
+    floor_strike (both legs in one kernel pass)
+
+    Args:
+        forward_curve: (list[float]) => forward curve
+        cap_strike: (float) => cap strike rate
+        floor_strike: (float) => floor strike rate
+        cap_sigma: (float or list[float]) => Black volatility of the cap leg
+        floor_sigma: (float or list[float]) => Black volatility of the floor leg
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        collar_price: (float) => cap price - floor price
+    """
+    return _collar_price(
+        black_caplet_kernel,
+        forward_curve,
+        cap_strike,
+        floor_strike,
+        cap_sigma,
+        floor_sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )
+
+
+@instrumented
+def normal_collar_price(
+    forward_curve,
+    cap_strike,
+    floor_strike,
+    cap_sigma,
+    floor_sigma,
+    zcb_prices,
+    time_to_reset_date,
+    taus,
+    N=1.0,
+):
+    """
+    calculate collar price (from normal model): long a cap at cap_strike, short a floor at
+    floor_strike (both legs in one kernel pass)
+
+    Args:
+        forward_curve: (list[float]) => forward curve
+        cap_strike: (float) => cap strike rate
+        floor_strike: (float) => floor strike rate
+        cap_sigma: (float or list[float]) => Normal volatility of the cap leg
+        floor_sigma: (float or list[float]) => Normal volatility of the floor leg
+        zcb_prices: (list[float]) => discount factors
+        time_to_reset_date: (list[float]) => time to reset date in years
+        taus: (list[float] or float) => accrual fractions of the periods
+        N: (float) => notional amount (default 1.0)
+    Returns:
+        collar_price: (float) => cap price - floor price
+    """
+    return _collar_price(
+        normal_caplet_kernel,
+        forward_curve,
+        cap_strike,
+        floor_strike,
+        cap_sigma,
+        floor_sigma,
+        zcb_prices,
+        time_to_reset_date,
+        taus,
+        N,
+    )
+
+
+@instrumented
 def spot_curve_to_zcb_curve(spot_curve, tenors):
     """
     convert spot_curve to zcb_curve
@@ -219,6 +1097,7 @@ def spot_curve_to_zcb_curve(spot_curve, tenors):
     return zcb_curve
 
 
+@instrumented
 def zcb_curve_to_spot_curve(zcb_curve, tenors):
     """
     convert zcb_curve to spot_curve
@@ -240,13 +1119,16 @@ def zcb_curve_to_spot_curve(zcb_curve, tenors):
     return spot_curve
 
 
-def zcb_curve_to_forward_curve(zcb_curve, tenors):
+@instrumented
+def zcb_curve_to_forward_curve(zcb_curve, tenors, dts=None):
     """
     convert zcb_curve to forward_curve
 
     Args:
         zcb_curve: (list[float]) => zcb curve
         tenors: (list[float]) => tenors
+        dts: (list[float]) => accrual fractions of the periods [0, tenors[0]], [tenors[0], tenors[1]], ...
+             (default None => tenor differences)
     Returns:
         forward_curve: (list[float]) => forward curve
     """
@@ -254,24 +1136,32 @@ def zcb_curve_to_forward_curve(zcb_curve, tenors):
         tenors
     ), f"len(zcb_curve) [{len(zcb_curve)}] != len(tenors) [{len(tenors)}]"
 
-    zcb_curve = [1.0] + zcb_curve
-    tenors = [0.0] + tenors
+    zcb_curve = [1.0] + list(zcb_curve)
+    tenors = [0.0] + list(tenors)
+    if dts is None:
+        dts = [(tenors[i + 1] - tenors[i]) for i in range(len(tenors) - 1)]
+    assert (
+        len(dts) == len(zcb_curve) - 1
+    ), f"len(dts) [{len(dts)}] != len(tenors) [{len(zcb_curve) - 1}]"
 
     forward_curve = []
     for i in range(len(zcb_curve) - 1):
-        dt = tenors[i + 1] - tenors[i]
+        dt = dts[i]
         forward_curve.append((zcb_curve[i] / zcb_curve[i + 1] - 1.0) / dt)
     forward_curve.append(np.nan)
     return forward_curve
 
 
-def zcb_curve_to_forward_swap_curve(zcb_curve, tenors):
+@instrumented
+def zcb_curve_to_forward_swap_curve(zcb_curve, tenors, dts=None):
     """
     convert zcb_curve to forward_curve
 
     Args:
         zcb_curve: (list[float]) => zcb curve
         tenors: (list[float]) => tenors
+        dts: (list[float]) => accrual fractions of the periods [0, tenors[0]], [tenors[0], tenors[1]], ...
+             (default None => tenor differences)
     Returns:
         forward_swap_curve: (list[float]) => forward swap curve
     """
@@ -279,9 +1169,14 @@ def zcb_curve_to_forward_swap_curve(zcb_curve, tenors):
         tenors
     ), f"len(zcb_curve) [{len(zcb_curve)}] != len(tenors) [{len(tenors)}]"
 
-    zcb_curve = [1.0] + zcb_curve
-    tenors = [0.0] + tenors
-    dt = [(tenors[i + 1] - tenors[i]) for i in range(len(tenors) - 1)]
+    zcb_curve = [1.0] + list(zcb_curve)
+    tenors = [0.0] + list(tenors)
+    if dts is None:
+        dts = [(tenors[i + 1] - tenors[i]) for i in range(len(tenors) - 1)]
+    assert (
+        len(dts) == len(zcb_curve) - 1
+    ), f"len(dts) [{len(dts)}] != len(tenors) [{len(zcb_curve) - 1}]"
+    dt = dts
     zcb_x_dt_cumsum_curve = np.cumsum(
         [dt[i] * zcb_curve[i + 1] for i in range(1, len(zcb_curve) - 1)]
     )
@@ -300,6 +1195,45 @@ def zcb_curve_to_forward_swap_curve(zcb_curve, tenors):
     return forward_swap_curve
 
 
+@instrumented
+def forward_curve_to_forward_swap_curve(
+    forward_curve, discount_curve, tenors, dts=None
+):
+    """
+    forward swap curve with separate projection (forwards) and discount curves (multi-curve)
+    Note: same layout as zcb_curve_to_forward_swap_curve, to which it reduces when the
+          forwards are projected off discount_curve itself
+
+    Args:
+        forward_curve: (list[float]) => forward curve (as from zcb_curve_to_forward_curve)
+        discount_curve: (list[float]) => discount factors @ tenors
+        tenors: (list[float]) => tenors
+        dts: (list[float]) => accrual fractions of the periods [0, tenors[0]], [tenors[0], tenors[1]], ...
+             (default None => tenor differences)
+    Returns:
+        forward_swap_curve: (list[float]) => forward swap curve
+    """
+    assert len(discount_curve) == len(
+        tenors
+    ), f"len(discount_curve) [{len(discount_curve)}] != len(tenors) [{len(tenors)}]"
+    assert (
+        len(forward_curve) == len(tenors) + 1
+    ), f"len(forward_curve) [{len(forward_curve)}] != len(tenors) + 1 [{len(tenors) + 1}]"
+
+    if dts is None:
+        dts = np.diff(np.concatenate(([0.0], tenors)))
+    # period j (j >= 1) runs tenors[j - 1] -> tenors[j] and pays at tenors[j]
+    dt_x_df = np.asarray(dts[1:], dtype=np.float64) * np.asarray(
+        discount_curve[1:], dtype=np.float64
+    )
+    annuities = np.cumsum(dt_x_df)
+    floating_legs = np.cumsum(
+        dt_x_df * np.asarray(forward_curve[1:-1], dtype=np.float64)
+    )
+
+    return [np.nan] + list(floating_legs / annuities) + [np.nan]
+
+
 if __name__ == "__main__":
     N = 1.0
     f = 0.041950